@@ -0,0 +1,231 @@
+"standalone benchmarks for the geometry, simulation and regression hot paths \
+run from the repository root with python -m benchmarks.run_benchmarks"
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+from math import pi
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Ray import Ray
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+from linda.Polygon import Polygon
+from linda.RobotState import RobotState
+from linda.Scene import Scene
+from linda.LidarSimulator import LidarSimulator
+from linda.QuadraticRegression import quadratic_regression
+
+# (beams, obstacles) grids of the simulation benchmarks
+BEAMS = (100, 360, 1000)
+OBSTACLES = (10, 100, 1000)
+REGRESSION_SAMPLES = (10, 100, 1000, 10000)
+
+# the python engine gets slow fast, larger cases only run with --full
+PYTHON_ENGINE_LIMIT = 100 * 1000
+
+
+def synthetic_scene(nb_obstacles, size=10.0, seed=0):
+    "closed square room of side size with nb_obstacles random short walls \
+    and circles inside (about half of each)"
+    rng = np.random.default_rng(seed)
+    corners = [Vec2D(0.0, 0.0), Vec2D(size, 0.0), Vec2D(size, size),
+               Vec2D(0.0, size)]
+    scene = [LineSegment(corners[idx], corners[(idx + 1) % 4])
+             for idx in range(4)]
+
+    nb_circles = nb_obstacles // 2
+    for pos_x, pos_y, radius in zip(rng.uniform(0.5, size - 0.5, nb_circles),
+                                    rng.uniform(0.5, size - 0.5, nb_circles),
+                                    rng.uniform(0.05, 0.3, nb_circles)):
+        scene.append(Circle(Vec2D(pos_x, pos_y), radius))
+
+    nb_walls = nb_obstacles - nb_circles
+    starts = rng.uniform(0.5, size - 0.5, (nb_walls, 2))
+    ends = starts + rng.normal(0.0, 0.5, (nb_walls, 2))
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        scene.append(LineSegment(Vec2D(*start), Vec2D(*end)))
+
+    return scene
+
+
+def measure(func, repeat):
+    "best and mean seconds per call of func over repeat timeit runs"
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [total / number for total in timer.repeat(repeat, number)]
+    return {'best': min(times), 'mean': sum(times) / len(times),
+            'number': number, 'repeat': repeat}
+
+
+def bench_vec2d(repeat):
+    "scalar Vec2D operations"
+    vec1 = Vec2D(1.0, 2.0)
+    vec2 = Vec2D(-0.5, 3.0)
+    cases = [
+        ('add', lambda: vec1 + vec2),
+        ('dot', lambda: vec1.dot(vec2)),
+        ('cross', lambda: vec1.cross(vec2)),
+        ('length', vec1.length),
+        ('normalized', vec1.normalized),
+        ('rotate', lambda: vec1.rotate(0.3)),
+        ('oriented_angle', lambda: vec1.oriented_angle(vec2)),
+    ]
+    for name, func in cases:
+        yield 'vec2d.' + name, {}, measure(func, repeat)
+
+
+def bench_intersect(repeat):
+    "ray intersection of single primitives, hit and miss (the polygon miss \
+    is decided by its bounding box)"
+    segment = LineSegment(Vec2D(1.0, -1.0), Vec2D(1.0, 1.0))
+    circle = Circle(Vec2D(2.0, 0.0), 0.5)
+    angles = np.linspace(0.0, 2 * pi, 32, endpoint=False)
+    polygon = Polygon(np.column_stack((2.0 + 0.5 * np.cos(angles),
+                                       0.5 * np.sin(angles))))
+    hit = Ray(Vec2D(0.0, 0.0), Vec2D(1.0, 0.0))
+    miss = Ray(Vec2D(0.0, 0.0), Vec2D(-1.0, 0.0))
+
+    for case, ray in (('hit', hit), ('miss', miss)):
+        yield ('line_segment.intersect_ray', {'case': case},
+               measure(lambda: segment.intersect_ray(ray), repeat))
+        yield ('line_segment.closest_hit', {'case': case},
+               measure(lambda: segment.closest_hit(ray), repeat))
+        yield ('circle.intersect_ray', {'case': case},
+               measure(lambda: circle.intersect_ray(ray), repeat))
+        yield ('circle.closest_hit', {'case': case},
+               measure(lambda: circle.closest_hit(ray), repeat))
+        yield ('polygon.closest_hit', {'case': case, 'edges': polygon.nb_edges},
+               measure(lambda: polygon.closest_hit(ray), repeat))
+
+
+def bench_lidar(repeat, full):
+    "single scans for every engine, beam count and obstacle count. the \
+    numpy engine gets a prebuilt Scene like a long running simulation, the \
+    cost of building it is reported on its own as scene.compile"
+    state = RobotState(5.0, 5.0, 0.3)
+    for nb_obstacles in OBSTACLES:
+        scene = synthetic_scene(nb_obstacles)
+        compiled = Scene(scene)
+        yield ('scene.compile', {'obstacles': len(scene)},
+               measure(lambda: Scene(scene), repeat))
+        for nb_beams in BEAMS:
+            for engine in LidarSimulator.ENGINES:
+                if (engine == 'python' and not full and
+                        nb_beams * nb_obstacles > PYTHON_ENGINE_LIMIT):
+                    continue
+                sim = LidarSimulator(default_dist=10.0, nb_samples=nb_beams,
+                                     angular_cutoff=pi, engine=engine)
+                environment = compiled if engine == 'numpy' else scene
+                params = {'engine': engine, 'beams': nb_beams,
+                          'obstacles': len(scene)}
+                yield ('lidar_simulator.lidar_sample', params,
+                       measure(lambda: sim.lidar_sample(state, environment),
+                               repeat))
+
+
+def bench_lidar_batch(repeat):
+    "batched scans of many poses with the numpy engine on a prebuilt Scene"
+    scene = synthetic_scene(100)
+    compiled = Scene(scene)
+    rng = np.random.default_rng(1)
+    sim = LidarSimulator(default_dist=10.0, nb_samples=360, engine='numpy')
+    for nb_poses in (10, 100):
+        states = np.column_stack((rng.uniform(1.0, 9.0, (nb_poses, 2)),
+                                  rng.uniform(-pi, pi, nb_poses)))
+        params = {'engine': 'numpy', 'beams': 360, 'obstacles': len(scene),
+                  'poses': nb_poses}
+        yield ('lidar_simulator.lidar_sample_batch', params,
+               measure(lambda: sim.lidar_sample_batch(states, compiled),
+                       repeat))
+
+
+def bench_regression(repeat):
+    "quadratic_regression over growing sample sizes"
+    rng = np.random.default_rng(2)
+    for nb_samples in REGRESSION_SAMPLES:
+        x_vals = rng.uniform(-1.0, 1.0, nb_samples)
+        y_vals = 0.5 - x_vals + 2.0 * x_vals ** 2 + rng.normal(0, 0.1, nb_samples)
+        yield ('quadratic_regression', {'samples': nb_samples},
+               measure(lambda: quadratic_regression(None, x_vals, y_vals),
+                       repeat))
+
+
+SUITES = {
+    'vec2d': lambda args: bench_vec2d(args.repeat),
+    'intersect': lambda args: bench_intersect(args.repeat),
+    'lidar': lambda args: bench_lidar(args.repeat, args.full),
+    'lidar_batch': lambda args: bench_lidar_batch(args.repeat),
+    'regression': lambda args: bench_regression(args.repeat),
+}
+
+
+def _key(result):
+    "identity of a benchmark case across runs"
+    return result['name'], tuple(sorted(result['params'].items()))
+
+
+def compare(results, baseline_path):
+    "print the speed of every case relative to a previous run"
+    with open(baseline_path) as src:
+        baseline = {_key(result): result for result in json.load(src)['results']}
+
+    for result in results:
+        old = baseline.get(_key(result))
+        if old is None:
+            continue
+        ratio = result['best'] / old['best']
+        print("{name:40s} {params:50s} {ratio:6.2f}x {flag}".format(
+            name=result['name'], params=json.dumps(result['params']),
+            ratio=ratio, flag='SLOWER' if ratio > 1.1 else ''))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('suites', nargs='*', metavar='suite',
+                        help='suites to run ({}), all by default'.format(
+                            ', '.join(sorted(SUITES))))
+    parser.add_argument('-o', '--output', help='write results as json')
+    parser.add_argument('-c', '--compare', help='json file of a previous run')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='timeit repetitions per case')
+    parser.add_argument('--full', action='store_true',
+                        help='also run the slow python engine cases')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error("unknown suites: {}".format(', '.join(sorted(unknown))))
+
+    results = []
+    for suite in args.suites or sorted(SUITES):
+        for name, params, timing in SUITES[suite](args):
+            result = dict(name=name, params=params, **timing)
+            results.append(result)
+            print("{name:40s} {params:50s} {best:12.3e} s".format(
+                name=name, params=json.dumps(params), best=timing['best']))
+            sys.stdout.flush()
+
+    if args.output:
+        report = {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'results': results,
+        }
+        with open(args.output, 'w') as dst:
+            json.dump(report, dst, indent=2)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
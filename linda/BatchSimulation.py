@@ -0,0 +1,164 @@
+"headless batch scan generation, installed as the linda-simulate command"
+
+import argparse
+import json
+import sys
+import time
+from math import pi
+
+import numpy as np
+
+from linda.LidarSimulator import LidarSimulator
+from linda.MapFile import load_scene, CACHE_DIR
+from linda.Motion import parse_motion_script, motion_trajectory
+from linda.ParallelSimulator import ParallelSimulator
+from linda.ScanLog import ScanLogWriter
+from linda.SensorModel import SensorModel
+
+
+def load_trajectory(path):
+    "(N, 3) poses from a .npy file or a text file with x y theta per line"
+    if path.endswith('.npy'):
+        poses = np.load(path, mmap_mode='r')
+    else:
+        poses = np.loadtxt(path, dtype=np.float64, ndmin=2)
+    if poses.ndim != 2 or poses.shape[1] != 3:
+        raise ValueError("{}: expected N x 3 poses, got shape {}".format(
+            path, poses.shape))
+    return poses
+
+
+def load_script(path, start):
+    "trajectory of a motion script file starting at start"
+    with open(path) as src:
+        return motion_trajectory(start, parse_motion_script(src))
+
+
+def simulate(sim, environment, poses, writer, batch_size=4096, workers=1,
+             period=0.1):
+    "scan all poses batch by batch and append them to writer, returns the \
+    throughput statistics. scan i gets the timestamp i * period"
+    nb_poses = poses.shape[0]
+    ranges = np.empty((min(batch_size, nb_poses), sim.nb_samples))
+
+    parallel = None
+    if workers > 1:
+        parallel = ParallelSimulator(sim, environment, workers)
+
+    started = time.perf_counter()
+    simulated = 0.0
+    try:
+        for first in range(0, nb_poses, batch_size):
+            states = np.asarray(poses[first:first + batch_size],
+                                dtype=np.float64)
+            out = ranges[:states.shape[0]]
+
+            tic = time.perf_counter()
+            if parallel is not None:
+                parallel.lidar_sample_batch(states, out=out)
+            else:
+                sim.lidar_sample_batch(states, environment, out=out)
+            simulated += time.perf_counter() - tic
+
+            timestamps = (first + np.arange(states.shape[0])) * period
+            writer.write_batch(timestamps, states, out)
+    finally:
+        if parallel is not None:
+            parallel.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'scans': nb_poses,
+        'beams': nb_poses * sim.nb_samples,
+        'seconds': elapsed,
+        'simulation_seconds': simulated,
+        'scans_per_second': nb_poses / elapsed if elapsed > 0 else 0.0,
+        'beams_per_second': (nb_poses * sim.nb_samples / elapsed
+                             if elapsed > 0 else 0.0),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='linda-simulate',
+        description="simulate lidar scans along a trajectory and write them "
+                    "to a scan log without any display")
+    parser.add_argument('map', help='json map file')
+    parser.add_argument('output', help='scan log to write (appended to if '
+                                       'it exists with the same beams)')
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-t', '--trajectory',
+                        help='poses as .npy or text file with x y theta lines')
+    source.add_argument('-s', '--script',
+                        help="motion script with 'advance <m> [repeat]' and "
+                             "'rotate <rad> [repeat]' lines")
+    parser.add_argument('--start', type=float, nargs=3, default=(0.0, 0.0, 0.0),
+                        metavar=('X', 'Y', 'THETA'),
+                        help='start pose of the motion script')
+
+    parser.add_argument('-b', '--beams', type=int, default=100,
+                        help='beams per scan')
+    parser.add_argument('--cutoff', type=float, default=pi,
+                        help='angular cutoff in radians')
+    parser.add_argument('--max-range', type=float, default=10.0,
+                        help='range reported for beams without hit')
+    parser.add_argument('-e', '--engine', choices=LidarSimulator.ENGINES,
+                        default='numpy')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='worker processes, more than one uses '
+                             'ParallelSimulator')
+    parser.add_argument('--grid', action='store_true',
+                        help='index the map with a UniformGrid')
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help='cache of compiled maps (default %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always compile the map from scratch')
+    parser.add_argument('--batch-size', type=int, default=4096,
+                        help='poses per batch')
+    parser.add_argument('--noise', type=float, default=None,
+                        help='gaussian range noise sigma')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the range noise')
+    parser.add_argument('--period', type=float, default=0.1,
+                        help='seconds between scans for the timestamps')
+    parser.add_argument('--stats', help='write throughput statistics as json')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    environment = load_scene(args.map, grid=args.grid,
+                             cache_dir=None if args.no_cache else args.cache_dir)
+
+    if args.trajectory:
+        poses = load_trajectory(args.trajectory)
+    else:
+        poses = load_script(args.script, args.start)
+
+    sensor_model = None
+    if args.noise is not None:
+        sensor_model = SensorModel(args.max_range, sigma=args.noise,
+                                   rng=args.seed)
+    sim = LidarSimulator(default_dist=args.max_range, nb_samples=args.beams,
+                         angular_cutoff=args.cutoff, engine=args.engine,
+                         sensor_model=sensor_model)
+
+    with ScanLogWriter.for_simulator(args.output, sim) as writer:
+        stats = simulate(sim, environment, poses, writer,
+                         batch_size=args.batch_size, workers=args.workers,
+                         period=args.period)
+
+    sys.stderr.write("{scans} scans ({beams} beams) in {seconds:.3f} s: "
+                     "{scans_per_second:.1f} scans/s, "
+                     "{beams_per_second:.3g} beams/s\n".format(**stats))
+    if args.stats:
+        with open(args.stats, 'w') as dst:
+            json.dump(stats, dst, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
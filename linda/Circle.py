@@ -7,40 +7,78 @@ from math import sqrt
 class Circle(object):
     "simple 2d circle class"
 
+    __slots__ = ('pos', 'radius')
+
     def __init__(self, pos=Vec2D(), radius=1.0):
         self.pos = pos
         self.radius = radius
 
     def intersects(self, other):
         "return if self intersects other circle"
-        return (self.pos - other.pos).length() <= (self.radius + other.radius)
+        return self.pos.distance_to(other.pos) <= (self.radius + other.radius)
 
     def contains_circle(self, other):
         "return if self contains other circle"
-        return (self.pos - other.pos).length() <= (self.radius - other.radius)
+        return self.pos.distance_to(other.pos) <= (self.radius - other.radius)
 
     def contains_point(self, point):
         "return if self contains point"
-        return (self.pos - point).length() <= self.radius
+        return self.pos.distance_to(point) <= self.radius
 
     def intersect_ray(self, ray):
         "return whether self intersects with tangent"
 
-        direction = ray.direction
-        diff = ray.origin - self.pos
+        origin = ray.origin
+        dir_x = ray.direction.pos_x
+        dir_y = ray.direction.pos_y
+        diff_x = origin.pos_x - self.pos.pos_x
+        diff_y = origin.pos_y - self.pos.pos_y
 
-        param1 = direction.dot(direction)
-        param2 = 2 * direction.dot(diff)
-        param3 = diff.dot(diff) - (self.radius * self.radius)
+        param1 = dir_x * dir_x + dir_y * dir_y
+        param2 = 2 * (dir_x * diff_x + dir_y * diff_y)
+        param3 = diff_x * diff_x + diff_y * diff_y - (self.radius * self.radius)
 
         points = []
 
         for res in Circle.solve_quadratic(param1, param2, param3):
             if res >= 0:
-                points.append(ray.origin + direction * res)
+                points.append(Vec2D(origin.pos_x + dir_x * res,
+                                    origin.pos_y + dir_y * res))
 
         return points
 
+    def closest_hit(self, ray, max_dist=float('inf')):
+        "ray parameter of the closest non negative intersection with ray or \
+        None if there is none closer than max_dist (for unit directions the \
+        parameter is the distance). only the nearer root is computed"
+
+        origin = ray.origin
+        dir_x = ray.direction.pos_x
+        dir_y = ray.direction.pos_y
+        diff_x = origin.pos_x - self.pos.pos_x
+        diff_y = origin.pos_y - self.pos.pos_y
+
+        param1 = dir_x * dir_x + dir_y * dir_y
+        param2 = 2 * (dir_x * diff_x + dir_y * diff_y)
+        param3 = diff_x * diff_x + diff_y * diff_y - (self.radius * self.radius)
+
+        det = param2*param2 - 4*param1*param3
+
+        # same case distinction as solve_quadratic
+        if det < 0:
+            return None
+        elif abs(det) < Vec2D.EPSILON:
+            res = -param2/(2*param1)
+        else:
+            sqrt_det = sqrt(det)
+            res = (-param2 - sqrt_det)/(2 * param1)
+            if res < 0:
+                res = (-param2 + sqrt_det)/(2 * param1)
+
+        if 0 <= res < max_dist:
+            return res
+        return None
+
     def __str__(self):
         "string representation for debugging"
         return "Circle: {pos}, {r}".format(pos=str(self.pos), r=self.radius)
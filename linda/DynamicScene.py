@@ -0,0 +1,174 @@
+"static map index combined with a layer of movable obstacles"
+
+import numpy as np
+
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+from linda.RayCasting import segment_hits, circle_hits
+from linda.Scene import Scene
+
+class DynamicScene(object):
+    "ray caster for a static map plus obstacles that move between scans \
+    the static part is any prebuilt ray caster (Scene, UniformGrid, \
+    DistanceField) or a list of elements compiled into a Scene once. \
+    dynamic circles and segments live in small packed arrays that are \
+    updated in place by insert, remove, translate and replace through \
+    integer handles, so the static index is never rebuilt"
+
+    def __init__(self, static=(), dynamic=()):
+        if not hasattr(static, 'cast_rays'):
+            static = Scene(static)
+        self.static = static
+
+        self._elements = {}
+        # handle -> ('segment' | 'circle', row in the packed arrays)
+        self._slots = {}
+        self._next_handle = 0
+
+        self._seg_starts = np.empty((0, 2))
+        self._seg_ends = np.empty((0, 2))
+        self._seg_handles = []
+        self._circle_centers = np.empty((0, 2))
+        self._circle_radii = np.empty(0)
+        self._circle_handles = []
+
+        for elem in dynamic:
+            self.insert(elem)
+
+    @property
+    def nb_dynamic(self):
+        "number of dynamic elements"
+        return len(self._elements)
+
+    @property
+    def broadcast_width(self):
+        "the static width plus all dynamic elements, which every ray is \
+        tested against, see Scene.broadcast_width"
+        return getattr(self.static, 'broadcast_width', 1) + self.nb_dynamic
+
+    def dynamic_elements(self):
+        "list of the dynamic elements"
+        return list(self._elements.values())
+
+    def insert(self, elem):
+        "add a dynamic element, returns its handle"
+        handle = self._next_handle
+        self._next_handle += 1
+
+        if isinstance(elem, LineSegment):
+            row = len(self._seg_handles)
+            self._seg_starts = _grow(self._seg_starts, row)
+            self._seg_ends = _grow(self._seg_ends, row)
+            self._seg_handles.append(handle)
+            self._slots[handle] = ('segment', row)
+        elif isinstance(elem, Circle):
+            row = len(self._circle_handles)
+            self._circle_centers = _grow(self._circle_centers, row)
+            self._circle_radii = _grow(self._circle_radii, row)
+            self._circle_handles.append(handle)
+            self._slots[handle] = ('circle', row)
+        else:
+            raise TypeError("unknown element: {}".format(elem))
+
+        self._elements[handle] = elem
+        self._store(handle)
+        return handle
+
+    def remove(self, handle):
+        "delete a dynamic element, the last row is moved into its slot"
+        kind, row = self._slots.pop(handle)
+        del self._elements[handle]
+
+        if kind == 'segment':
+            handles = self._seg_handles
+            arrays = (self._seg_starts, self._seg_ends)
+        else:
+            handles = self._circle_handles
+            arrays = (self._circle_centers, self._circle_radii)
+
+        last = len(handles) - 1
+        if row != last:
+            moved = handles[last]
+            handles[row] = moved
+            self._slots[moved] = (kind, row)
+            for array in arrays:
+                array[row] = array[last]
+        handles.pop()
+
+    def translate(self, handle, vec):
+        "move a dynamic element by vec"
+        self.replace(handle, self._elements[handle] + vec)
+
+    def replace(self, handle, elem):
+        "swap a dynamic element for another one of the same kind"
+        kind, _ = self._slots[handle]
+        if kind != ('segment' if isinstance(elem, LineSegment) else 'circle'):
+            raise TypeError("cannot replace a {} by {}".format(kind, elem))
+        self._elements[handle] = elem
+        self._store(handle)
+
+    def cast_rays(self, origins, directions, default_dist):
+        "distance to the closest static or dynamic element along every ray"
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 2)
+
+        # misses come back as inf so that dynamic hits can be merged in
+        closest = np.array(self.static.cast_rays(origins, directions, np.inf),
+                           dtype=np.float64)
+
+        nb_segments = len(self._seg_handles)
+        nb_circles = len(self._circle_handles)
+        if nb_segments or nb_circles:
+            dir_len = np.sqrt(np.sum(directions * directions, axis=1))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                params = np.full(directions.shape[0], np.inf)
+                if nb_segments:
+                    params = np.minimum(params, segment_hits(
+                        origins, directions, self._seg_starts[:nb_segments],
+                        self._seg_ends[:nb_segments]).min(axis=1))
+                if nb_circles:
+                    params = np.minimum(params, circle_hits(
+                        origins, directions, self._circle_centers[:nb_circles],
+                        self._circle_radii[:nb_circles]).min(axis=1))
+                closest = np.minimum(closest, params * dir_len)
+
+        return np.where(np.isfinite(closest), closest, default_dist)
+
+    def __getitem__(self, handle):
+        return self._elements[handle]
+
+    def __iter__(self):
+        for elem in self.static:
+            yield elem
+        for elem in self._elements.values():
+            yield elem
+
+    def __len__(self):
+        # distance fields have no element count, they cost about as much
+        # as a single element per ray
+        nb_static = len(self.static) if hasattr(self.static, '__len__') else 1
+        return nb_static + self.nb_dynamic
+
+    def __str__(self):
+        return "DynamicScene: {d} dynamic elements over {s}".format(
+            d=self.nb_dynamic, s=self.static)
+
+    def _store(self, handle):
+        "write the geometry of a dynamic element into its row"
+        kind, row = self._slots[handle]
+        elem = self._elements[handle]
+        if kind == 'segment':
+            self._seg_starts[row] = (elem.start.pos_x, elem.start.pos_y)
+            self._seg_ends[row] = (elem.end.pos_x, elem.end.pos_y)
+        else:
+            self._circle_centers[row] = (elem.pos.pos_x, elem.pos.pos_y)
+            self._circle_radii[row] = elem.radius
+
+
+def _grow(array, row):
+    "array with room for row, capacity doubles when full"
+    if row < array.shape[0]:
+        return array
+    grown = np.empty((max(2 * array.shape[0], 8),) + array.shape[1:])
+    grown[:array.shape[0]] = array
+    return grown
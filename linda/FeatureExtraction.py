@@ -0,0 +1,230 @@
+"extraction of line and circle features from lidar scans"
+
+from collections import namedtuple
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+from linda.QuadraticRegression import quadratic_regression
+
+LineFeature = namedtuple('LineFeature', ['segment', 'nb_points', 'error'])
+CircleFeature = namedtuple('CircleFeature', ['circle', 'nb_points', 'error'])
+ScanFeatures = namedtuple('ScanFeatures', ['lines', 'circles'])
+
+class FeatureExtractor(object):
+    "turns a scan (angles, ranges) into a few line and circle features \
+    the scan is split into clusters at range discontinuities. clusters with \
+    a clear quadratic_regression curvature are tested with an algebraic \
+    circle fit, everything else is cut into lines with split and merge. \
+    features are LineSegment and Circle primitives in the robot frame or \
+    in the world frame if a robot state is given"
+
+    def __init__(self, default_dist=None, split_distance=0.1,
+                 split_ratio=0.05, min_points=4, line_tolerance=0.02,
+                 circle_tolerance=0.01, max_radius=1.0):
+        self.default_dist = default_dist
+        # neighbouring points are in different clusters if they are more
+        # than split_distance + split_ratio * range apart
+        self.split_distance = split_distance
+        self.split_ratio = split_ratio
+        self.min_points = min_points
+        self.line_tolerance = line_tolerance
+        self.circle_tolerance = circle_tolerance
+        self.max_radius = max_radius
+
+    def extract(self, angles, ranges, state=None):
+        "ScanFeatures of one scan, angles are relative to the heading"
+        points, ranges = self._scan_points(angles, ranges)
+        if state is not None:
+            points = _transform(points, state)
+
+        lines = []
+        circles = []
+        for first, last in self.segment(points, ranges):
+            cluster = points[first:last]
+
+            circle = self._fit_circle(cluster, state)
+            if circle is not None:
+                circles.append(circle)
+                continue
+
+            lines.extend(self._fit_lines(cluster))
+
+        return ScanFeatures(lines, circles)
+
+    def stream(self, angles, scans, states=None):
+        "generator of the ScanFeatures of every row of scans, e.g. the \
+        batches of scan_stream or the ranges of a ScanLogReader"
+        if states is None:
+            for ranges in scans:
+                yield self.extract(angles, ranges)
+        else:
+            for ranges, state in zip(scans, states):
+                yield self.extract(angles, ranges, state)
+
+    def segment(self, points, ranges):
+        "(first, last) index ranges of the clusters of consecutive points \
+        with at least min_points points"
+        if points.shape[0] == 0:
+            return []
+
+        steps = np.sqrt(np.sum(np.diff(points, axis=0) ** 2, axis=1))
+        limits = self.split_distance + self.split_ratio * np.minimum(
+            ranges[:-1], ranges[1:])
+        breaks = np.flatnonzero(steps > limits) + 1
+
+        firsts = np.concatenate(([0], breaks))
+        lasts = np.concatenate((breaks, [points.shape[0]]))
+        return [(int(first), int(last)) for first, last in zip(firsts, lasts)
+                if last - first >= self.min_points]
+
+    def _scan_points(self, angles, ranges):
+        "points and ranges of the beams that hit something, in beam order"
+        angles = np.asarray(angles, dtype=np.float64)
+        ranges = np.asarray(ranges, dtype=np.float64)
+
+        valid = np.isfinite(ranges)
+        if self.default_dist is not None:
+            valid &= ranges < self.default_dist
+
+        ranges = ranges[valid]
+        points = np.column_stack((ranges * np.cos(angles[valid]),
+                                  ranges * np.sin(angles[valid])))
+        return points, ranges
+
+    def _fit_circle(self, cluster, state):
+        "CircleFeature if the cluster is an arc bulging towards the sensor"
+        if cluster.shape[0] < max(self.min_points, 5):
+            return None
+
+        # curvature cue: quadratic in the frame of the chord
+        chord = cluster[-1] - cluster[0]
+        chord_len = np.sqrt(chord.dot(chord))
+        if chord_len == 0:
+            return None
+        chord /= chord_len
+        rel = cluster - cluster[0]
+        x_vals = rel.dot(chord)
+        y_vals = rel[:, 1] * chord[0] - rel[:, 0] * chord[1]
+        coeffs = quadratic_regression(None, x_vals, y_vals).mean
+        if 2.0 * abs(coeffs[2]) < 1.0 / self.max_radius:
+            return None
+
+        center, radius = _algebraic_circle(cluster)
+        if center is None or radius > self.max_radius:
+            return None
+
+        offsets = np.sqrt(np.sum((cluster - center) ** 2, axis=1)) - radius
+        error = float(np.sqrt(np.mean(offsets * offsets)))
+        if error > self.circle_tolerance:
+            return None
+
+        # the sensor sees the outside of landmarks: center behind the arc
+        sensor = np.zeros(2) if state is None else np.asarray(state[:2])
+        if (np.sqrt(np.sum((center - sensor) ** 2)) <
+                np.sqrt(np.sum((cluster - sensor) ** 2, axis=1)).mean()):
+            return None
+
+        return CircleFeature(Circle(Vec2D(float(center[0]), float(center[1])),
+                                    float(radius)),
+                             cluster.shape[0], error)
+
+    def _fit_lines(self, cluster):
+        "split and merge the cluster into LineFeatures"
+        pieces = []
+        stack = [(0, cluster.shape[0])]
+        while stack:
+            first, last = stack.pop()
+            dist = _chord_distances(cluster[first:last])
+            split = int(np.argmax(dist))
+            if dist[split] > self.line_tolerance and \
+                    min(split + 1, last - first - split) >= 2:
+                # the split point belongs to both halves
+                stack.append((first + split, last))
+                stack.append((first, first + split + 1))
+            else:
+                pieces.append((first, last))
+        pieces.sort()
+
+        merged = [pieces[0]]
+        for first, last in pieces[1:]:
+            prev_first, _ = merged[-1]
+            if _line_error(cluster[prev_first:last]) < self.line_tolerance:
+                merged[-1] = (prev_first, last)
+            else:
+                merged.append((first, last))
+
+        lines = []
+        for first, last in merged:
+            if last - first < self.min_points:
+                continue
+            lines.append(_line_feature(cluster[first:last]))
+        return lines
+
+
+def _transform(points, state):
+    "robot frame points to the world frame of state (x, y, theta)"
+    pos_x, pos_y, theta = state
+    cosine = np.cos(theta)
+    sine = np.sin(theta)
+    return np.column_stack((
+        pos_x + cosine * points[:, 0] - sine * points[:, 1],
+        pos_y + sine * points[:, 0] + cosine * points[:, 1]))
+
+
+def _chord_distances(points):
+    "distances of points to the line through the first and the last point"
+    chord = points[-1] - points[0]
+    chord_len = np.sqrt(chord.dot(chord))
+    rel = points - points[0]
+    if chord_len == 0:
+        return np.sqrt(np.sum(rel * rel, axis=1))
+    return np.abs(rel[:, 0] * chord[1] - rel[:, 1] * chord[0]) / chord_len
+
+
+def _total_least_squares(points):
+    "centroid, unit direction and rms orthogonal distance of the best line"
+    centroid = points.mean(axis=0)
+    centered = points - centroid
+    eigvals, eigvecs = np.linalg.eigh(centered.T.dot(centered))
+    error = np.sqrt(max(eigvals[0], 0.0) / points.shape[0])
+    return centroid, eigvecs[:, 1], error
+
+
+def _line_error(points):
+    "rms orthogonal distance of points to their best line"
+    return _total_least_squares(points)[2]
+
+
+def _line_feature(points):
+    "LineFeature of the best line through points clipped to their extent"
+    centroid, direction, error = _total_least_squares(points)
+    params = (points - centroid).dot(direction)
+    start = centroid + params.min() * direction
+    end = centroid + params.max() * direction
+    if (points[-1] - points[0]).dot(direction) < 0:
+        start, end = end, start
+    segment = LineSegment(Vec2D(float(start[0]), float(start[1])),
+                          Vec2D(float(end[0]), float(end[1])))
+    return LineFeature(segment, points.shape[0], float(error))
+
+
+def _algebraic_circle(points):
+    "least squares circle x^2 + y^2 + D x + E y + F = 0 (Kasa fit), \
+    returns (center, radius) or (None, None) for degenerate points"
+    # centering keeps the normal equations well conditioned
+    mean = points.mean(axis=0)
+    rel = points - mean
+    design = np.column_stack((rel, np.ones(rel.shape[0])))
+    rhs = -np.sum(rel * rel, axis=1)
+    solution, _, rank, _ = np.linalg.lstsq(design, rhs, rcond=None)
+    if rank < 3:
+        return None, None
+
+    center = -0.5 * solution[:2]
+    radius2 = center.dot(center) - solution[2]
+    if radius2 <= 0:
+        return None, None
+    return center + mean, float(np.sqrt(radius2))
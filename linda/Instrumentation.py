@@ -0,0 +1,160 @@
+"opt in counters and per stage timing histograms for the hot paths \
+disabled by default, the instrumented code then only pays for a flag check \
+or a no-op context manager per scan. enable() turns recording on, \
+snapshot() and prometheus_text() export what was recorded"
+
+import bisect
+import threading
+import time
+
+ENABLED = False
+
+# histogram bucket upper bounds in nanoseconds: 1us, 2us, 4us, ... ~17s
+BUCKETS_NS = tuple(1000 << shift for shift in range(25))
+
+_LOCK = threading.Lock()
+_COUNTERS = {}
+_STAGES = {}
+
+
+def enable():
+    "start recording"
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    "stop recording, recorded values are kept"
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    "forget all recorded values"
+    with _LOCK:
+        _COUNTERS.clear()
+        _STAGES.clear()
+
+
+def count(name, amount=1):
+    "add amount to the counter name"
+    if not ENABLED:
+        return
+    with _LOCK:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + amount
+
+
+def observe(name, nanoseconds):
+    "record one execution of stage name that took nanoseconds"
+    if not ENABLED:
+        return
+    with _LOCK:
+        histogram = _STAGES.get(name)
+        if histogram is None:
+            histogram = _STAGES[name] = _Histogram()
+        histogram.observe(nanoseconds)
+
+
+def stage(name):
+    "context manager timing the enclosed block as stage name"
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def snapshot():
+    "dict with the counters and, for every stage, its call count, total \
+    nanoseconds and cumulative (upper bound ns, count) buckets"
+    with _LOCK:
+        stages = {}
+        for name, histogram in _STAGES.items():
+            cumulative = 0
+            buckets = []
+            for bound, bucket in zip(BUCKETS_NS + (float('inf'),),
+                                     histogram.buckets):
+                cumulative += bucket
+                buckets.append((bound, cumulative))
+            stages[name] = {'count': histogram.count,
+                            'total_ns': histogram.total_ns,
+                            'buckets': buckets}
+        return {'counters': dict(_COUNTERS), 'stages': stages}
+
+
+def prometheus_text(prefix='linda'):
+    "snapshot in the prometheus text exposition format, counters become \
+    <prefix>_<name>_total and stages one <prefix>_stage_seconds histogram"
+    snap = snapshot()
+    lines = []
+
+    for name in sorted(snap['counters']):
+        metric = "{}_{}_total".format(prefix, _metric_name(name))
+        lines.append("# TYPE {} counter".format(metric))
+        lines.append("{} {}".format(metric, snap['counters'][name]))
+
+    if snap['stages']:
+        metric = "{}_stage_seconds".format(prefix)
+        lines.append("# TYPE {} histogram".format(metric))
+        for name in sorted(snap['stages']):
+            info = snap['stages'][name]
+            for bound, cumulative in info['buckets']:
+                upper = "+Inf" if bound == float('inf') else repr(bound / 1e9)
+                lines.append('{}_bucket{{stage="{}",le="{}"}} {}'.format(
+                    metric, name, upper, cumulative))
+            lines.append('{}_sum{{stage="{}"}} {}'.format(
+                metric, name, repr(info['total_ns'] / 1e9)))
+            lines.append('{}_count{{stage="{}"}} {}'.format(
+                metric, name, info['count']))
+
+    return "\n".join(lines) + "\n"
+
+
+class _Histogram(object):
+    "call count, total time and log2 spaced buckets of one stage"
+
+    __slots__ = ('count', 'total_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.buckets = [0] * (len(BUCKETS_NS) + 1)
+
+    def observe(self, nanoseconds):
+        self.count += 1
+        self.total_ns += nanoseconds
+        self.buckets[bisect.bisect_left(BUCKETS_NS, nanoseconds)] += 1
+
+
+class _Stage(object):
+    "times a with block"
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter_ns() - self.start)
+
+
+class _NullStage(object):
+    "stand in for _Stage while recording is disabled"
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+
+def _metric_name(name):
+    "prometheus compatible metric name"
+    return "".join(char if char.isalnum() else '_' for char in name)
@@ -1,19 +1,192 @@
 
 import numpy as np
-from math import pi
+from math import pi, cos, sin
 
 from linda.Vec2D import Vec2D
 from linda.Ray import Ray
+from linda.RobotState import RobotState
+from linda.Scene import Scene
+import linda.Instrumentation as instrumentation
 
 class LidarSimulator(object):
 
-    def __init__(self, default_dist=10.0, nb_samples=100, angular_cutoff=pi):
+    ENGINES = ('python', 'numpy')
+
+    # upper bound on rays x obstacles evaluated at once by lidar_sample_batch
+    BATCH_ELEMENTS = 1 << 20
+
+    def __init__(self, default_dist=10.0, nb_samples=100, angular_cutoff=pi,
+                 engine='python', sensor_model=None):
         self.default_dist = default_dist
         self.nb_samples = nb_samples
         # measurement points are in [-angular_cutoff, +angular_cutoff]
         self.angular_cutoff = angular_cutoff
 
+        if engine not in LidarSimulator.ENGINES:
+            raise ValueError("unknown engine: {}".format(engine))
+        self.engine = engine
+
+        # optional SensorModel applied to every simulated scan
+        self.sensor_model = sensor_model
+
+    @property
+    def sensor_model(self):
+        "SensorModel applied to every simulated scan or None"
+        return self._sensor_model
+
+    @sensor_model.setter
+    def sensor_model(self, sensor_model):
+        # the model tells misses from hits by ranges >= max_range, a miss
+        # reported at default_dist below that would turn into a hit
+        if sensor_model is not None and \
+                sensor_model.max_range > self.default_dist:
+            raise ValueError("sensor model max_range {} exceeds the "
+                             "simulator default_dist {}".format(
+                                 sensor_model.max_range, self.default_dist))
+        self._sensor_model = sensor_model
+
+    def check_measurement(self, noise_sigma, batch=False):
+        "raise ValueError for noise settings the sensor model cannot honor, \
+        batch scans return no angles the model could jitter"
+        if self.sensor_model is None:
+            return
+        # noise is added to the ideal ranges before the sensor model, which
+        # would then take noisy misses for hits
+        if noise_sigma is not None:
+            raise ValueError("noise_sigma cannot be combined with a sensor "
+                             "model, use its sigma instead")
+        if batch and self.sensor_model.angular_sigma > 0:
+            raise ValueError("batch scans have fixed beam angles, a sensor "
+                             "model with angular_sigma needs lidar_sample")
+
     def lidar_sample(self, robot_state, environment, noise_sigma=None):
+        self.check_measurement(noise_sigma)
+        with instrumentation.stage('lidar.scan'):
+            if self.engine == 'numpy':
+                scan = self._lidar_sample_numpy(robot_state, environment,
+                                                noise_sigma)
+            else:
+                scan = self._lidar_sample_python(robot_state, environment,
+                                                 noise_sigma)
+
+            return self._measure(*scan)
+
+    def lidar_sample_batch(self, states, environment, noise_sigma=None,
+                           chunk_size=None, out=None):
+        "expected ranges for many robot states at once \
+        states is an (N, 3) array (or sequence of RobotState), the result an \
+        (N, nb_samples) range matrix whose rows equal lidar_sample. poses are \
+        processed in chunks of chunk_size to bound peak memory. the ranges \
+        are written into out if given"
+        self.check_measurement(noise_sigma, batch=True)
+        states = np.asarray(states, dtype=np.float64).reshape(-1, 3)
+        if out is None:
+            out = np.empty((states.shape[0], self.nb_samples))
+        ranges = out
+
+        if self.engine == 'numpy':
+            caster = self._ray_caster(environment)
+            if chunk_size is None:
+                # other ray casters are assumed to work ray by ray
+                width = getattr(caster, 'broadcast_width', 1)
+                per_pose = self.nb_samples * max(width, 1)
+                chunk_size = max(LidarSimulator.BATCH_ELEMENTS // per_pose, 1)
+
+            for first in range(0, states.shape[0], chunk_size):
+                chunk = states[first:first + chunk_size]
+                ranges[first:first + chunk.shape[0]] = self._cast_poses(
+                    chunk, caster)
+        else:
+            for idx, state in enumerate(states):
+                ranges[idx] = self._lidar_sample_python(
+                    RobotState(*state), environment, None)[1]
+
+        if not noise_sigma is None:
+            with instrumentation.stage('lidar.noise'):
+                ranges += np.random.normal(0.0, noise_sigma, ranges.shape)
+
+        if self.sensor_model is not None:
+            with instrumentation.stage('lidar.sensor_model'):
+                ranges[...] = self.sensor_model.apply(ranges)
+
+        return ranges
+
+    def lidar_sample_sparse(self, robot_state, environment, beams,
+                            noise_sigma=None):
+        "scan with only the beams whose indices are given, e.g. a fixed \
+        subset for likelihood evaluation. the angles are the same as those \
+        of the corresponding beams of lidar_sample"
+        self.check_measurement(noise_sigma)
+        beams = np.asarray(beams, dtype=np.intp)
+        angles = self.beam_angles(robot_state.theta)[beams]
+
+        ranges = self._cast_angles(robot_state, angles, environment)
+
+        if not noise_sigma is None:
+            with instrumentation.stage('lidar.noise'):
+                ranges += np.random.normal(0.0, noise_sigma, ranges.size)
+
+        return self._measure(angles - robot_state.theta, ranges)
+
+    def sparse_beams(self, nb_beams):
+        "indices of nb_beams beams evenly spread over the scan"
+        nb_beams = min(nb_beams, self.nb_samples)
+        return np.unique(np.linspace(0, self.nb_samples - 1, nb_beams)
+                         .round().astype(np.intp))
+
+    def lidar_sample_adaptive(self, robot_state, environment, coarse_stride=8,
+                              range_threshold=0.05, range_ratio=0.05,
+                              noise_sigma=None):
+        "scan that casts every coarse_stride-th beam first and then bisects \
+        only between neighbouring beams whose ranges differ by more than \
+        range_threshold + range_ratio * range, so corners, edges and close \
+        obstacles keep the full resolution while open areas stay coarse. \
+        returns the irregular relative angles and ranges of the cast beams"
+        self.check_measurement(noise_sigma)
+        all_angles = self.beam_angles(robot_state.theta)
+
+        beams = np.arange(0, self.nb_samples, coarse_stride)
+        if beams[-1] != self.nb_samples - 1:
+            beams = np.append(beams, self.nb_samples - 1)
+        ranges = self._cast_angles(robot_state, all_angles[beams], environment)
+
+        while True:
+            gaps = np.diff(beams)
+            limits = range_threshold + range_ratio * np.minimum(ranges[:-1],
+                                                                ranges[1:])
+            refine = (gaps > 1) & (np.abs(np.diff(ranges)) > limits)
+            if not np.any(refine):
+                break
+
+            new_beams = beams[:-1][refine] + gaps[refine] // 2
+            new_ranges = self._cast_angles(robot_state, all_angles[new_beams],
+                                           environment)
+
+            beams = np.concatenate((beams, new_beams))
+            ranges = np.concatenate((ranges, new_ranges))
+            order = np.argsort(beams, kind='stable')
+            beams = beams[order]
+            ranges = ranges[order]
+
+        if not noise_sigma is None:
+            with instrumentation.stage('lidar.noise'):
+                ranges += np.random.normal(0.0, noise_sigma, ranges.size)
+
+        return self._measure(all_angles[beams] - robot_state.theta, ranges)
+
+    def beam_angles(self, theta):
+        "absolute angles of all beams for a robot heading theta (or an array \
+        of headings, one row per heading) accumulated the same way as in the \
+        python engine"
+        theta = np.asarray(theta, dtype=np.float64)
+        delta_theta = 2*self.angular_cutoff / self.nb_samples
+
+        steps = np.full(theta.shape + (self.nb_samples + 1,), delta_theta)
+        steps[..., 0] = theta - self.angular_cutoff
+
+        return np.cumsum(steps, axis=-1)[..., 1:]
+
+    def _lidar_sample_python(self, robot_state, environment, noise_sigma):
         y_values = []
         x_values = []
 
@@ -21,26 +194,125 @@ class LidarSimulator(object):
         current_angle = robot_state.theta - self.angular_cutoff
         delta_theta = 2*self.angular_cutoff / self.nb_samples
 
-        for _ in range(0, self.nb_samples):
-            current_angle = current_angle + delta_theta
-            ray = Ray(origin, Vec2D(1, 0).rotate(current_angle))
+        # ray construction and intersection are interleaved per beam
+        with instrumentation.stage('lidar.intersect'):
+            for _ in range(0, self.nb_samples):
+                current_angle = current_angle + delta_theta
+                y_val = self._cast_ray_python(origin, current_angle,
+                                              environment)
 
-            intersection_points = []
-            for elem in environment:
-                intersection_points += elem.intersect_ray(ray)
+                x_values.append(current_angle - robot_state.theta)
+                y_values.append(y_val)
 
-            inter_dist = [(p - origin).length() for p in intersection_points]
+        y_values = np.array(y_values)
+        if instrumentation.ENABLED:
+            self._count_beams(y_values)
+            self._count_python_tests(y_values.size, environment)
 
-            if inter_dist:
-                y_val = min(inter_dist)
-            else:
-                y_val = self.default_dist
+        # one draw for the whole scan instead of one call per beam
+        if not noise_sigma is None:
+            with instrumentation.stage('lidar.noise'):
+                y_values += np.random.normal(0.0, noise_sigma, y_values.size)
+
+        return (np.array(x_values), y_values)
+
+    def _measure(self, angles, ranges):
+        "apply the sensor model, if any, to a simulated scan"
+        if self.sensor_model is None:
+            return (angles, ranges)
+        with instrumentation.stage('lidar.sensor_model'):
+            return self.sensor_model.apply(ranges, angles)
+
+    def _count_beams(self, ranges):
+        "instrumentation counters for a batch of cast beams, the ray casters \
+        count their primitive tests themselves"
+        instrumentation.count('lidar.beams', ranges.size)
+        instrumentation.count('lidar.hits', int(np.count_nonzero(
+            ranges != self.default_dist)))
+
+    @staticmethod
+    def _count_python_tests(nb_beams, environment):
+        "the python engine tests every element of environment on every beam"
+        instrumentation.count('lidar.primitive_tests',
+                              nb_beams * sum(1 for _ in environment))
+
+    def _cast_ray_python(self, origin, angle, environment):
+        "range of a single beam by iterating over the environment"
+        ray = Ray(origin, Vec2D(cos(angle), sin(angle)))
+
+        # directions are unit vectors so ray parameters are distances,
+        # every element only has to beat the closest hit so far
+        y_val = float('inf')
+        for elem in environment:
+            param = elem.closest_hit(ray, y_val)
+            if param is not None:
+                y_val = param
+
+        if y_val == float('inf'):
+            y_val = self.default_dist
+        return y_val
+
+    def _cast_angles(self, robot_state, angles, environment):
+        "ranges of beams with the given absolute angles"
+        if self.engine == 'numpy':
+            caster = self._ray_caster(environment)
+            with instrumentation.stage('lidar.rays'):
+                origins = np.tile([robot_state.x, robot_state.y],
+                                  (angles.size, 1))
+                directions = np.column_stack((np.cos(angles), np.sin(angles)))
+            with instrumentation.stage('lidar.intersect'):
+                ranges = np.asarray(caster.cast_rays(origins, directions,
+                                                     self.default_dist),
+                                    dtype=np.float64)
+        else:
+            origin = Vec2D(robot_state.x, robot_state.y)
+            with instrumentation.stage('lidar.intersect'):
+                ranges = np.array([self._cast_ray_python(origin, angle,
+                                                         environment)
+                                   for angle in angles.tolist()],
+                                  dtype=np.float64)
+            if instrumentation.ENABLED:
+                self._count_python_tests(ranges.size, environment)
+
+        if instrumentation.ENABLED:
+            self._count_beams(ranges)
+        return ranges
+
+    @staticmethod
+    def _ray_caster(environment):
+        "scenes and acceleration structures cast rays themselves, \
+        plain environment lists are compiled into a scene first"
+        if hasattr(environment, 'cast_rays'):
+            return environment
+        return Scene(environment)
+
+    def _lidar_sample_numpy(self, robot_state, environment, noise_sigma):
+        "all beams against all obstacles in one broadcast"
+        angles = self.beam_angles(robot_state.theta)
+
+        ranges = self._cast_poses(np.array([robot_state]),
+                                  self._ray_caster(environment))[0]
+
+        if not noise_sigma is None:
+            with instrumentation.stage('lidar.noise'):
+                ranges = ranges + np.random.normal(0.0, noise_sigma,
+                                                   ranges.size)
+
+        return (angles - robot_state.theta, ranges)
+
+    def _cast_poses(self, states, caster):
+        "(N, nb_samples) ranges for an (N, 3) array of states"
+        with instrumentation.stage('lidar.rays'):
+            angles = self.beam_angles(states[:, 2])
 
-            if not noise_sigma is None:
-                y_val += np.random.normal(0.0, noise_sigma)
+            origins = np.repeat(states[:, :2], self.nb_samples, axis=0)
+            directions = np.column_stack((np.cos(angles).ravel(),
+                                          np.sin(angles).ravel()))
 
-            x_values.append(current_angle - robot_state.theta)
-            y_values.append(y_val)
+        with instrumentation.stage('lidar.intersect'):
+            ranges = caster.cast_rays(origins, directions, self.default_dist)
 
-        return (np.array(x_values), np.array(y_values))
+        if instrumentation.ENABLED:
+            self._count_beams(ranges)
 
+        return ranges.reshape(states.shape[0], self.nb_samples)
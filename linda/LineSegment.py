@@ -4,9 +4,46 @@ from linda.Vec2D import Vec2D
 
 class LineSegment(object):
 
+    __slots__ = ('_start', '_end', '_direction', '_length')
+
     def __init__(self, start, end):
-        self.start = start
-        self.end = end
+        self._start = start
+        self._end = end
+        self._direction = None
+        self._length = None
+
+    @property
+    def start(self):
+        return self._start
+
+    @start.setter
+    def start(self, start):
+        self._start = start
+        self._direction = None
+        self._length = None
+
+    @property
+    def end(self):
+        return self._end
+
+    @end.setter
+    def end(self, end):
+        self._end = end
+        self._direction = None
+        self._length = None
+
+    @property
+    def direction(self):
+        "vector from start to end, cached until start or end are reassigned"
+        if self._direction is None:
+            self._direction = self._end - self._start
+        return self._direction
+
+    def length(self):
+        "length of the segment, cached like direction"
+        if self._length is None:
+            self._length = self.direction.length()
+        return self._length
 
     def intersect_ray(self, ray):
         "return whether self and ray intersect \
@@ -14,12 +51,14 @@ class LineSegment(object):
         https://stackoverflow.com/questions/563198/ \
         how-do-you-detect-where-two-line-segments-intersect"
 
-        dir1 = self.end - self.start
+        dir1 = self.direction
         dir2 = ray.direction
+        origin = ray.origin
 
-        dir_cross_prod = dir1.cross(dir2)
-        diff = (ray.origin - self.start)
-        diff_cross_dir1 = diff.cross(dir1)
+        dir_cross_prod = dir1.pos_x * dir2.pos_y - dir1.pos_y * dir2.pos_x
+        diff_x = origin.pos_x - self._start.pos_x
+        diff_y = origin.pos_y - self._start.pos_y
+        diff_cross_dir1 = diff_x * dir1.pos_y - diff_y * dir1.pos_x
 
         if abs(dir_cross_prod) < Vec2D.EPSILON and \
            abs(diff_cross_dir1) < Vec2D.EPSILON:
@@ -30,12 +69,38 @@ class LineSegment(object):
             return []
         else:
             param_u = diff_cross_dir1 / dir_cross_prod
-            param_t = diff.cross(dir2) / dir_cross_prod
+            param_t = (diff_x * dir2.pos_y - diff_y * dir2.pos_x) / dir_cross_prod
             if 0 <= param_u and 0 <= param_t <= 1:
-                return [ray.origin + ray.direction * param_u]
+                return [Vec2D(origin.pos_x + dir2.pos_x * param_u,
+                              origin.pos_y + dir2.pos_y * param_u)]
             else:
                 return []
 
+    def closest_hit(self, ray, max_dist=float('inf')):
+        "ray parameter of the intersection with ray or None if there is \
+        none closer than max_dist (for unit directions the parameter is the \
+        distance). same conditions as intersect_ray but no point is built"
+
+        dir1 = self.direction
+        dir2 = ray.direction
+        origin = ray.origin
+
+        dir_cross_prod = dir1.pos_x * dir2.pos_y - dir1.pos_y * dir2.pos_x
+        if abs(dir_cross_prod) < Vec2D.EPSILON:
+            return None
+
+        diff_x = origin.pos_x - self._start.pos_x
+        diff_y = origin.pos_y - self._start.pos_y
+
+        param_u = (diff_x * dir1.pos_y - diff_y * dir1.pos_x) / dir_cross_prod
+        if not 0 <= param_u < max_dist:
+            return None
+
+        param_t = (diff_x * dir2.pos_y - diff_y * dir2.pos_x) / dir_cross_prod
+        if 0 <= param_t <= 1:
+            return param_u
+        return None
+
     def is_equal(self, other):
         
         if other is None:
@@ -0,0 +1,181 @@
+"json map files with an on disk cache of the compiled geometry"
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+from linda.Polyline import Polyline, polyline_edges
+from linda.Polygon import Polygon
+from linda.Scene import Scene
+from linda.UniformGrid import UniformGrid
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'linda')
+
+# bump when the cached arrays change meaning
+CACHE_VERSION = 1
+
+
+def load_map(path):
+    "list of the elements of a json map file of the form \
+    {\"segments\": [[x1, y1, x2, y2], ...], \"circles\": [[x, y, r], ...], \
+    \"polylines\": [[[x, y], ...], ...], \"polygons\": [[[x, y], ...], ...]}, \
+    all keys are optional"
+    with open(path) as src:
+        return map_elements(json.load(src))
+
+
+def save_map(path, environment):
+    "write the elements of environment as json map file"
+    with open(path, 'w') as dst:
+        json.dump(map_dict(environment), dst, indent=1)
+
+
+def load_scene(path, grid=False, cell_size=None, cache_dir=CACHE_DIR):
+    "compiled Scene (or UniformGrid if grid) of a json map file \
+    the arrays are cached in cache_dir under the sha256 of the file \
+    content, so reloading an unchanged map skips parsing and indexing. \
+    cache_dir None disables the cache"
+    with open(path, 'rb') as src:
+        content = src.read()
+
+    cache_path = None
+    if cache_dir is not None:
+        key = hashlib.sha256(content)
+        key.update(json.dumps([CACHE_VERSION, grid, cell_size]).encode())
+        cache_path = os.path.join(cache_dir, key.hexdigest() + '.npz')
+        cached = _read_cache(cache_path, grid)
+        if cached is not None:
+            return cached
+
+    scene = _scene_from_dict(json.loads(content.decode('utf-8')))
+    result = UniformGrid(scene, cell_size) if grid else scene
+
+    if cache_path is not None:
+        _write_cache(cache_path, result)
+    return result
+
+
+def map_elements(data):
+    "elements of a parsed json map"
+    elements = []
+    for start_x, start_y, end_x, end_y in data.get('segments', ()):
+        elements.append(LineSegment(Vec2D(start_x, start_y),
+                                    Vec2D(end_x, end_y)))
+    for pos_x, pos_y, radius in data.get('circles', ()):
+        elements.append(Circle(Vec2D(pos_x, pos_y), radius))
+    for vertices in data.get('polylines', ()):
+        elements.append(Polyline(vertices))
+    for vertices in data.get('polygons', ()):
+        elements.append(Polygon(vertices))
+    return elements
+
+
+def map_dict(environment):
+    "json serializable dict of the elements of environment"
+    segments = []
+    circles = []
+    polylines = []
+    polygons = []
+    for elem in environment:
+        if isinstance(elem, LineSegment):
+            segments.append([elem.start.pos_x, elem.start.pos_y,
+                             elem.end.pos_x, elem.end.pos_y])
+        elif isinstance(elem, Circle):
+            circles.append([elem.pos.pos_x, elem.pos.pos_y, elem.radius])
+        elif isinstance(elem, Polygon):
+            polygons.append(elem.vertices.tolist())
+        elif isinstance(elem, Polyline):
+            polylines.append(elem.vertices.tolist())
+        else:
+            raise TypeError("unknown element: {}".format(elem))
+    data = {'segments': segments, 'circles': circles}
+    if polylines:
+        data['polylines'] = polylines
+    if polygons:
+        data['polygons'] = polygons
+    return data
+
+
+def _scene_from_dict(data):
+    "Scene straight from the coordinate lists without element objects, \
+    polylines and polygons are expanded into their edges like in Scene"
+    segments = np.array(data.get('segments', ()),
+                        dtype=np.float64).reshape(-1, 4)
+    circles = np.array(data.get('circles', ()),
+                       dtype=np.float64).reshape(-1, 3)
+
+    seg_starts = [segments[:, :2]]
+    seg_ends = [segments[:, 2:]]
+    for key, closed in (('polylines', False), ('polygons', True)):
+        for vertices in data.get(key, ()):
+            starts, ends = polyline_edges(vertices, closed)
+            seg_starts.append(starts)
+            seg_ends.append(ends)
+
+    return Scene.from_arrays(np.concatenate(seg_starts),
+                             np.concatenate(seg_ends),
+                             circles[:, :2], circles[:, 2])
+
+
+def _read_cache(cache_path, grid):
+    "Scene or UniformGrid of a cache file, None if it is missing, \
+    truncated, lacks arrays or cannot be turned into a scene"
+    try:
+        with np.load(cache_path) as cached:
+            return _from_cache(cached, grid)
+    except Exception:
+        # np.load raises zipfile.BadZipFile for truncated files and a
+        # stale layout KeyError or ValueError, all of them are a miss
+        return None
+
+
+def _write_cache(cache_path, result):
+    "store the arrays of a Scene or UniformGrid, written to a temporary \
+    file first so that concurrent readers never see a partial cache"
+    if isinstance(result, UniformGrid):
+        scene = result.scene
+        arrays = {'cell_size': result.cell_size,
+                  'lower': result.lower,
+                  'shape': np.array(result.shape),
+                  'cell_offsets': result.cell_offsets,
+                  'cell_items': result.cell_items}
+    else:
+        scene = result
+        arrays = {}
+    arrays.update(seg_starts=scene.seg_starts, seg_ends=scene.seg_ends,
+                  circle_centers=scene.circle_centers,
+                  circle_radii=scene.circle_radii)
+
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        handle, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as dst:
+                np.savez(dst, **arrays)
+            os.replace(tmp_path, cache_path)
+        finally:
+            # only left over if writing or renaming failed
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except (IOError, OSError):
+        # caching is an optimization, a read only cache dir is no error
+        pass
+
+
+def _from_cache(cached, grid):
+    "Scene or UniformGrid of cached arrays"
+    scene = Scene.from_arrays(cached['seg_starts'], cached['seg_ends'],
+                              cached['circle_centers'], cached['circle_radii'])
+    if not grid:
+        return scene
+    return UniformGrid.from_arrays(scene, cached['cell_size'], cached['lower'],
+                                   cached['shape'], cached['cell_offsets'],
+                                   cached['cell_items'])
@@ -0,0 +1,62 @@
+"robot kinematics and motion scripts"
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.RobotState import RobotState
+
+COMMANDS = ('advance', 'rotate')
+
+
+def advance_robot(robot_state, amnt):
+    "move amnt along the heading"
+    pos = Vec2D(robot_state.x, robot_state.y)
+    direction = Vec2D(1, 0).rotate(robot_state.theta)
+
+    n_pos = pos + direction * amnt
+
+    return RobotState(n_pos.pos_x, n_pos.pos_y, robot_state.theta)
+
+
+def rotate_robot(robot_state, amnt):
+    "turn by amnt radians"
+    return RobotState(robot_state.x, robot_state.y, robot_state.theta + amnt)
+
+
+def parse_motion_script(lines):
+    "list of (command, amount, repeat) from lines like 'advance 0.01 100' \
+    or 'rotate -0.05', empty lines and # comments are skipped"
+    steps = []
+    for number, line in enumerate(lines, 1):
+        fields = line.split('#', 1)[0].split()
+        if not fields:
+            continue
+        if fields[0] not in COMMANDS or len(fields) not in (2, 3):
+            raise ValueError("line {}: expected '<{}> <amount> [repeat]', "
+                             "got {!r}".format(number, '|'.join(COMMANDS),
+                                               line.strip()))
+        repeat = int(fields[2]) if len(fields) == 3 else 1
+        steps.append((fields[0], float(fields[1]), repeat))
+    return steps
+
+
+def motion_trajectory(start, steps):
+    "(N + 1, 3) array of the start state followed by the state after every \
+    single advance_robot/rotate_robot step of the (command, amount, repeat) \
+    steps, computed with running sums in the same order as applying the \
+    steps one by one"
+    commands = [command for command, _, repeat in steps for _ in range(repeat)]
+    amounts = np.array([amount for _, amount, repeat in steps
+                        for _ in range(repeat)], dtype=np.float64)
+    advance = np.array([command == 'advance' for command in commands],
+                       dtype=bool)
+
+    theta = np.cumsum(np.concatenate(([start[2]],
+                                      np.where(advance, 0.0, amounts))))
+    distance = np.where(advance, amounts, 0.0)
+    pos_x = np.cumsum(np.concatenate(([start[0]],
+                                      np.cos(theta[1:]) * distance)))
+    pos_y = np.cumsum(np.concatenate(([start[1]],
+                                      np.sin(theta[1:]) * distance)))
+
+    return np.column_stack((pos_x, pos_y, theta))
@@ -0,0 +1,225 @@
+"multi core scan generation with the scene geometry in shared memory"
+
+import copy
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from linda.Scene import Scene, as_scene
+from linda.UniformGrid import UniformGrid
+from linda.DistanceField import DistanceField
+
+class ParallelSimulator(object):
+    "fan out lidar_sample_batch over a process pool \
+    the scene arrays are copied once into shared memory and every worker maps \
+    them instead of receiving a pickled environment per task. poses are read \
+    from a shared buffer and every chunk of ranges is written to one of a \
+    few shared result slots, which the parent copies into the output as \
+    soon as the chunk completes and hands to the next chunk. only chunk \
+    bounds travel through the pool and the shared result memory does not \
+    grow with the batch. a DistanceField environment shares its field \
+    array instead of the scene. use as a context manager or call close()"
+
+    def __init__(self, simulator, environment, workers=None):
+        self.simulator = simulator
+        self.workers = workers or multiprocessing.cpu_count()
+
+        if isinstance(environment, DistanceField):
+            # a field has no scene to rebuild the caster from
+            packed = environment.field
+            layout = ('field', environment.shape, environment.lower,
+                      environment.resolution)
+        else:
+            scene = as_scene(getattr(environment, 'scene', environment))
+            packed = np.concatenate((scene.seg_starts.ravel(),
+                                     scene.seg_ends.ravel(),
+                                     scene.circle_centers.ravel(),
+                                     scene.circle_radii))
+            cell_size = None
+            if isinstance(environment, UniformGrid):
+                cell_size = environment.cell_size
+            layout = ('scene', scene.nb_segments, scene.nb_circles,
+                      isinstance(environment, UniformGrid), cell_size)
+
+        self._scene_shm = _create(packed.size, packed.dtype)
+        _view(self._scene_shm, packed.shape, packed.dtype)[:] = packed
+
+        self._states_shm = None
+        self._ranges_shm = None
+        self._states_capacity = 0
+        self._ranges_capacity = 0
+
+        # workers return ideal ranges, measurement errors are applied here
+        # so that one random stream covers the whole batch
+        ideal = copy.copy(simulator)
+        ideal.sensor_model = None
+
+        self._pool = multiprocessing.Pool(
+            self.workers, initializer=_init_worker,
+            initargs=(ideal, self._scene_shm.name, packed.dtype, layout))
+
+    def lidar_sample_batch(self, states, out=None, noise_sigma=None,
+                           chunk_size=None):
+        "(N, nb_samples) ranges for an (N, 3) array of states, identical to \
+        simulator.lidar_sample_batch. results are written into out if given"
+        self.simulator.check_measurement(noise_sigma, batch=True)
+        states = np.asarray(states, dtype=np.float64).reshape(-1, 3)
+        nb_states = states.shape[0]
+        nb_samples = self.simulator.nb_samples
+
+        if out is None:
+            out = np.empty((nb_states, nb_samples))
+        if nb_states == 0:
+            return out
+
+        if chunk_size is None:
+            chunk_size = max(nb_states // (4 * self.workers), 1)
+        chunks = deque((first, min(first + chunk_size, nb_states))
+                       for first in range(0, nb_states, chunk_size))
+
+        # two slots per worker keep every worker busy while the parent
+        # copies finished chunks
+        nb_slots = min(2 * self.workers, len(chunks))
+        self._reserve(nb_states, nb_slots * chunk_size * nb_samples)
+        _view(self._states_shm, (nb_states, 3))[:] = states
+        slots = _view(self._ranges_shm, (nb_slots, chunk_size, nb_samples))
+
+        pending = deque()
+
+        def submit(slot):
+            first, last = chunks.popleft()
+            task = (self._states_shm.name, self._ranges_shm.name, nb_states,
+                    first, last, slot * chunk_size)
+            pending.append((slot, first, last,
+                            self._pool.apply_async(_sample_chunk, (task,))))
+
+        for slot in range(nb_slots):
+            submit(slot)
+
+        while pending:
+            slot, first, last, result = pending.popleft()
+            result.get()
+            out[first:last] = slots[slot, :last - first]
+            if chunks:
+                submit(slot)
+
+        if not noise_sigma is None:
+            out += np.random.normal(0.0, noise_sigma, out.shape)
+
+        if self.simulator.sensor_model is not None:
+            out[...] = self.simulator.sensor_model.apply(out)
+
+        return out
+
+    def close(self):
+        "stop the workers and release the shared memory"
+        if self._pool is None:
+            return
+
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
+
+        for shm in (self._scene_shm, self._states_shm, self._ranges_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def _reserve(self, nb_states, nb_ranges):
+        "grow the shared pose buffer to hold nb_states poses and the result \
+        slots to hold nb_ranges values"
+        if nb_states > self._states_capacity:
+            if self._states_shm is not None:
+                self._states_shm.close()
+                self._states_shm.unlink()
+            self._states_capacity = nb_states
+            self._states_shm = _create(nb_states * 3)
+
+        if nb_ranges > self._ranges_capacity:
+            if self._ranges_shm is not None:
+                self._ranges_shm.close()
+                self._ranges_shm.unlink()
+            self._ranges_capacity = nb_ranges
+            self._ranges_shm = _create(nb_ranges)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _create(nb_values, dtype=np.float64):
+    "new shared memory block for nb_values values of dtype"
+    return shared_memory.SharedMemory(
+        create=True, size=max(nb_values, 1) * np.dtype(dtype).itemsize)
+
+
+def _attach(name):
+    "attach to an existing block, pool workers share the resource tracker \
+    of the parent which unlinks the block"
+    return shared_memory.SharedMemory(name=name)
+
+
+def _view(shm, shape, dtype=np.float64):
+    "array of shape and dtype backed by shm"
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+# per worker process state, set up by _init_worker
+_WORKER = {}
+
+
+def _init_worker(simulator, scene_name, dtype, layout):
+    "map the shared scene (or field) and build the ray caster once per \
+    worker, layout describes the shared array as built by ParallelSimulator"
+    shm = _attach(scene_name)
+
+    if layout[0] == 'field':
+        _, shape, lower, resolution = layout
+        caster = DistanceField(_view(shm, shape, dtype), lower, resolution)
+    else:
+        _, nb_segments, nb_circles, use_grid, cell_size = layout
+        packed = _view(shm, (4 * nb_segments + 3 * nb_circles,), dtype)
+
+        seg_end = 2 * nb_segments
+        circle_end = 4 * nb_segments + 2 * nb_circles
+        scene = Scene.from_arrays(packed[:seg_end],
+                                  packed[seg_end:2 * seg_end],
+                                  packed[2 * seg_end:circle_end],
+                                  packed[circle_end:])
+        caster = UniformGrid(scene, cell_size) if use_grid else scene
+
+    _WORKER['shm'] = shm
+    _WORKER['simulator'] = simulator
+    _WORKER['caster'] = caster
+    _WORKER['buffers'] = {}
+
+
+def _buffers(states_name, ranges_name):
+    "attachments to the current shared pose and range buffers, replacing \
+    the previous ones after the parent grew them"
+    names = (states_name, ranges_name)
+    if _WORKER['buffers'].get('names') != names:
+        for shm in _WORKER['buffers'].get('blocks', ()):
+            shm.close()
+        _WORKER['buffers'] = {'names': names,
+                              'blocks': (_attach(states_name),
+                                         _attach(ranges_name))}
+    return _WORKER['buffers']['blocks']
+
+
+def _sample_chunk(task):
+    "compute the scans of poses first to last straight into the result \
+    slot starting at row"
+    states_name, ranges_name, nb_states, first, last, row = task
+    simulator = _WORKER['simulator']
+
+    states_shm, ranges_shm = _buffers(states_name, ranges_name)
+    states = _view(states_shm, (nb_states, 3))
+    ranges = _view(ranges_shm, (row + last - first, simulator.nb_samples))
+
+    simulator.lidar_sample_batch(states[first:last], _WORKER['caster'],
+                                 out=ranges[row:])
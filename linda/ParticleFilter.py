@@ -0,0 +1,156 @@
+"vectorized monte carlo localization"
+
+import copy
+from math import sqrt
+
+import numpy as np
+
+from linda.RobotState import RobotState
+
+class ParticleFilter(object):
+    "particle filter over robot states \
+    particles are an (N, 3) array of (x, y, theta) with log weights, the \
+    expected scans of all particles are computed with lidar_sample_batch. \
+    resampling is systematic (low variance) and KLD adaptive: the number of \
+    particles shrinks when they concentrate in few (x, y, theta) bins"
+
+    def __init__(self, simulator, environment, particles, beam_sigma=0.05,
+                 random_prob=0.05, min_particles=100, max_particles=None,
+                 kld_epsilon=0.05, kld_quantile=2.326,
+                 bin_size=(0.1, 0.1, 0.1), rng=None, sensor_model=None):
+        # expected scans must be ideal, the measurement errors of the
+        # simulator's sensor model are scored by its likelihood instead
+        if sensor_model is None:
+            sensor_model = simulator.sensor_model
+        if simulator.sensor_model is not None:
+            simulator = copy.copy(simulator)
+            simulator.sensor_model = None
+        self.simulator = simulator
+        self.environment = environment
+        self.particles = np.array(particles, dtype=np.float64).reshape(-1, 3)
+        self.log_weights = np.zeros(self.particles.shape[0])
+
+        # beam model: gaussian around the expected range mixed with
+        # uniform random returns
+        self.beam_sigma = beam_sigma
+        self.random_prob = random_prob
+        # a SensorModel replaces the built in beam model
+        self.sensor_model = sensor_model
+
+        self.min_particles = min_particles
+        self.max_particles = max_particles or self.particles.shape[0]
+        self.kld_epsilon = kld_epsilon
+        self.kld_quantile = kld_quantile
+        self.bin_size = np.asarray(bin_size, dtype=np.float64)
+
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    @staticmethod
+    def around(simulator, environment, state, sigma, nb_particles, **kwargs):
+        "filter with nb_particles normally distributed around state with \
+        standard deviations sigma = (sigma_x, sigma_y, sigma_theta)"
+        rng = kwargs.get('rng')
+        if rng is None:
+            rng = kwargs['rng'] = np.random.default_rng()
+        particles = rng.normal(np.asarray(state, dtype=np.float64), sigma,
+                               (nb_particles, 3))
+        return ParticleFilter(simulator, environment, particles, **kwargs)
+
+    def __len__(self):
+        return self.particles.shape[0]
+
+    @property
+    def weights(self):
+        "normalized particle weights"
+        weights = np.exp(self.log_weights - self.log_weights.max())
+        return weights / weights.sum()
+
+    def effective_sample_size(self):
+        "1 / sum(w^2) of the normalized weights"
+        weights = self.weights
+        return 1.0 / np.sum(weights * weights)
+
+    def predict(self, distance, rotation, distance_sigma=0.0,
+                rotation_sigma=0.0):
+        "motion update: every particle advances distance along its heading \
+        and then rotates by rotation (as advance_robot and rotate_robot in \
+        measurement_visualizer.py) with gaussian noise on both"
+        nb_particles = self.particles.shape[0]
+        distance = distance + self.rng.normal(0.0, distance_sigma, nb_particles)
+        rotation = rotation + self.rng.normal(0.0, rotation_sigma, nb_particles)
+
+        theta = self.particles[:, 2]
+        self.particles[:, 0] += np.cos(theta) * distance
+        self.particles[:, 1] += np.sin(theta) * distance
+        self.particles[:, 2] += rotation
+
+    def update(self, ranges):
+        "measurement update with the measured ranges of one scan"
+        expected = self.simulator.lidar_sample_batch(self.particles,
+                                                     self.environment)
+        self.log_weights += self.log_likelihood(ranges, expected)
+        self.log_weights -= self.log_weights.max()
+
+    def log_likelihood(self, ranges, expected):
+        "log likelihood of the measured ranges for every row of expected"
+        if self.sensor_model is not None:
+            return self.sensor_model.log_likelihood(ranges, expected)
+
+        diff = (expected - np.asarray(ranges)[np.newaxis, :]) / self.beam_sigma
+        hit = ((1.0 - self.random_prob) * np.exp(-0.5 * diff * diff) /
+               (sqrt(2 * np.pi) * self.beam_sigma))
+        uniform = self.random_prob / self.simulator.default_dist
+        return np.sum(np.log(hit + uniform), axis=1)
+
+    def resample(self):
+        "draw a new particle set with systematic resampling, its size is \
+        chosen by KLD sampling between min_particles and max_particles"
+        indices = _systematic(self.weights, self.max_particles, self.rng)
+        indices = self.rng.permutation(indices)
+
+        nb_particles = self._kld_size(self.particles[indices])
+
+        self.particles = self.particles[indices[:nb_particles]]
+        self.log_weights = np.zeros(nb_particles)
+
+    def estimate(self):
+        "weighted mean state, theta is averaged on the circle"
+        weights = self.weights
+        pos_x, pos_y = weights.dot(self.particles[:, :2])
+        theta = np.arctan2(weights.dot(np.sin(self.particles[:, 2])),
+                           weights.dot(np.cos(self.particles[:, 2])))
+        return RobotState(float(pos_x), float(pos_y), float(theta))
+
+    def _kld_size(self, samples):
+        "smallest prefix of samples whose occupied bin count k satisfies \
+        the KLD bound n >= chi2(k - 1, 1 - delta) / (2 epsilon)"
+        bins = np.floor(samples / self.bin_size).astype(np.int64)
+        bins[:, 2] = np.mod(bins[:, 2],
+                            int(np.ceil(2 * np.pi / self.bin_size[2])))
+        _, first = np.unique(bins, axis=0, return_index=True)
+
+        occupied = np.zeros(samples.shape[0], dtype=np.int64)
+        occupied[first] = 1
+        nb_bins = np.cumsum(occupied)
+
+        # Wilson-Hilferty approximation of the chi square quantile
+        dof = np.maximum(nb_bins - 1, 1).astype(np.float64)
+        frac = 2.0 / (9.0 * dof)
+        required = (dof / (2 * self.kld_epsilon) *
+                    (1.0 - frac + np.sqrt(frac) * self.kld_quantile) ** 3)
+        # a single occupied bin needs no more than min_particles
+        required[nb_bins <= 1] = 0.0
+
+        sizes = np.arange(1, samples.shape[0] + 1)
+        enough = (sizes >= required) & (sizes >= self.min_particles)
+        if not np.any(enough):
+            return samples.shape[0]
+        return int(sizes[np.argmax(enough)])
+
+
+def _systematic(weights, nb_samples, rng):
+    "indices drawn by low variance resampling of the normalized weights"
+    positions = (rng.uniform() + np.arange(nb_samples)) / nb_samples
+    cumulative = np.cumsum(weights)
+    cumulative[-1] = 1.0
+    return np.searchsorted(cumulative, positions, side='right')
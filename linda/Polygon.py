@@ -0,0 +1,74 @@
+"closed polygon with point in polygon tests"
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Polyline import Polyline
+
+
+class Polygon(Polyline):
+    "closed Polyline, the last vertex is connected back to the first. \
+    vertices may be given in either orientation, the polygon is not \
+    required to be convex or simple"
+
+    closed = True
+    min_vertices = 3
+
+    __slots__ = ()
+
+    def signed_area(self):
+        "shoelace area, positive if the vertices are positively oriented \
+        in the sense of Vec2D.orientation and negative otherwise"
+        starts = self.edge_starts
+        ends = self.edge_ends
+        return 0.5 * float(np.sum(starts[:, 0] * ends[:, 1] -
+                                  starts[:, 1] * ends[:, 0]))
+
+    def contains_point(self, point):
+        "return if self contains point, points on the boundary count as \
+        contained like in Circle.contains_point"
+        (lower_x, upper_x), (lower_y, upper_y) = self._box
+        if not (lower_x <= point.pos_x <= upper_x and
+                lower_y <= point.pos_y <= upper_y):
+            return False
+        return bool(self.contains_points([[point.pos_x, point.pos_y]])[0])
+
+    def contains_points(self, points):
+        "(N,) bool array telling which of the (N, 2) points lie inside or on \
+        the boundary. nonzero winding rule: an edge crossing the horizontal \
+        through a point upwards with the point on its left (positive \
+        Vec2D.orientation of start, end, point) winds +1, one crossing \
+        downwards with the point on its right winds -1"
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        inside = np.zeros(points.shape[0], dtype=bool)
+
+        lower, upper = self.bounds()
+        in_box = np.all((points >= lower - Vec2D.EPSILON) &
+                        (points <= upper + Vec2D.EPSILON), axis=1)
+        if not np.any(in_box):
+            return inside
+        candidates = points[in_box][:, np.newaxis, :]
+
+        starts = self.edge_starts
+        edge = self.edge_ends - starts
+        diff = candidates - starts
+        # Vec2D.orientation(start, end, point) for every point and edge
+        orientation = edge[:, 0] * diff[..., 1] - edge[:, 1] * diff[..., 0]
+
+        start_y = starts[:, 1]
+        end_y = self.edge_ends[:, 1]
+        point_y = candidates[..., 1]
+        upward = (start_y <= point_y) & (end_y > point_y) & (orientation > 0)
+        downward = (start_y > point_y) & (end_y <= point_y) & (orientation < 0)
+        winding = (np.count_nonzero(upward, axis=1) -
+                   np.count_nonzero(downward, axis=1))
+
+        # orientation and along are scaled by the edge length
+        edge_len2 = np.sum(edge * edge, axis=1)
+        tolerance = Vec2D.EPSILON * np.sqrt(edge_len2)
+        along = diff[..., 0] * edge[:, 0] + diff[..., 1] * edge[:, 1]
+        on_edge = ((np.abs(orientation) <= tolerance) &
+                   (along >= -tolerance) & (along <= edge_len2 + tolerance))
+
+        inside[in_box] = (winding != 0) | np.any(on_edge, axis=1)
+        return inside
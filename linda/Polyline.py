@@ -0,0 +1,167 @@
+"chain of line segments stored as one vertex array"
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.LineSegment import LineSegment
+
+
+def polyline_edges(vertices, closed=False):
+    "(E, 2) start and end arrays of the edges through vertices, closed \
+    chains get an extra edge from the last vertex back to the first"
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    if closed:
+        return vertices, np.roll(vertices, -1, axis=0)
+    return vertices[:-1], vertices[1:]
+
+
+class Polyline(object):
+    "open chain of edges through an (N, 2) vertex array \
+    intersection tests run on all edges at once and are skipped entirely \
+    when the ray misses the bounding box, so a shelf or a wall with many \
+    corners is a single element instead of many LineSegments"
+
+    closed = False
+    min_vertices = 2
+
+    __slots__ = ('vertices', 'edge_starts', 'edge_ends', 'lower', 'upper',
+                 '_box', '_start_x', '_start_y', '_dir_x', '_dir_y')
+
+    def __init__(self, vertices):
+        if len(vertices) and isinstance(vertices[0], Vec2D):
+            vertices = [[vert.pos_x, vert.pos_y] for vert in vertices]
+        vertices = np.array(vertices, dtype=np.float64).reshape(-1, 2)
+        if vertices.shape[0] < self.min_vertices:
+            raise ValueError("{} needs at least {} vertices, got {}".format(
+                type(self).__name__, self.min_vertices, vertices.shape[0]))
+
+        # the cached edges and box stay valid because nothing can be
+        # modified in place, translations return new objects
+        vertices.flags.writeable = False
+        self.vertices = vertices
+        self.edge_starts, self.edge_ends = polyline_edges(vertices,
+                                                          self.closed)
+        # per edge columns for the single ray kernel in hit_params
+        self._start_x = np.ascontiguousarray(self.edge_starts[:, 0])
+        self._start_y = np.ascontiguousarray(self.edge_starts[:, 1])
+        self._dir_x = self.edge_ends[:, 0] - self._start_x
+        self._dir_y = self.edge_ends[:, 1] - self._start_y
+
+        self.lower = vertices.min(axis=0)
+        self.upper = vertices.max(axis=0)
+        # python floats of the box grown by EPSILON for the scalar slab test
+        self._box = ((float(self.lower[0]) - Vec2D.EPSILON,
+                      float(self.upper[0]) + Vec2D.EPSILON),
+                     (float(self.lower[1]) - Vec2D.EPSILON,
+                      float(self.upper[1]) + Vec2D.EPSILON))
+
+    @property
+    def nb_edges(self):
+        "number of edges"
+        return self.edge_starts.shape[0]
+
+    def edges(self):
+        "the edges as list of LineSegments"
+        return [LineSegment(Vec2D(*start), Vec2D(*end))
+                for start, end in zip(self.edge_starts.tolist(),
+                                      self.edge_ends.tolist())]
+
+    def bounds(self):
+        "axis aligned bounding box ((min_x, min_y), (max_x, max_y))"
+        return (self.lower, self.upper)
+
+    def box_hit(self, ray, max_dist=float('inf')):
+        "slab test: return whether ray can reach the bounding box (grown \
+        by Vec2D.EPSILON) at a ray parameter in [0, max_dist]"
+        param_near = 0.0
+        param_far = max_dist
+        (lower_x, upper_x), (lower_y, upper_y) = self._box
+        for origin, direction, lower, upper in (
+                (ray.origin.pos_x, ray.direction.pos_x, lower_x, upper_x),
+                (ray.origin.pos_y, ray.direction.pos_y, lower_y, upper_y)):
+            if direction == 0:
+                if not lower <= origin <= upper:
+                    return False
+                continue
+            param1 = (lower - origin) / direction
+            param2 = (upper - origin) / direction
+            if param1 > param2:
+                param1, param2 = param2, param1
+            param_near = max(param_near, param1)
+            param_far = min(param_far, param2)
+            if param_near > param_far:
+                return False
+        return True
+
+    def hit_params(self, ray):
+        "(E,) ray parameters of the intersections with every edge, np.inf \
+        where there is none. same arithmetic as RayCasting.segment_hits for \
+        a single ray, whose components stay python floats"
+        ray_x = ray.direction.pos_x
+        ray_y = ray.direction.pos_y
+        diff_x = ray.origin.pos_x - self._start_x
+        diff_y = ray.origin.pos_y - self._start_y
+
+        dir_cross_prod = self._dir_x * ray_y - self._dir_y * ray_x
+        # parallel (and overlapping) rays never intersect, see LineSegment
+        valid = np.abs(dir_cross_prod) >= Vec2D.EPSILON
+        denominator = np.where(valid, dir_cross_prod, 1.0)
+
+        param_u = (diff_x * self._dir_y - diff_y * self._dir_x) / denominator
+        param_t = (diff_x * ray_y - diff_y * ray_x) / denominator
+
+        hit = valid & (param_u >= 0) & (param_t >= 0) & (param_t <= 1)
+        return np.where(hit, param_u, np.inf)
+
+    def intersect_ray(self, ray):
+        "intersection points with ray sorted along the ray, a hit through a \
+        vertex shared by two edges is reported once"
+        if not self.box_hit(ray):
+            return []
+
+        params = self.hit_params(ray)
+        params = np.sort(params[np.isfinite(params)]).tolist()
+
+        origin = ray.origin
+        direction = ray.direction
+        points = []
+        last = None
+        for param in params:
+            if last is not None and param - last < Vec2D.EPSILON:
+                continue
+            points.append(Vec2D(origin.pos_x + direction.pos_x * param,
+                                origin.pos_y + direction.pos_y * param))
+            last = param
+        return points
+
+    def closest_hit(self, ray, max_dist=float('inf')):
+        "ray parameter of the closest intersection with ray or None if \
+        there is none closer than max_dist (for unit directions the \
+        parameter is the distance)"
+        if not self.box_hit(ray, max_dist):
+            return None
+
+        param = float(self.hit_params(ray).min())
+        if param < max_dist:
+            return param
+        return None
+
+    def is_equal(self, other):
+        "same kind of chain through the same vertices in the same order"
+        if other is None or type(other) is not type(self):
+            return False
+        if other.vertices.shape != self.vertices.shape:
+            return False
+        diff = self.vertices - other.vertices
+        return bool(np.all(np.sqrt(np.sum(diff * diff, axis=1)) <
+                           Vec2D.EPSILON))
+
+    def __str__(self):
+        return "{name} through {vertices}".format(
+            name=type(self).__name__,
+            vertices=", ".join(str(Vec2D(*vert))
+                               for vert in self.vertices.tolist()))
+
+    def __add__(self, vec):
+        "translate by vec"
+        return type(self)(self.vertices + [vec.pos_x, vec.pos_y])
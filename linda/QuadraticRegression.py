@@ -4,6 +4,8 @@ from collections import namedtuple
 import numpy as np
 import scipy.linalg as linalg
 
+import linda.Instrumentation as instrumentation
+
 Gaussian = namedtuple('Gaussian', ['mean', 'cov'])
 
 def quadratic_regression(prior, x_vals, y_vals):
@@ -13,12 +15,120 @@ def quadratic_regression(prior, x_vals, y_vals):
     if prior is None:
         prior = Gaussian(np.zeros(3), np.zeros((3, 3)))
 
-    extend = [[1.0, x, x*x] for x in x_vals]
-    design_matrix = np.array(extend)
+    with instrumentation.stage('regression.design'):
+        extend = [[1.0, x, x*x] for x in x_vals]
+        design_matrix = np.array(extend)
+
+    with instrumentation.stage('regression.solve'):
+        cov = design_matrix.T.dot(design_matrix) + prior.cov
+
+        mean = prior.cov.dot(prior.mean) + design_matrix.T.dot(y_vals)
+        mean = linalg.inv(cov).dot(mean.T)
+
+    instrumentation.count('regression.samples', design_matrix.shape[0])
+
+    return Gaussian(mean, cov)
+
+
+class RecursiveQuadraticRegression(object):
+    "stateful bayesian quadratic regression \
+    keeps the 3x3 precision matrix and the information vector and absorbs \
+    samples incrementally, so every update costs O(1) per sample instead of \
+    refitting from scratch. with forgetting < 1 older samples (and the \
+    prior) are exponentially down weighted by that factor per sample. \
+    as in quadratic_regression the cov field of the Gaussians is the \
+    precision matrix"
+
+    def __init__(self, prior=None, forgetting=1.0):
+        if prior is None:
+            prior = Gaussian(np.zeros(3), np.zeros((3, 3)))
+
+        if not 0.0 < forgetting <= 1.0:
+            raise ValueError("forgetting factor must be in (0, 1]")
+
+        self.precision = np.array(prior.cov, dtype=np.float64)
+        self.information = self.precision.dot(prior.mean)
+        self.forgetting = forgetting
+        self.nb_samples = 0
+
+    def update(self, x_val, y_val):
+        "absorb a single (x, y) sample"
+        features = np.array([1.0, x_val, x_val * x_val])
+
+        if self.forgetting < 1.0:
+            self.precision *= self.forgetting
+            self.information *= self.forgetting
+
+        self.precision += np.outer(features, features)
+        self.information += features * y_val
+        self.nb_samples += 1
+
+    def update_batch(self, x_vals, y_vals):
+        "absorb a whole batch of samples, equivalent to calling update \
+        for every sample in order"
+        x_vals = np.asarray(x_vals, dtype=np.float64).reshape(-1)
+        y_vals = np.asarray(y_vals, dtype=np.float64).reshape(-1)
+        nb_vals = x_vals.size
+
+        if self.forgetting < 1.0:
+            decay = self.forgetting ** nb_vals
+            self.precision *= decay
+            self.information *= decay
+            weights = self.forgetting ** np.arange(nb_vals - 1, -1, -1)
+        else:
+            weights = np.ones(nb_vals)
+
+        powers = x_vals[:, np.newaxis] ** np.arange(5)
+        moments = weights.dot(powers)
+
+        self.precision += moments[np.add.outer(np.arange(3), np.arange(3))]
+        self.information += (weights * y_vals).dot(powers[:, :3])
+        self.nb_samples += nb_vals
+
+    def posterior(self):
+        "posterior Gaussian(mean, precision) of the current state"
+        factor = linalg.cho_factor(self.precision)
+        mean = linalg.cho_solve(factor, self.information)
+
+        return Gaussian(mean, self.precision.copy())
+
+
+def windowed_quadratic_regression(prior, x_vals, y_vals, windows=None,
+                                  window_size=None, stride=1):
+    "quadratic_regression of many windows of one scan at once \
+    windows is an (W, 2) array of [start, stop) sample indices, alternatively \
+    windows of window_size samples every stride samples are used. the \
+    moments 1, x, .., x^4 and y, x*y, x^2*y are accumulated once, so every \
+    window costs O(1) whatever its width. returns a Gaussian with (W, 3) \
+    means and (W, 3, 3) precision matrices"
+
+    if prior is None:
+        prior = Gaussian(np.zeros(3), np.zeros((3, 3)))
+
+    x_vals = np.asarray(x_vals, dtype=np.float64).reshape(-1)
+    y_vals = np.asarray(y_vals, dtype=np.float64).reshape(-1)
+
+    if windows is None:
+        if window_size is None:
+            raise ValueError("either windows or window_size is required")
+        starts = np.arange(0, x_vals.size - window_size + 1, stride)
+        windows = np.column_stack((starts, starts + window_size))
+    windows = np.asarray(windows, dtype=np.int64).reshape(-1, 2)
+
+    powers = x_vals[:, np.newaxis] ** np.arange(5)
+    cum_moments = np.vstack((np.zeros(5), np.cumsum(powers, axis=0)))
+    cum_info = np.vstack((np.zeros(3),
+                          np.cumsum(powers[:, :3] * y_vals[:, np.newaxis],
+                                    axis=0)))
+
+    starts = windows[:, 0]
+    stops = windows[:, 1]
+    moments = cum_moments[stops] - cum_moments[starts]
+    info = cum_info[stops] - cum_info[starts]
 
-    cov = design_matrix.T.dot(design_matrix) + prior.cov
+    cov = moments[:, np.add.outer(np.arange(3), np.arange(3))] + prior.cov
+    info = info + prior.cov.dot(prior.mean)
 
-    mean = prior.cov.dot(prior.mean) + design_matrix.T.dot(y_vals)
-    mean = linalg.inv(cov).dot(mean.T)
+    mean = np.linalg.solve(cov, info[:, :, np.newaxis])[:, :, 0]
 
     return Gaussian(mean, cov)
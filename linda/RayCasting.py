@@ -0,0 +1,99 @@
+"vectorized ray casting against line segments and circles"
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+import linda.Instrumentation as instrumentation
+
+
+def segment_hits(origins, directions, seg_starts, seg_ends):
+    "ray parameter of the intersection of every ray with every segment \
+    origins and directions are (K, 2) (origins may also be (1, 2)) \
+    returns a (K, S) array with np.inf where there is no intersection"
+
+    nb_rays = directions.shape[0]
+    if seg_starts.shape[0] == 0:
+        return np.full((nb_rays, 0), np.inf)
+    instrumentation.count('lidar.primitive_tests',
+                          nb_rays * seg_starts.shape[0])
+
+    dir1 = seg_ends - seg_starts
+    dir2 = directions[:, np.newaxis, :]
+
+    dir_cross_prod = dir1[:, 0] * dir2[..., 1] - dir1[:, 1] * dir2[..., 0]
+    diff = origins[:, np.newaxis, :] - seg_starts
+    diff_cross_dir1 = diff[..., 0] * dir1[:, 1] - diff[..., 1] * dir1[:, 0]
+    diff_cross_dir2 = diff[..., 0] * dir2[..., 1] - diff[..., 1] * dir2[..., 0]
+
+    # parallel (and overlapping) rays never intersect, see LineSegment
+    valid = np.abs(dir_cross_prod) >= Vec2D.EPSILON
+    denominator = np.where(valid, dir_cross_prod, 1.0)
+
+    param_u = diff_cross_dir1 / denominator
+    param_t = diff_cross_dir2 / denominator
+
+    hit = valid & (param_u >= 0) & (param_t >= 0) & (param_t <= 1)
+
+    return np.where(hit, param_u, np.inf)
+
+
+def circle_hits(origins, directions, circle_centers, circle_radii):
+    "ray parameter of the closest non negative intersection of every ray \
+    with every circle, returns a (K, C) array with np.inf for no intersection"
+
+    nb_rays = directions.shape[0]
+    if circle_centers.shape[0] == 0:
+        return np.full((nb_rays, 0), np.inf)
+    instrumentation.count('lidar.primitive_tests',
+                          nb_rays * circle_centers.shape[0])
+
+    direction = directions[:, np.newaxis, :]
+    diff = origins[:, np.newaxis, :] - circle_centers
+
+    param1 = np.sum(directions * directions, axis=1)[:, np.newaxis]
+    param2 = 2 * (direction[..., 0] * diff[..., 0] +
+                  direction[..., 1] * diff[..., 1])
+    param3 = (diff[..., 0] * diff[..., 0] + diff[..., 1] * diff[..., 1] -
+              circle_radii * circle_radii)
+
+    det = param2 * param2 - 4 * param1 * param3
+
+    # same case distinction as Circle.solve_quadratic: any negative
+    # discriminant misses, only tiny non negative ones count as tangents
+    miss = det < 0
+    tangent = ~miss & (np.abs(det) < Vec2D.EPSILON)
+    sqrt_det = np.sqrt(np.where(miss, 0.0, det))
+    sqrt_det[tangent] = 0.0
+
+    near = (-param2 - sqrt_det) / (2 * param1)
+    far = (-param2 + sqrt_det) / (2 * param1)
+
+    res = np.where(near >= 0, near, np.where(far >= 0, far, np.inf))
+    res[miss] = np.inf
+
+    return res
+
+
+def cast_rays(origins, directions, seg_starts, seg_ends,
+              circle_centers, circle_radii, default_dist):
+    "distance to the closest obstacle along every ray \
+    rays without intersection return default_dist"
+
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+    directions = np.asarray(directions, dtype=np.float64).reshape(-1, 2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        closest = np.full(directions.shape[0], np.inf)
+
+        seg_params = segment_hits(origins, directions, seg_starts, seg_ends)
+        if seg_params.shape[1]:
+            closest = np.minimum(closest, seg_params.min(axis=1))
+
+        circle_params = circle_hits(origins, directions,
+                                    circle_centers, circle_radii)
+        if circle_params.shape[1]:
+            closest = np.minimum(closest, circle_params.min(axis=1))
+
+    dist = closest * np.sqrt(np.sum(directions * directions, axis=1))
+
+    return np.where(np.isfinite(dist), dist, default_dist)
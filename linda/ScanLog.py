@@ -0,0 +1,171 @@
+"compact binary scan log with append only writer and memory mapped reader"
+
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from linda.RobotState import RobotState
+
+ScanFrame = namedtuple('ScanFrame', ['timestamp', 'state', 'ranges'])
+
+MAGIC = b'LNDASCN1'
+# magic, nb_beams, header size, angular_cutoff, default_dist
+HEADER = struct.Struct('<8sIIdd')
+
+
+def frame_dtype(nb_beams):
+    "fixed width record of one scan: float64 timestamp (float32 would lose \
+    millisecond resolution after a few hours), float32 pose and ranges"
+    return np.dtype([('timestamp', '<f8'),
+                     ('pose', '<f4', (3,)),
+                     ('ranges', '<f4', (nb_beams,))])
+
+
+class ScanLogWriter(object):
+    "append scans to a scan log, creating the file and its header if needed \
+    the header stores the beam count, angular cutoff, default_dist and the \
+    relative beam angles followed by the fixed width frames"
+
+    def __init__(self, path, angles, angular_cutoff, default_dist):
+        self.angles = np.asarray(angles, dtype='<f4').reshape(-1)
+        self.nb_beams = self.angles.size
+        self.angular_cutoff = angular_cutoff
+        self.default_dist = default_dist
+        self.dtype = frame_dtype(self.nb_beams)
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            reader = self._check_header(path)
+            # cut off a partially written last frame (like the reader
+            # ignores it) so that appended frames stay aligned
+            end = reader.header_size + len(reader) * self.dtype.itemsize
+            del reader
+            self._file = open(path, 'r+b')
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, 'wb')
+            self._write_header()
+
+    @staticmethod
+    def for_simulator(path, simulator):
+        "writer for scans produced by simulator"
+        angles = simulator.beam_angles(0.0)
+        return ScanLogWriter(path, angles, simulator.angular_cutoff,
+                             simulator.default_dist)
+
+    def write(self, timestamp, state, ranges):
+        "append a single scan"
+        self.write_batch([timestamp], [state], [ranges])
+
+    def write_batch(self, timestamps, states, ranges):
+        "append N scans from N timestamps, (N, 3) states and (N, beams) ranges"
+        timestamps = np.asarray(timestamps, dtype=np.float64).reshape(-1)
+        frames = np.empty(timestamps.size, dtype=self.dtype)
+        frames['timestamp'] = timestamps
+        frames['pose'] = np.asarray(states, dtype=np.float64).reshape(-1, 3)
+        frames['ranges'] = np.asarray(ranges).reshape(-1, self.nb_beams)
+
+        self._file.write(frames.tobytes())
+
+    def flush(self):
+        "flush buffered frames to disk"
+        self._file.flush()
+
+    def close(self):
+        "close the underlying file"
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_header(self):
+        header_size = _header_size(self.nb_beams)
+        header = HEADER.pack(MAGIC, self.nb_beams, header_size,
+                             self.angular_cutoff, self.default_dist)
+        header += self.angles.tobytes()
+        self._file.write(header.ljust(header_size, b'\0'))
+
+    def _check_header(self, path):
+        "appending is only allowed to logs with the same beam layout, \
+        angular cutoff and default_dist, returns a reader of the log"
+        reader = ScanLogReader(path)
+        if (reader.nb_beams != self.nb_beams or
+                not np.array_equal(reader.angles, self.angles)):
+            raise ValueError("{} has a different beam layout".format(path))
+        if (reader.angular_cutoff != self.angular_cutoff or
+                reader.default_dist != self.default_dist):
+            raise ValueError("{} was recorded with angular cutoff {} and "
+                             "default_dist {}".format(path,
+                                                      reader.angular_cutoff,
+                                                      reader.default_dist))
+        return reader
+
+
+class ScanLogReader(object):
+    "random access to the frames of a scan log through numpy.memmap \
+    nothing is loaded until frames are accessed, the timestamps, poses and \
+    ranges properties are zero copy views into the file"
+
+    def __init__(self, path):
+        with open(path, 'rb') as src:
+            header = src.read(HEADER.size)
+            magic, nb_beams, header_size, angular_cutoff, default_dist = \
+                HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError("{} is not a scan log".format(path))
+            angles = src.read(4 * nb_beams)
+
+        self.path = path
+        self.header_size = header_size
+        self.nb_beams = nb_beams
+        self.angular_cutoff = angular_cutoff
+        self.default_dist = default_dist
+        self.angles = np.frombuffer(angles, dtype='<f4')
+        self.dtype = frame_dtype(nb_beams)
+
+        # a partially written last frame is ignored
+        nb_frames = (os.path.getsize(path) - header_size) // self.dtype.itemsize
+        if nb_frames > 0:
+            self.frames = np.memmap(path, dtype=self.dtype, mode='r',
+                                    offset=header_size, shape=(nb_frames,))
+        else:
+            self.frames = np.empty(0, dtype=self.dtype)
+
+    @property
+    def timestamps(self):
+        "(N,) timestamps of all frames"
+        return self.frames['timestamp']
+
+    @property
+    def poses(self):
+        "(N, 3) robot states of all frames"
+        return self.frames['pose']
+
+    @property
+    def ranges(self):
+        "(N, beams) ranges of all frames"
+        return self.frames['ranges']
+
+    def __len__(self):
+        return self.frames.shape[0]
+
+    def __getitem__(self, index):
+        frame = self.frames[index]
+        return ScanFrame(float(frame['timestamp']),
+                         RobotState(*frame['pose'].tolist()),
+                         frame['ranges'])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+def _header_size(nb_beams):
+    "header plus beam angles, rounded up to a multiple of 64 bytes"
+    size = HEADER.size + 4 * nb_beams
+    return (size + 63) // 64 * 64
@@ -0,0 +1,176 @@
+"scan to map matching with coarse to fine point to line ICP"
+
+from collections import namedtuple
+
+import numpy as np
+
+from linda.RobotState import RobotState
+from linda.Scene import as_scene
+
+ScanMatch = namedtuple('ScanMatch', ['state', 'error', 'iterations'])
+
+class ScanMatcher(object):
+    "estimate the robot state from a measured scan and the map \
+    the scan points are aligned to the closest map elements with point to \
+    line ICP. the first levels only use every n-th beam and accept far away \
+    correspondences, later levels refine with all beams and tight gating"
+
+    # (beam stride, max correspondence distance) from coarse to fine
+    LEVELS = ((8, 0.5), (4, 0.3), (2, 0.15), (1, 0.08))
+
+    def __init__(self, environment, default_dist=None, max_iterations=15,
+                 tolerance=1e-5, levels=None):
+        self.scene = as_scene(getattr(environment, 'scene', environment))
+        self.default_dist = default_dist
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.levels = levels or ScanMatcher.LEVELS
+
+    def match(self, angles, ranges, initial_state):
+        "best robot state for the scan (angles relative to the heading, \
+        ranges) starting from initial_state. returns a ScanMatch with the \
+        state, the rms point to map distance and the number of iterations"
+        points = self._scan_points(angles, ranges)
+        pose = np.array(initial_state, dtype=np.float64)
+        iterations = 0
+
+        for stride, max_corr in self.levels:
+            subset = points[::stride]
+            for _ in range(self.max_iterations):
+                iterations += 1
+                step = self._icp_step(subset, pose, max_corr)
+                if step is None:
+                    break
+                pose += step
+                if np.abs(step).max() < self.tolerance:
+                    break
+
+        world = _transform(points, pose)
+        _, _, dist = nearest_points(self.scene, world)
+        error = float(np.sqrt(np.mean(dist * dist))) if dist.size else 0.0
+
+        return ScanMatch(RobotState(*pose.tolist()), error, iterations)
+
+    def _scan_points(self, angles, ranges):
+        "robot frame points of all beams that hit something"
+        angles = np.asarray(angles, dtype=np.float64)
+        ranges = np.asarray(ranges, dtype=np.float64)
+
+        valid = np.isfinite(ranges)
+        if self.default_dist is not None:
+            valid &= ranges < self.default_dist
+
+        return np.column_stack((ranges[valid] * np.cos(angles[valid]),
+                                ranges[valid] * np.sin(angles[valid])))
+
+    def _icp_step(self, points, pose, max_corr):
+        "gauss newton pose update (dx, dy, dtheta) minimizing the point to \
+        line distances, None if there are too few correspondences"
+        rotated = _rotate(points, pose[2])
+        world = rotated + pose[:2]
+
+        closest, normals, dist = nearest_points(self.scene, world)
+        inliers = dist < max_corr
+        if np.count_nonzero(inliers) < 3:
+            return None
+
+        normals = normals[inliers]
+        rotated = rotated[inliers]
+        residuals = np.sum(normals * (world[inliers] - closest[inliers]),
+                           axis=1)
+
+        jacobian = np.column_stack((
+            normals[:, 0], normals[:, 1],
+            normals[:, 1] * rotated[:, 0] - normals[:, 0] * rotated[:, 1]))
+
+        hessian = jacobian.T.dot(jacobian) + 1e-9 * np.eye(3)
+        gradient = jacobian.T.dot(residuals)
+
+        return -np.linalg.solve(hessian, gradient)
+
+
+# upper bound on points x map elements compared at once by nearest_points
+NEAREST_ELEMENTS = 1 << 18
+
+
+def nearest_points(scene, points, chunk_size=None):
+    "closest point on the map, unit normal of the closest element there and \
+    distance for every point of an (N, 2) array. the points are compared to \
+    all elements in chunks of chunk_size points, by default sized so that \
+    the temporaries stay bounded whatever the size of the map"
+    nb_points = points.shape[0]
+    closest = np.zeros((nb_points, 2))
+    normals = np.zeros((nb_points, 2))
+    best_dist = np.full(nb_points, np.inf)
+
+    if chunk_size is None:
+        nb_elements = max(scene.nb_segments + scene.nb_circles, 1)
+        chunk_size = max(NEAREST_ELEMENTS // nb_elements, 1)
+
+    seg = scene.seg_ends - scene.seg_starts
+    seg_len2 = np.sum(seg * seg, axis=1)
+    seg_normals = np.column_stack((-seg[:, 1], seg[:, 0]))
+    seg_normals /= np.maximum(np.sqrt(seg_len2), 1e-12)[:, np.newaxis]
+
+    for first in range(0, nb_points, chunk_size):
+        chunk = slice(first, first + chunk_size)
+        closest[chunk], normals[chunk], best_dist[chunk] = _nearest_chunk(
+            scene, points[chunk], seg, seg_len2, seg_normals)
+
+    return closest, normals, best_dist
+
+
+def _nearest_chunk(scene, points, seg, seg_len2, seg_normals):
+    "nearest_points of a chunk of points against all elements"
+    nb_points = points.shape[0]
+    rows = np.arange(nb_points)
+    best_dist = np.full(nb_points, np.inf)
+    closest = np.zeros((nb_points, 2))
+    normals = np.zeros((nb_points, 2))
+
+    if scene.nb_segments:
+        rel = points[:, np.newaxis, :] - scene.seg_starts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            param = np.clip(np.sum(rel * seg, axis=2) / seg_len2, 0.0, 1.0)
+        param = np.nan_to_num(param)
+        candidates = scene.seg_starts + param[..., np.newaxis] * seg
+        offsets = points[:, np.newaxis, :] - candidates
+        dist = np.sqrt(np.sum(offsets * offsets, axis=2))
+
+        best = np.argmin(dist, axis=1)
+        best_dist = dist[rows, best]
+        closest = candidates[rows, best]
+        normals = seg_normals[best]
+
+    if scene.nb_circles:
+        rel = points[:, np.newaxis, :] - scene.circle_centers
+        center_dist = np.sqrt(np.sum(rel * rel, axis=2))
+        dist = np.abs(center_dist - scene.circle_radii)
+
+        best = np.argmin(dist, axis=1)
+        circle_dist = dist[rows, best]
+        better = circle_dist < best_dist
+
+        radial = rel[rows, best]
+        radial /= np.maximum(center_dist[rows, best], 1e-12)[:, np.newaxis]
+        circle_closest = (scene.circle_centers[best] +
+                          radial * scene.circle_radii[best, np.newaxis])
+
+        best_dist = np.where(better, circle_dist, best_dist)
+        closest = np.where(better[:, np.newaxis], circle_closest, closest)
+        normals = np.where(better[:, np.newaxis], radial, normals)
+
+    return closest, normals, best_dist
+
+
+def _rotate(points, theta):
+    "rotate (N, 2) points by theta around the origin"
+    cosine = np.cos(theta)
+    sine = np.sin(theta)
+    return np.column_stack((cosine * points[:, 0] - sine * points[:, 1],
+                            sine * points[:, 0] + cosine * points[:, 1]))
+
+
+def _transform(points, pose):
+    "robot frame points to world frame for pose (x, y, theta)"
+    return _rotate(points, pose[2]) + pose[:2]
@@ -0,0 +1,134 @@
+"streaming scan generation with constant memory for long trajectories"
+
+import queue
+import threading
+from collections import deque
+from itertools import islice
+
+import numpy as np
+
+def scan_stream(simulator, states, environment, noise_sigma=None,
+                batch_size=64, ring_size=2, prefetch=0):
+    "yield an (angles, ranges) scan for every pose of the iterable states \
+    scans are computed batch_size poses at a time with lidar_sample_batch \
+    into a ring of ring_size preallocated batch buffers, so memory stays \
+    constant however long the trajectory is. the yielded arrays are views \
+    into the ring: they stay valid while the following \
+    ring_size - prefetch - 1 batches are consumed, copy them to keep them \
+    longer. with prefetch > 0 a producer thread computes up to prefetch \
+    batches ahead and blocks when the consumer falls behind (backpressure)"
+
+    if prefetch < 0 or ring_size < prefetch + 1:
+        raise ValueError("ring_size must be at least prefetch + 1")
+    simulator.check_measurement(noise_sigma, batch=True)
+
+    ring = _Ring(simulator, ring_size, batch_size)
+    batches = _batches(states, batch_size)
+
+    if prefetch == 0:
+        for index, batch in enumerate(batches):
+            slot = index % ring_size
+            ring.fill(slot, batch, environment, noise_sigma)
+            for scan in ring.scans(slot, batch.shape[0]):
+                yield scan
+        return
+
+    producer = _Producer(ring, batches, environment, noise_sigma, prefetch)
+    held = deque(range(prefetch + 1, ring_size))
+
+    try:
+        while True:
+            slot, count = producer.next_batch()
+            if slot is None:
+                return
+            for scan in ring.scans(slot, count):
+                yield scan
+            held.append(slot)
+            producer.release(held.popleft())
+    finally:
+        producer.stop()
+
+
+class _Ring(object):
+    "preallocated angle and range buffers for ring_size batches"
+
+    def __init__(self, simulator, ring_size, batch_size):
+        self.simulator = simulator
+        shape = (ring_size, batch_size, simulator.nb_samples)
+        self.angles = np.empty(shape)
+        self.ranges = np.empty(shape)
+
+    def fill(self, slot, states, environment, noise_sigma):
+        "compute the scans for states into slot"
+        count = states.shape[0]
+        self.simulator.lidar_sample_batch(states, environment,
+                                          noise_sigma=noise_sigma,
+                                          out=self.ranges[slot, :count])
+        np.subtract(self.simulator.beam_angles(states[:, 2]),
+                    states[:, 2, np.newaxis],
+                    out=self.angles[slot, :count])
+
+    def scans(self, slot, count):
+        "(angles, ranges) views of the first count scans of slot"
+        for idx in range(count):
+            yield (self.angles[slot, idx], self.ranges[slot, idx])
+
+
+class _Producer(object):
+    "background thread filling free ring slots ahead of the consumer"
+
+    def __init__(self, ring, batches, environment, noise_sigma, prefetch):
+        self._ring = ring
+        self._batches = batches
+        self._environment = environment
+        self._noise_sigma = noise_sigma
+
+        self._free = queue.Queue()
+        for slot in range(prefetch + 1):
+            self._free.put(slot)
+        self._ready = queue.Queue()
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run,
+                                        name='scan_stream producer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for batch in self._batches:
+                slot = self._free.get()
+                if self._stopped:
+                    return
+                self._ring.fill(slot, batch, self._environment,
+                                self._noise_sigma)
+                self._ready.put((slot, batch.shape[0], None))
+            self._ready.put((None, 0, None))
+        except Exception as error:
+            self._ready.put((None, 0, error))
+
+    def next_batch(self):
+        "(slot, count) of the next computed batch, (None, 0) at the end"
+        slot, count, error = self._ready.get()
+        if error is not None:
+            raise error
+        return (slot, count)
+
+    def release(self, slot):
+        "the consumer no longer needs slot"
+        self._free.put(slot)
+
+    def stop(self):
+        "let the producer thread terminate"
+        self._stopped = True
+        self._free.put(None)
+
+
+def _batches(states, batch_size):
+    "(n, 3) arrays of consecutive poses from an iterable of states"
+    states = iter(states)
+    while True:
+        batch = list(islice(states, batch_size))
+        if not batch:
+            return
+        yield np.array(batch, dtype=np.float64).reshape(-1, 3)
@@ -0,0 +1,156 @@
+"compiled array backed representation of an environment"
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+from linda.Polyline import Polyline
+from linda.RayCasting import cast_rays
+
+class Scene(object):
+    "environment compiled once into contiguous float64 arrays \
+    segments are stored as (S, 2) start and end arrays, circles as (C, 2) \
+    centers and (C,) radii. version is incremented on every modification \
+    so derived data can be cached against it"
+
+    def __init__(self, environment=()):
+        self.version = 0
+        self._elements = list(environment)
+        self._compile()
+
+    @staticmethod
+    def from_arrays(seg_starts, seg_ends, circle_centers, circle_radii):
+        "build a scene directly from its arrays without any python objects \
+        elements are only created if the scene is iterated"
+        scene = Scene()
+        scene._elements = None
+        scene.seg_starts = _as_points(seg_starts)
+        scene.seg_ends = _as_points(seg_ends)
+        scene.circle_centers = _as_points(circle_centers)
+        scene.circle_radii = np.ascontiguousarray(circle_radii,
+                                                  dtype=np.float64).reshape(-1)
+        return scene
+
+    @property
+    def elements(self):
+        "environment list equivalent to this scene"
+        if self._elements is None:
+            self._elements = self._materialize()
+        return self._elements
+
+    @property
+    def nb_segments(self):
+        "number of line segments"
+        return self.seg_starts.shape[0]
+
+    @property
+    def nb_circles(self):
+        "number of circles"
+        return self.circle_centers.shape[0]
+
+    @property
+    def broadcast_width(self):
+        "primitives cast_rays tests every ray against at once, used to \
+        bound the temporaries of batched casts"
+        return self.nb_segments + self.nb_circles
+
+    def add(self, element):
+        "add a single element to the scene"
+        self.extend([element])
+
+    def extend(self, elements):
+        "add several elements to the scene and recompile once"
+        self._elements = self.elements + list(elements)
+        self._compile()
+        self.version += 1
+
+    def bounds(self):
+        "axis aligned bounding box ((min_x, min_y), (max_x, max_y)) \
+        of all elements or None for an empty scene"
+        lower = [self.seg_starts, self.seg_ends,
+                 self.circle_centers - self.circle_radii[:, np.newaxis]]
+        upper = [self.seg_starts, self.seg_ends,
+                 self.circle_centers + self.circle_radii[:, np.newaxis]]
+
+        lower = np.concatenate(lower)
+        upper = np.concatenate(upper)
+
+        if lower.shape[0] == 0:
+            return None
+
+        return (lower.min(axis=0), upper.max(axis=0))
+
+    def cast_rays(self, origins, directions, default_dist):
+        "distance to the closest element along every ray"
+        return cast_rays(origins, directions,
+                         self.seg_starts, self.seg_ends,
+                         self.circle_centers, self.circle_radii,
+                         default_dist)
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __len__(self):
+        # number of elements iteration yields, a polyline is one element
+        # however many edges nb_segments counts for it
+        if self._elements is None:
+            return self.nb_segments + self.nb_circles
+        return len(self._elements)
+
+    def __str__(self):
+        return "Scene: {s} segments, {c} circles (version {v})".format(
+            s=self.nb_segments, c=self.nb_circles, v=self.version)
+
+    def _compile(self):
+        "pack the python elements into the array buffers, the edges of \
+        polylines and polygons follow the plain segments"
+        segments = []
+        polylines = []
+        circles = []
+
+        for elem in self._elements:
+            if isinstance(elem, LineSegment):
+                segments.append(elem)
+            elif isinstance(elem, Polyline):
+                polylines.append(elem)
+            elif isinstance(elem, Circle):
+                circles.append(elem)
+            else:
+                raise TypeError("cannot compile {} into a scene".format(elem))
+
+        self.seg_starts = _as_points(
+            [[s.start.pos_x, s.start.pos_y] for s in segments])
+        self.seg_ends = _as_points(
+            [[s.end.pos_x, s.end.pos_y] for s in segments])
+        if polylines:
+            self.seg_starts = np.concatenate(
+                [self.seg_starts] + [p.edge_starts for p in polylines])
+            self.seg_ends = np.concatenate(
+                [self.seg_ends] + [p.edge_ends for p in polylines])
+        self.circle_centers = _as_points(
+            [[c.pos.pos_x, c.pos.pos_y] for c in circles])
+        self.circle_radii = np.array([c.radius for c in circles],
+                                     dtype=np.float64)
+
+    def _materialize(self):
+        "create python elements from the array buffers"
+        segments = [LineSegment(Vec2D(*start), Vec2D(*end))
+                    for start, end in zip(self.seg_starts.tolist(),
+                                          self.seg_ends.tolist())]
+        circles = [Circle(Vec2D(*center), radius)
+                   for center, radius in zip(self.circle_centers.tolist(),
+                                             self.circle_radii.tolist())]
+        return segments + circles
+
+
+def as_scene(environment):
+    "return environment itself if it already is a scene, compile it otherwise"
+    if isinstance(environment, Scene):
+        return environment
+    return Scene(environment)
+
+
+def _as_points(values):
+    "contiguous (N, 2) float64 array"
+    return np.ascontiguousarray(values, dtype=np.float64).reshape(-1, 2)
@@ -0,0 +1,90 @@
+"vectorized lidar sensor model: measurement noise and beam likelihoods"
+
+from math import sqrt, pi
+
+import numpy as np
+
+class SensorModel(object):
+    "turns ideal ranges into realistic measurements and scores measurements \
+    against expected ranges. all operations work on whole range arrays of \
+    any shape at once. the error sources are range dependent gaussian noise \
+    (sigma + sigma_ratio * range), angular jitter of the reported beam \
+    angles, short reads (a return uniformly before the true range), dropouts \
+    (reported as NaN) and quantization to resolution. ranges at or beyond \
+    max_range are misses and reported as miss_value (max_range by default), \
+    so max_range must not exceed the default_dist of the simulator. \
+    rng is a numpy.random.Generator or a seed"
+
+    def __init__(self, max_range, sigma=0.0, sigma_ratio=0.0,
+                 angular_sigma=0.0, short_prob=0.0, dropout_prob=0.0,
+                 resolution=None, miss_value=None, rng=None):
+        self.max_range = max_range
+        self.sigma = sigma
+        self.sigma_ratio = sigma_ratio
+        self.angular_sigma = angular_sigma
+        self.short_prob = short_prob
+        self.dropout_prob = dropout_prob
+        self.resolution = resolution
+        self.miss_value = max_range if miss_value is None else miss_value
+
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        self.rng = rng
+
+    def apply(self, ranges, angles=None):
+        "noisy copy of the ideal ranges, with angles also the jittered \
+        angles as a tuple (angles, ranges) like lidar_sample returns"
+        ranges = np.array(ranges, dtype=np.float64)
+        miss = ranges >= self.max_range
+
+        sigma = self.sigma + self.sigma_ratio * ranges
+        if np.any(sigma > 0):
+            ranges += sigma * self.rng.standard_normal(ranges.shape)
+
+        if self.short_prob > 0:
+            short = self.rng.random(ranges.shape) < self.short_prob
+            ranges = np.where(short, ranges * self.rng.random(ranges.shape),
+                              ranges)
+
+        if self.resolution:
+            ranges = np.round(ranges / self.resolution) * self.resolution
+
+        np.clip(ranges, 0.0, self.max_range, out=ranges)
+        ranges[miss] = self.miss_value
+
+        if self.dropout_prob > 0:
+            ranges[self.rng.random(ranges.shape) < self.dropout_prob] = np.nan
+
+        if angles is None:
+            return ranges
+
+        angles = np.array(angles, dtype=np.float64)
+        if self.angular_sigma > 0:
+            angles += self.rng.normal(0.0, self.angular_sigma, angles.shape)
+        return (angles, ranges)
+
+    def log_likelihood(self, ranges, expected, hit_prob=0.9, rand_prob=0.05,
+                       max_prob=0.05):
+        "log likelihood of measured ranges for every row of expected, a \
+        mixture of a gaussian around the expected range (plus the short \
+        read probability), uniform random returns and misses at max range. \
+        dropped (NaN) beams carry no information and are skipped"
+        ranges = np.asarray(ranges, dtype=np.float64)
+        expected = np.asarray(expected, dtype=np.float64)
+
+        sigma = np.maximum(self.sigma + self.sigma_ratio * expected, 1e-3)
+        diff = (ranges - expected) / sigma
+        density = hit_prob * np.exp(-0.5 * diff * diff) / (sqrt(2 * pi) * sigma)
+
+        if self.short_prob > 0:
+            before = (ranges < expected) & (ranges >= 0)
+            density += np.where(before, self.short_prob /
+                                np.maximum(expected, 1e-3), 0.0)
+
+        density += rand_prob / self.max_range
+        miss = ranges >= self.max_range
+        density = np.where(miss, density + max_prob, density)
+
+        log_density = np.log(density)
+        log_density[np.isnan(log_density)] = 0.0
+        return np.sum(log_density, axis=-1)
@@ -0,0 +1,339 @@
+"uniform grid spatial index for ray casting against large scenes"
+
+from math import sqrt
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Scene import as_scene
+import linda.Instrumentation as instrumentation
+
+class UniformGrid(object):
+    "uniform grid over the elements of a scene \
+    every cell stores the elements that pass through it in compressed \
+    sparse row layout (cell_offsets, cell_items). items are indices into \
+    the scene segments followed by the scene circles. rays walk the grid \
+    cell by cell (DDA) and stop at the first confirmed hit"
+
+    def __init__(self, environment, cell_size=None):
+        self.scene = as_scene(environment)
+        self.requested_cell_size = cell_size
+        self._build()
+
+    @staticmethod
+    def from_arrays(scene, cell_size, lower, shape, cell_offsets, cell_items):
+        "grid over scene from a previously built layout (e.g. a cached \
+        one) without registering the elements again"
+        grid = UniformGrid.__new__(UniformGrid)
+        grid.scene = as_scene(scene)
+        grid.scene_version = grid.scene.version
+        grid.requested_cell_size = float(cell_size)
+        grid.cell_size = float(cell_size)
+        grid.lower = np.asarray(lower, dtype=np.float64)
+        grid.shape = tuple(int(n) for n in shape)
+        grid.upper = grid.lower + np.array(grid.shape) * grid.cell_size
+        grid.cell_offsets = np.asarray(cell_offsets, dtype=np.int64)
+        grid.cell_items = np.ascontiguousarray(cell_items, dtype=np.int64)
+        grid._items = None
+        return grid
+
+    def _build(self):
+        "(re)build the index from the current scene arrays"
+        scene = self.scene
+        self.scene_version = scene.version
+
+        bounds = scene.bounds()
+        if bounds is None:
+            bounds = (np.zeros(2), np.zeros(2))
+        lower, upper = bounds
+
+        extent = upper - lower
+        nb_elements = max(scene.nb_segments + scene.nb_circles, 1)
+
+        cell_size = self.requested_cell_size
+        if cell_size is None:
+            cell_size = max(sqrt(extent[0] * extent[1] / nb_elements),
+                            max(extent) / nb_elements,
+                            Vec2D.EPSILON)
+        self.cell_size = float(cell_size)
+
+        # pad so elements on the border lie strictly inside
+        margin = 0.5 * self.cell_size
+        self.lower = lower - margin
+        self.shape = tuple(int(n) for n in
+                           np.floor((extent + 2 * margin) / self.cell_size) + 1)
+        self.upper = self.lower + np.array(self.shape) * self.cell_size
+
+        cells, items = self._register()
+        order = np.argsort(cells, kind='stable')
+        self.cell_items = np.ascontiguousarray(items[order], dtype=np.int64)
+        counts = np.bincount(cells, minlength=self.shape[0] * self.shape[1])
+        self.cell_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        # python copies for cast_ray are made on first use
+        self._items = None
+
+    def _register(self):
+        "(cell, item) pairs for every cell an element passes through"
+        scene = self.scene
+        half_diag = sqrt(0.5) * self.cell_size * (1.0 + Vec2D.EPSILON)
+
+        seg_lower = np.minimum(scene.seg_starts, scene.seg_ends)
+        seg_upper = np.maximum(scene.seg_starts, scene.seg_ends)
+        radii = scene.circle_radii[:, np.newaxis]
+        lower = np.concatenate((seg_lower, scene.circle_centers - radii))
+        upper = np.concatenate((seg_upper, scene.circle_centers + radii))
+
+        cell_lower = self._cell_index(lower)
+        cell_upper = self._cell_index(upper)
+        spans = cell_upper - cell_lower + 1
+        counts = spans[:, 0] * spans[:, 1]
+
+        # candidate pairs from the bounding boxes of the elements
+        items = np.repeat(np.arange(lower.shape[0]), counts)
+        local = np.arange(items.size) - np.repeat(np.cumsum(counts) - counts,
+                                                  counts)
+        cell_x = cell_lower[items, 0] + local // spans[items, 1]
+        cell_y = cell_lower[items, 1] + local % spans[items, 1]
+
+        centers = (self.lower + self.cell_size *
+                   (np.column_stack((cell_x, cell_y)) + 0.5))
+
+        keep = np.zeros(items.size, dtype=bool)
+
+        is_seg = items < scene.nb_segments
+        seg_idx = items[is_seg]
+        keep[is_seg] = _point_segment_distance(
+            centers[is_seg],
+            scene.seg_starts[seg_idx],
+            scene.seg_ends[seg_idx]) <= half_diag
+
+        # only the perimeter of a circle can be hit by a ray
+        circ_idx = items[~is_seg] - scene.nb_segments
+        center_dist = np.sqrt(np.sum(
+            (centers[~is_seg] - scene.circle_centers[circ_idx])**2, axis=1))
+        circ_radii = scene.circle_radii[circ_idx]
+        keep[~is_seg] = ((center_dist <= circ_radii + half_diag) &
+                         (center_dist >= circ_radii - half_diag))
+
+        cells = cell_x * self.shape[1] + cell_y
+
+        return cells[keep].astype(np.int64), items[keep]
+
+    def _cell_index(self, points):
+        "integer cell coordinates of points, clamped to the grid"
+        index = np.floor((points - self.lower) / self.cell_size).astype(np.int64)
+        return np.clip(index, 0, np.array(self.shape) - 1)
+
+    def _prepare_scalar(self):
+        "plain python copies of the scene data for the per ray traversal"
+        scene = self.scene
+        self._starts = scene.seg_starts.tolist()
+        self._dirs = (scene.seg_ends - scene.seg_starts).tolist()
+        self._centers = scene.circle_centers.tolist()
+        self._radii = scene.circle_radii.tolist()
+        self._nb_segments = scene.nb_segments
+        self._lower = self.lower.tolist()
+        self._upper = self.upper.tolist()
+        self._offsets = self.cell_offsets.tolist()
+        self._items = self.cell_items.tolist()
+
+    @property
+    def broadcast_width(self):
+        "rays are traversed one at a time, see Scene.broadcast_width"
+        return 1
+
+    def candidates(self, cell_x, cell_y):
+        "indices of the elements registered in cell (cell_x, cell_y)"
+        cell = cell_x * self.shape[1] + cell_y
+        return self.cell_items[self.cell_offsets[cell]:self.cell_offsets[cell + 1]]
+
+    def cast_rays(self, origins, directions, default_dist, max_dist=None):
+        "distance to the closest element along every ray, traversing \
+        only the cells the ray passes through. rays without a hit (or no hit \
+        closer than max_dist if given) return default_dist"
+        if self.scene.version != self.scene_version:
+            self._build()
+
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 2)
+        origins = np.broadcast_to(origins, directions.shape)
+
+        ranges = np.empty(directions.shape[0])
+        for idx, (origin, direction) in enumerate(zip(origins.tolist(),
+                                                      directions.tolist())):
+            dist = self.cast_ray(origin, direction, max_dist)
+            ranges[idx] = default_dist if dist is None else dist
+
+        return ranges
+
+    def cast_ray(self, origin, direction, max_dist=None):
+        "distance to the first element hit by a single ray or None"
+        if self._items is None:
+            self._prepare_scalar()
+
+        pos_x, pos_y = origin
+        dir_x, dir_y = direction
+        dir_len = sqrt(dir_x * dir_x + dir_y * dir_y)
+
+        if max_dist is None:
+            max_param = float('inf')
+        else:
+            max_param = max_dist / dir_len
+
+        t_enter, t_leave = self._clip(pos_x, pos_y, dir_x, dir_y)
+        t_enter = max(t_enter, 0.0)
+        if t_enter > t_leave or t_enter > max_param:
+            return None
+
+        cell_size = self.cell_size
+        nb_x, nb_y = self.shape
+        lower_x, lower_y = self._lower
+        rel_x = pos_x + dir_x * t_enter - lower_x
+        rel_y = pos_y + dir_y * t_enter - lower_y
+        cell_x = min(max(int(rel_x // cell_size), 0), nb_x - 1)
+        cell_y = min(max(int(rel_y // cell_size), 0), nb_y - 1)
+
+        step_x, next_x, delta_x = _dda_axis(
+            pos_x, dir_x, lower_x, cell_x, cell_size)
+        step_y, next_y, delta_y = _dda_axis(
+            pos_y, dir_y, lower_y, cell_y, cell_size)
+
+        offsets = self._offsets
+        items = self._items
+        tested = set()
+        best = float('inf')
+
+        while True:
+            cell = cell_x * nb_y + cell_y
+            for item in items[offsets[cell]:offsets[cell + 1]]:
+                if item in tested:
+                    continue
+                tested.add(item)
+                param = self._hit(item, pos_x, pos_y, dir_x, dir_y)
+                if param < best:
+                    best = param
+
+            t_exit = min(next_x, next_y)
+            if best <= t_exit or t_exit > max_param:
+                break
+
+            if next_x < next_y:
+                cell_x += step_x
+                next_x += delta_x
+                if not 0 <= cell_x < nb_x:
+                    break
+            else:
+                cell_y += step_y
+                next_y += delta_y
+                if not 0 <= cell_y < nb_y:
+                    break
+
+        # only the elements of the traversed cells are tested
+        instrumentation.count('lidar.primitive_tests', len(tested))
+
+        if best == float('inf') or best > max_param:
+            return None
+
+        return best * dir_len
+
+    def _clip(self, pos_x, pos_y, dir_x, dir_y):
+        "parameter interval in which the ray lies inside the grid"
+        t_enter = -float('inf')
+        t_leave = float('inf')
+
+        axes = ((pos_x, dir_x, self._lower[0], self._upper[0]),
+                (pos_y, dir_y, self._lower[1], self._upper[1]))
+
+        for pos, direction, low, high in axes:
+            if direction == 0.0:
+                if not low <= pos <= high:
+                    return (1.0, 0.0)
+                continue
+            t_low = (low - pos) / direction
+            t_high = (high - pos) / direction
+            t_enter = max(t_enter, min(t_low, t_high))
+            t_leave = min(t_leave, max(t_low, t_high))
+
+        return (t_enter, t_leave)
+
+    def _hit(self, item, pos_x, pos_y, dir_x, dir_y):
+        "ray parameter of the closest hit with one element, same arithmetic \
+        as linda.RayCasting so that results match the brute force engine"
+        if item < self._nb_segments:
+            start_x, start_y = self._starts[item]
+            seg_x, seg_y = self._dirs[item]
+
+            dir_cross_prod = seg_x * dir_y - seg_y * dir_x
+            if abs(dir_cross_prod) < Vec2D.EPSILON:
+                return float('inf')
+
+            diff_x = pos_x - start_x
+            diff_y = pos_y - start_y
+            param_u = (diff_x * seg_y - diff_y * seg_x) / dir_cross_prod
+            param_t = (diff_x * dir_y - diff_y * dir_x) / dir_cross_prod
+
+            if 0 <= param_u and 0 <= param_t <= 1:
+                return param_u
+            return float('inf')
+
+        item -= self._nb_segments
+        center_x, center_y = self._centers[item]
+        radius = self._radii[item]
+
+        diff_x = pos_x - center_x
+        diff_y = pos_y - center_y
+        param1 = dir_x * dir_x + dir_y * dir_y
+        param2 = 2 * (dir_x * diff_x + dir_y * diff_y)
+        param3 = diff_x * diff_x + diff_y * diff_y - radius * radius
+
+        det = param2 * param2 - 4 * param1 * param3
+        if det < 0:
+            return float('inf')
+        elif abs(det) < Vec2D.EPSILON:
+            sqrt_det = 0.0
+        else:
+            sqrt_det = sqrt(det)
+
+        near = (-param2 - sqrt_det) / (2 * param1)
+        if near >= 0:
+            return near
+        far = (-param2 + sqrt_det) / (2 * param1)
+        if far >= 0:
+            return far
+        return float('inf')
+
+    def __iter__(self):
+        return iter(self.scene)
+
+    def __len__(self):
+        return len(self.scene)
+
+    def __str__(self):
+        return "UniformGrid: {nx}x{ny} cells of {size}, {n} entries".format(
+            nx=self.shape[0], ny=self.shape[1], size=self.cell_size,
+            n=self.cell_items.size)
+
+
+def _dda_axis(pos, direction, lower, cell, cell_size):
+    "step, ray parameter of the next cell border and parameter increment \
+    along one axis for the grid traversal"
+    if direction > 0:
+        border = lower + (cell + 1) * cell_size
+        return (1, (border - pos) / direction, cell_size / direction)
+    elif direction < 0:
+        border = lower + cell * cell_size
+        return (-1, (border - pos) / direction, -cell_size / direction)
+    return (0, float('inf'), float('inf'))
+
+
+def _point_segment_distance(points, starts, ends):
+    "euclidean distance from each point to the matching segment"
+    seg = ends - starts
+    seg_len2 = np.sum(seg * seg, axis=1)
+    rel = points - starts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        param = np.where(seg_len2 > 0, np.sum(rel * seg, axis=1) / seg_len2, 0.0)
+    param = np.clip(param, 0.0, 1.0)
+    closest = starts + seg * param[:, np.newaxis]
+    return np.sqrt(np.sum((points - closest)**2, axis=1))
@@ -7,6 +7,8 @@ class Vec2D(object):
 
     EPSILON = 0.0001
 
+    __slots__ = ('pos_x', 'pos_y')
+
     def __init__(self, x=0.0, y=0.0):
         self.pos_x = x
         self.pos_y = y
@@ -21,7 +23,13 @@ class Vec2D(object):
 
     def length(self):
         "length of vector"
-        return sqrt(self.dot(self))
+        return sqrt(self.pos_x * self.pos_x + self.pos_y * self.pos_y)
+
+    def distance_to(self, other):
+        "euclidean distance between self and other"
+        diff_x = self.pos_x - other.pos_x
+        diff_y = self.pos_y - other.pos_y
+        return sqrt(diff_x * diff_x + diff_y * diff_y)
 
     def normalized(self):
         "unit vector with same direction as self"
@@ -31,20 +39,18 @@ class Vec2D(object):
     def rotate(self, angle, center=None):
         "rotate self by angle radians around center"
 
-        if center is None:
-            center = Vec2D()
-
-        centered = self - center
-
         cosine = cos(angle)
         sine = sin(angle)
 
-        new_pos_x = cosine * centered.pos_x - sine * centered.pos_y
-        new_pos_y = sine * centered.pos_x + cosine * centered.pos_y
+        if center is None:
+            return Vec2D(cosine * self.pos_x - sine * self.pos_y,
+                         sine * self.pos_x + cosine * self.pos_y)
 
-        final = Vec2D(new_pos_x, new_pos_y) + center
+        centered_x = self.pos_x - center.pos_x
+        centered_y = self.pos_y - center.pos_y
 
-        return final
+        return Vec2D(cosine * centered_x - sine * centered_y + center.pos_x,
+                     sine * centered_x + cosine * centered_y + center.pos_y)
 
     def oriented_angle(self, other):
         "oriented angle from self to other"
@@ -88,7 +94,7 @@ class Vec2D(object):
         return "({x},{y})".format(x=self.pos_x, y=self.pos_y)
 
     def is_equal(self, other):
-        return (self - other).length() < Vec2D.EPSILON
+        return self.distance_to(other) < Vec2D.EPSILON
 
     @staticmethod
     def orientation(vec1, vec2, vec3):
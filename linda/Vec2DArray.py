@@ -0,0 +1,155 @@
+"batches of 2D vectors backed by numpy arrays"
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+
+class Vec2DArray(object):
+    "N 2d vectors stored in one (N, 2) float64 buffer \
+    offers the Vec2D operations vectorized over all vectors. operands can be \
+    another Vec2DArray of the same length or a single Vec2D which is \
+    broadcast against every vector"
+
+    def __init__(self, data=None):
+        if data is None:
+            data = np.zeros((0, 2))
+        self.data = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, 2)
+
+    @staticmethod
+    def from_vec2d_list(vectors):
+        "pack a list of Vec2D"
+        return Vec2DArray([[vec.pos_x, vec.pos_y] for vec in vectors])
+
+    @staticmethod
+    def from_xy(pos_x, pos_y):
+        "build from separate x and y coordinate arrays"
+        return Vec2DArray(np.column_stack((pos_x, pos_y)))
+
+    @staticmethod
+    def from_polar(angles, lengths):
+        "vectors of the given lengths pointing in the given directions, \
+        e.g. the points of a scan in the robot frame"
+        angles = np.asarray(angles, dtype=np.float64)
+        lengths = np.asarray(lengths, dtype=np.float64)
+        return Vec2DArray.from_xy(lengths * np.cos(angles),
+                                  lengths * np.sin(angles))
+
+    def to_vec2d_list(self):
+        "unpack into a list of Vec2D"
+        return [Vec2D(pos_x, pos_y) for pos_x, pos_y in self.data.tolist()]
+
+    @property
+    def pos_x(self):
+        "x coordinates (view)"
+        return self.data[:, 0]
+
+    @property
+    def pos_y(self):
+        "y coordinates (view)"
+        return self.data[:, 1]
+
+    def dot(self, other):
+        "dot products"
+        other = _coords(other)
+        return self.data[:, 0] * other[..., 0] + self.data[:, 1] * other[..., 1]
+
+    def cross(self, other):
+        "2d cross products"
+        other = _coords(other)
+        return self.data[:, 0] * other[..., 1] - self.data[:, 1] * other[..., 0]
+
+    def length(self):
+        "lengths of all vectors"
+        return np.sqrt(self.dot(self))
+
+    def normalized(self):
+        "unit vectors with the same directions"
+        length = self.length()
+        if np.any(length == 0):
+            raise ZeroDivisionError("cannot normalize null vector")
+        return Vec2DArray(self.data / length[:, np.newaxis])
+
+    def rotate(self, angle, center=None):
+        "rotate all vectors by angle radians (scalar or one per vector) \
+        around center"
+        cosine = np.cos(angle)
+        sine = np.sin(angle)
+
+        centered = self.data
+        if center is not None:
+            centered = centered - _coords(center)
+
+        rotated = np.empty_like(centered)
+        rotated[:, 0] = cosine * centered[:, 0] - sine * centered[:, 1]
+        rotated[:, 1] = sine * centered[:, 0] + cosine * centered[:, 1]
+
+        if center is not None:
+            rotated += _coords(center)
+
+        return Vec2DArray(rotated)
+
+    def oriented_angle(self, other):
+        "oriented angles in [0, 2 pi) from self to other"
+        vec1 = self.normalized()
+        vec2 = Vec2DArray(np.broadcast_to(_coords(other), self.data.shape))
+        vec2 = vec2.normalized()
+
+        cross_prod = vec1.cross(vec2)
+        dot_prod = np.clip(vec1.dot(vec2), -1.0, 1.0)
+
+        angle = np.arccos(dot_prod)
+        angle = np.where(cross_prod > 0, angle, -angle)
+
+        return np.where(angle < 0, angle + 2 * np.pi, angle)
+
+    def is_equal(self, other):
+        "element wise approximate equality"
+        return (self - other).length() < Vec2D.EPSILON
+
+    def __neg__(self):
+        return Vec2DArray(-self.data)
+
+    def __add__(self, other):
+        return Vec2DArray(self.data + _coords(other))
+
+    def __sub__(self, other):
+        return Vec2DArray(self.data - _coords(other))
+
+    def __mul__(self, other):
+        "scale by a scalar or by one factor per vector"
+        factor = np.asarray(other, dtype=np.float64)
+        if factor.ndim == 1:
+            factor = factor[:, np.newaxis]
+        return Vec2DArray(self.data * factor)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            pos_x, pos_y = self.data[index].tolist()
+            return Vec2D(pos_x, pos_y)
+        return Vec2DArray(self.data[index])
+
+    def __iter__(self):
+        return iter(self.to_vec2d_list())
+
+    def __str__(self):
+        return "[{}]".format(", ".join(str(vec) for vec in self))
+
+    @staticmethod
+    def orientation(vec1, vec2, vec3):
+        "element wise Vec2D.orientation, positive for mathematically \
+        positively oriented point triples"
+        vec12 = _coords(vec2) - _coords(vec1)
+        vec23 = _coords(vec3) - _coords(vec2)
+        return vec12[..., 0] * vec23[..., 1] - vec12[..., 1] * vec23[..., 0]
+
+
+def _coords(vec):
+    "coordinate array of a Vec2DArray, Vec2D or array like"
+    if isinstance(vec, Vec2DArray):
+        return vec.data
+    if isinstance(vec, Vec2D):
+        return np.array([vec.pos_x, vec.pos_y])
+    return np.asarray(vec, dtype=np.float64)
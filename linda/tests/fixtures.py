@@ -0,0 +1,43 @@
+"environments and poses shared by the unit tests"
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+
+# closed 3 x 2 rectangle
+WALLS = [
+    LineSegment(Vec2D(0.0, 0.0), Vec2D(3.0, 0.0)),
+    LineSegment(Vec2D(3.0, 0.0), Vec2D(3.0, 2.0)),
+    LineSegment(Vec2D(3.0, 2.0), Vec2D(0.0, 2.0)),
+    LineSegment(Vec2D(0.0, 2.0), Vec2D(0.0, 0.0)),
+]
+
+PILLAR = Circle(Vec2D(2.0, 1.0), 0.2)
+
+CIRCLES = [PILLAR, Circle(Vec2D(0.7, 1.5), 0.1)]
+
+# the rectangle with one pillar
+ROOM = WALLS + [PILLAR]
+
+
+def random_environment(nb_segments, size, seed):
+    "random segments and circles in a size x size square"
+    rng = np.random.RandomState(seed)
+    env = []
+    for _ in range(nb_segments):
+        start = rng.uniform(0, size, 2)
+        end = start + rng.uniform(-2, 2, 2)
+        env.append(LineSegment(Vec2D(*start), Vec2D(*end)))
+    for _ in range(nb_segments // 4):
+        env.append(Circle(Vec2D(*rng.uniform(0, size, 2)), rng.uniform(0.1, 0.5)))
+    return env
+
+
+def random_states(nb_states, seed):
+    "(nb_states, 3) random poses inside the rectangle"
+    rng = np.random.RandomState(seed)
+    return np.column_stack((rng.uniform(0.1, 2.9, nb_states),
+                            rng.uniform(0.1, 1.9, nb_states),
+                            rng.uniform(-np.pi, np.pi, nb_states)))
@@ -0,0 +1,65 @@
+"unit tests for the headless batch simulation"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from linda.LidarSimulator import LidarSimulator
+from linda.MapFile import save_map
+from linda.ScanLog import ScanLogReader
+from linda.BatchSimulation import main
+from linda.tests.fixtures import ROOM
+
+class BatchSimulationTest(unittest.TestCase):
+    "test class for the batch simulation command"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.map_path = self.path('room.json')
+        self.log_path = self.path('scans.lscan')
+        save_map(self.map_path, ROOM)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def test_trajectory(self):
+        "every pose of a trajectory file becomes one scan"
+        poses = np.array([[0.5, 1.0, 0.0], [1.0, 0.5, 1.0], [2.5, 1.5, -2.0]])
+        np.savetxt(self.path('poses.txt'), poses)
+
+        main([self.map_path, self.log_path, '-t', self.path('poses.txt'),
+              '-b', '36', '--max-range', '5.0', '--batch-size', '2',
+              '--cache-dir', self.path('cache')])
+
+        reader = ScanLogReader(self.log_path)
+        expected = LidarSimulator(5.0, 36, engine='numpy').lidar_sample_batch(
+            poses, ROOM)
+        self.assertEqual(len(reader), 3)
+        np.testing.assert_allclose(reader.poses, poses, rtol=1e-6)
+        np.testing.assert_allclose(reader.ranges, expected, rtol=1e-6)
+        np.testing.assert_allclose(reader.timestamps, [0.0, 0.1, 0.2])
+
+    def test_script(self):
+        "motion scripts are expanded from the start pose"
+        with open(self.path('motion.txt'), 'w') as dst:
+            dst.write("advance 0.01 10\nrotate 0.1 5\n")
+
+        main([self.map_path, self.log_path, '-s', self.path('motion.txt'),
+              '--start', '0.5', '1.0', '0.0', '-e', 'python', '-b', '10',
+              '--stats', self.path('stats.json'), '--no-cache'])
+
+        reader = ScanLogReader(self.log_path)
+        self.assertEqual(len(reader), 16)
+        np.testing.assert_allclose(reader.poses[-1], [0.6, 1.0, 0.5],
+                                   rtol=1e-6)
+        self.assertTrue(os.path.exists(self.path('stats.json')))
+
+
+if __name__ == "__main__":
+    unittest.main()
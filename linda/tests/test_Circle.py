@@ -206,6 +206,31 @@ class CircleTest(unittest.TestCase):
 
         self.assertTrue(res_point.is_equal(reference_res))
 
+    def test_closest_hit(self):
+        "closest hit returns the parameter of the nearer intersection"
+
+        ray = Ray(Vec2D(3, 0), Vec2D(-1, 0))
+        circle = Circle()
+
+        self.assertAlmostEqual(circle.closest_hit(ray), 2.0)
+
+    def test_closest_hit_from_inside(self):
+        "from inside the circle only the forward intersection counts"
+
+        ray = Ray(Vec2D(), Vec2D(0, 1))
+        circle = Circle()
+
+        self.assertAlmostEqual(circle.closest_hit(ray), 1.0)
+
+    def test_closest_hit_pruned(self):
+        "hits not closer than max_dist are ignored"
+
+        ray = Ray(Vec2D(3, 0), Vec2D(-1, 0))
+        circle = Circle()
+
+        self.assertTrue(circle.closest_hit(ray, 2.0) is None)
+        self.assertTrue(circle.closest_hit(Ray(Vec2D(2, 0), Vec2D(1, 0))) is None)
+
 
 if __name__ == "__main__":
     unittest.main()
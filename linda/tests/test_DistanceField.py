@@ -0,0 +1,114 @@
+"unit tests for the precomputed distance field"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.LineSegment import LineSegment
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.DistanceField import DistanceField
+from linda.DynamicScene import DynamicScene
+from linda.tests.fixtures import ROOM, random_states
+
+RESOLUTION = 0.02
+
+class DistanceFieldTest(unittest.TestCase):
+    "test class for distance fields"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_distance(self):
+        "field values approximate the distance to the closest obstacle"
+        field = DistanceField.build(ROOM, RESOLUTION)
+
+        dist = field.distance(np.array([[0.5, 1.0], [1.5, 0.3], [2.5, 1.0]]))
+
+        np.testing.assert_allclose(dist, [0.5, 0.3, 0.3], atol=RESOLUTION)
+        self.assertEqual(field.distance([[-10.0, 0.0]])[0], np.inf)
+
+    def test_ranges_close_to_exact(self):
+        "sphere traced ranges stay within a few cells of the exact ranges"
+        field = DistanceField.build(ROOM, RESOLUTION)
+        exact = LidarSimulator(nb_samples=360, engine='numpy')
+        state = RobotState(1.0, 1.0, 0.4)
+
+        _, reference = exact.lidar_sample(state, ROOM)
+        _, approx = exact.lidar_sample(state, field)
+
+        error = np.abs(approx - reference)
+        self.assertTrue(np.median(error) < RESOLUTION)
+        self.assertTrue(np.percentile(error, 90) < 3 * RESOLUTION)
+
+    def test_long_corridor(self):
+        "rays hit the far end of a corridor thousands of steps long"
+        corners = [Vec2D(0.0, 0.0), Vec2D(50.0, 0.0), Vec2D(50.0, 0.3),
+                   Vec2D(0.0, 0.3)]
+        corridor = [LineSegment(corners[idx], corners[(idx + 1) % 4])
+                    for idx in range(4)]
+        field = DistanceField.build(corridor, RESOLUTION)
+        sim = LidarSimulator(default_dist=100.0, nb_samples=4, engine='numpy')
+
+        _, ranges = sim.lidar_sample(RobotState(0.5, 0.15, 0.0), field)
+
+        self.assertAlmostEqual(ranges[1], 49.5, delta=RESOLUTION)
+
+    def test_batch(self):
+        "batched scans of a field, also under a dynamic layer, equal one \
+        lidar_sample per pose"
+        field = DistanceField.build(ROOM, RESOLUTION)
+        sim = LidarSimulator(nb_samples=36, engine='numpy')
+        states = random_states(20, 2)
+
+        for caster in (field, DynamicScene(field)):
+            batch = sim.lidar_sample_batch(states, caster)
+
+            self.assertEqual(batch.shape, (20, 36))
+            for row, state in zip(batch, states):
+                _, ranges = sim.lidar_sample(RobotState(*state), caster)
+                np.testing.assert_array_equal(row, ranges)
+
+    def test_save_load(self):
+        "fields round trip through disk and are memory mapped on load"
+        field = DistanceField.build(ROOM, RESOLUTION)
+        path = os.path.join(self.tmp_dir, 'room.ldf')
+
+        field.save(path)
+        loaded = DistanceField.load(path)
+
+        self.assertTrue(isinstance(loaded.field, np.memmap))
+        self.assertEqual(loaded.shape, field.shape)
+        self.assertAlmostEqual(loaded.resolution, field.resolution)
+        np.testing.assert_array_equal(loaded.lower, field.lower)
+        np.testing.assert_array_equal(loaded.field, field.field)
+
+        origins = np.array([[1.0, 1.0]])
+        directions = np.array([[1.0, 0.0], [0.0, 1.0]])
+        np.testing.assert_array_equal(loaded.cast_rays(origins, directions, 5.0),
+                                      field.cast_rays(origins, directions, 5.0))
+
+    def test_load_rejects_other_files(self):
+        "only distance field files can be loaded"
+        path = os.path.join(self.tmp_dir, 'garbage')
+        with open(path, 'wb') as out:
+            out.write(b'\0' * 128)
+
+        with self.assertRaises(ValueError):
+            DistanceField.load(path)
+
+    def test_empty_scene(self):
+        "there is no distance field without obstacles"
+        with self.assertRaises(ValueError):
+            DistanceField.build([], RESOLUTION)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"unit tests for static maps with dynamic obstacles"
+
+import unittest
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.Scene import Scene
+from linda.UniformGrid import UniformGrid
+from linda.DynamicScene import DynamicScene
+from linda.tests.fixtures import WALLS
+
+
+PEOPLE = [Circle(Vec2D(2.0, 1.0), 0.2), Circle(Vec2D(0.7, 1.5), 0.1),
+          LineSegment(Vec2D(1.0, 0.3), Vec2D(1.4, 0.5))]
+
+class DynamicSceneTest(unittest.TestCase):
+    "test class for dynamic scenes"
+
+    def setUp(self):
+        self.sim = LidarSimulator(nb_samples=90, engine='numpy')
+        self.state = RobotState(1.5, 1.0, 0.3)
+
+    def assert_scan(self, world, elements):
+        "scans of world equal scans of the plain element list"
+        _, ranges = self.sim.lidar_sample(self.state, world)
+        _, expected = self.sim.lidar_sample(self.state, elements)
+        np.testing.assert_allclose(ranges, expected)
+
+    def test_static_only(self):
+        "without dynamic elements the static map is scanned"
+        self.assert_scan(DynamicScene(WALLS), WALLS)
+        self.assert_scan(DynamicScene(UniformGrid(WALLS)), WALLS)
+
+    def test_insert_remove(self):
+        "inserted elements appear, removed ones disappear"
+        world = DynamicScene(UniformGrid(WALLS))
+        handles = [world.insert(elem) for elem in PEOPLE]
+        self.assert_scan(world, WALLS + PEOPLE)
+
+        world.remove(handles[0])
+        self.assertEqual(world.nb_dynamic, 2)
+        self.assert_scan(world, WALLS + PEOPLE[1:])
+
+        # the remaining handles still refer to their elements
+        self.assertIs(world[handles[1]], PEOPLE[1])
+        world.remove(handles[1])
+        world.remove(handles[2])
+        self.assert_scan(world, WALLS)
+
+    def test_translate(self):
+        "translated elements are scanned at their new position"
+        world = DynamicScene(Scene(WALLS), PEOPLE)
+        offset = Vec2D(0.3, -0.2)
+        for handle in range(len(PEOPLE)):
+            world.translate(handle, offset)
+
+        self.assert_scan(world, WALLS + [elem + offset for elem in PEOPLE])
+
+    def test_replace_kind(self):
+        "elements can only be replaced by elements of the same kind"
+        world = DynamicScene(WALLS, PEOPLE[:1])
+        with self.assertRaises(TypeError):
+            world.replace(0, PEOPLE[2])
+
+    def test_many_inserts(self):
+        "the packed arrays grow past their initial capacity"
+        world = DynamicScene(WALLS)
+        circles = [Circle(Vec2D(0.2 + 0.1 * idx, 0.3), 0.03)
+                   for idx in range(20)]
+        for circle in circles:
+            world.insert(circle)
+        self.assert_scan(world, WALLS + circles)
+
+    def test_python_engine(self):
+        "the python engine iterates static and dynamic elements"
+        world = DynamicScene(WALLS, PEOPLE)
+        sim = LidarSimulator(nb_samples=90)
+        _, ranges = sim.lidar_sample(self.state, world)
+        _, expected = self.sim.lidar_sample(self.state, world)
+
+        self.assertEqual(len(world), len(WALLS) + len(PEOPLE))
+        np.testing.assert_allclose(ranges, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
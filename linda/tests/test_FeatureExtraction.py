@@ -0,0 +1,88 @@
+"unit tests for scan feature extraction"
+
+import unittest
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.FeatureExtraction import FeatureExtractor
+from linda.tests.fixtures import WALLS, PILLAR
+
+# a second circle large enough for a circle fit
+ROOM = WALLS + [PILLAR, Circle(Vec2D(0.6, 1.4), 0.15)]
+
+class FeatureExtractionTest(unittest.TestCase):
+    "test class for the feature extractor"
+
+    def setUp(self):
+        self.sim = LidarSimulator(default_dist=5.0, nb_samples=720,
+                                  engine='numpy')
+        self.extractor = FeatureExtractor(default_dist=5.0)
+
+    def test_segment(self):
+        "clusters are split at range jumps and short ones dropped"
+        ranges = np.array([1.0] * 6 + [3.0] * 2 + [2.0] * 5)
+        angles = np.linspace(0.0, 0.12, ranges.size)
+        points, ranges = self.extractor._scan_points(angles, ranges)
+
+        self.assertEqual(self.extractor.segment(points, ranges),
+                         [(0, 6), (8, 13)])
+
+    def test_circles(self):
+        "both landmarks are found in world coordinates"
+        state = RobotState(1.2, 0.8, 0.3)
+        angles, ranges = self.sim.lidar_sample(state, ROOM)
+
+        features = self.extractor.extract(angles, ranges, state)
+
+        self.assertEqual(len(features.circles), 2)
+        for feature, ref in zip(features.circles, ROOM[4:]):
+            self.assertTrue(feature.circle.pos.is_equal(ref.pos))
+            self.assertAlmostEqual(feature.circle.radius, ref.radius)
+
+    def test_lines(self):
+        "every wall point lies on an extracted line"
+        state = RobotState(1.2, 0.8, 0.3)
+        angles, ranges = self.sim.lidar_sample(state, ROOM)
+
+        features = self.extractor.extract(angles, ranges, state)
+
+        self.assertTrue(4 <= len(features.lines) <= 8)
+        for feature in features.lines:
+            self.assertLess(feature.error, 1e-3)
+            for point in (feature.segment.start, feature.segment.end):
+                on_wall = (abs(point.pos_x) < 1e-3 or abs(point.pos_x - 3.0) < 1e-3 or
+                           abs(point.pos_y) < 1e-3 or abs(point.pos_y - 2.0) < 1e-3)
+                self.assertTrue(on_wall)
+
+    def test_noisy_scan(self):
+        "circle fits tolerate range noise"
+        state = RobotState(1.2, 0.8, 0.3)
+        angles, ranges = self.sim.lidar_sample(state, ROOM)
+        ranges = ranges + np.random.default_rng(0).normal(0.0, 0.005, ranges.size)
+
+        features = self.extractor.extract(angles, ranges, state)
+
+        self.assertEqual(len(features.circles), 2)
+        for feature, ref in zip(features.circles, ROOM[4:]):
+            self.assertLess(feature.circle.pos.distance_to(ref.pos), 0.02)
+
+    def test_stream(self):
+        "one ScanFeatures per scan, robot frame without states"
+        states = np.array([[1.2, 0.8, 0.3], [1.5, 1.0, 0.0]])
+        scans = self.sim.lidar_sample_batch(states, ROOM)
+        angles = self.sim.beam_angles(0.0)
+
+        streamed = list(self.extractor.stream(angles, scans))
+
+        self.assertEqual(len(streamed), 2)
+        # landmark at (2, 1) is 0.5 in front of the second pose
+        centers = [feature.circle.pos for feature in streamed[1].circles]
+        self.assertTrue(any(center.is_equal(Vec2D(0.5, 0.0)) for center in centers))
+
+
+if __name__ == "__main__":
+    unittest.main()
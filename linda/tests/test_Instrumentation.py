@@ -0,0 +1,111 @@
+"unit tests for the hot path instrumentation"
+
+import unittest
+
+import numpy as np
+
+from linda.RobotState import RobotState
+from linda.Scene import Scene
+from linda.UniformGrid import UniformGrid
+from linda.DistanceField import DistanceField
+from linda.LidarSimulator import LidarSimulator
+from linda.QuadraticRegression import quadratic_regression
+from linda.tests.fixtures import WALLS, random_environment
+import linda.Instrumentation as instrumentation
+
+
+class InstrumentationTest(unittest.TestCase):
+    "test class for the instrumentation layer"
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled(self):
+        "nothing is recorded by default"
+        instrumentation.count('beams', 10)
+        with instrumentation.stage('cast'):
+            pass
+
+        self.assertEqual(instrumentation.snapshot(),
+                         {'counters': {}, 'stages': {}})
+
+    def test_counters_and_stages(self):
+        "counters add up and stages fill their histogram"
+        instrumentation.enable()
+        instrumentation.count('beams', 10)
+        instrumentation.count('beams')
+        instrumentation.observe('cast', 1500)
+        instrumentation.observe('cast', 2500)
+
+        snap = instrumentation.snapshot()
+
+        self.assertEqual(snap['counters'], {'beams': 11})
+        cast = snap['stages']['cast']
+        self.assertEqual(cast['count'], 2)
+        self.assertEqual(cast['total_ns'], 4000)
+        self.assertEqual(cast['buckets'][:3], [(1000, 0), (2000, 1), (4000, 2)])
+        self.assertEqual(cast['buckets'][-1], (float('inf'), 2))
+
+    def test_lidar_sample(self):
+        "both engines report beams, hits and stage timings"
+        instrumentation.enable()
+        for engine in LidarSimulator.ENGINES:
+            sim = LidarSimulator(default_dist=10.0, nb_samples=20, engine=engine)
+            sim.lidar_sample(RobotState(1.5, 1.0, 0.0), WALLS, noise_sigma=0.01)
+
+        snap = instrumentation.snapshot()
+
+        self.assertEqual(snap['counters']['lidar.beams'], 40)
+        self.assertEqual(snap['counters']['lidar.hits'], 40)
+        self.assertEqual(snap['counters']['lidar.primitive_tests'], 160)
+        self.assertEqual(snap['stages']['lidar.scan']['count'], 2)
+        self.assertEqual(snap['stages']['lidar.intersect']['count'], 2)
+        self.assertEqual(snap['stages']['lidar.noise']['count'], 2)
+        self.assertEqual(snap['stages']['lidar.rays']['count'], 1)
+
+    def test_primitive_tests(self):
+        "ray casters count the primitive tests they actually run"
+        state = RobotState(5.0, 5.0, 0.0)
+        environment = random_environment(200, size=10.0, seed=3)
+        scene = Scene(environment)
+        nb_tests = 20 * len(environment)
+
+        def primitive_tests(environment, engine='numpy'):
+            sim = LidarSimulator(default_dist=10.0, nb_samples=20,
+                                 engine=engine)
+            instrumentation.reset()
+            instrumentation.enable()
+            sim.lidar_sample(state, environment)
+            instrumentation.disable()
+            return instrumentation.snapshot()['counters'].get(
+                'lidar.primitive_tests', 0)
+
+        self.assertEqual(primitive_tests(scene), nb_tests)
+        self.assertEqual(primitive_tests(environment, 'python'), nb_tests)
+        # the grid only tests the elements along the beams
+        self.assertTrue(0 < primitive_tests(UniformGrid(scene)) < nb_tests)
+        # sphere tracing tests no primitives at all
+        self.assertEqual(primitive_tests(DistanceField.build(scene, 0.05)), 0)
+
+    def test_prometheus_text(self):
+        "exposition format of counters and histograms"
+        instrumentation.enable()
+        quadratic_regression(None, np.arange(5.0), np.arange(5.0))
+
+        text = instrumentation.prometheus_text()
+
+        self.assertIn("# TYPE linda_regression_samples_total counter\n"
+                      "linda_regression_samples_total 5\n", text)
+        self.assertIn("# TYPE linda_stage_seconds histogram", text)
+        self.assertIn('linda_stage_seconds_bucket{stage="regression.solve",'
+                      'le="+Inf"} 1', text)
+        self.assertIn('linda_stage_seconds_count{stage="regression.design"} 1',
+                      text)
+
+
+if __name__ == "__main__":
+    unittest.main()
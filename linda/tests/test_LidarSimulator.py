@@ -0,0 +1,149 @@
+"unit tests for the lidar simulator"
+
+import unittest
+from math import pi
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Ray import Ray
+from linda.Circle import Circle
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.UniformGrid import UniformGrid
+from linda.tests.fixtures import WALLS, CIRCLES, random_states
+
+class LidarSimulatorTest(unittest.TestCase):
+    "test class for the lidar simulator"
+
+    def test_unknown_engine(self):
+        "unknown engines are rejected"
+        with self.assertRaises(ValueError):
+            LidarSimulator(engine='quantum')
+
+    def test_closed_room(self):
+        "every beam hits a wall of a closed room"
+        sim = LidarSimulator(default_dist=10.0, nb_samples=8)
+        _, ranges = sim.lidar_sample(RobotState(1.5, 1.0, 0.0), WALLS)
+
+        self.assertTrue(np.all(ranges < 10.0))
+        # beam 3 points straight ahead
+        self.assertAlmostEqual(ranges[3], 1.5)
+
+    def test_empty_environment(self):
+        "no obstacles means every beam returns default_dist"
+        sim = LidarSimulator(default_dist=4.0, nb_samples=10, engine='numpy')
+        angles, ranges = sim.lidar_sample(RobotState(0.0, 0.0, 0.0), [])
+
+        self.assertEqual(angles.size, 10)
+        np.testing.assert_allclose(ranges, 4.0)
+
+    def test_engines_agree(self):
+        "the numpy engine reproduces the python engine"
+        state = RobotState(1.2, 0.8, 0.3)
+        env = WALLS + CIRCLES
+
+        python_sim = LidarSimulator(default_dist=3.0, nb_samples=360)
+        numpy_sim = LidarSimulator(default_dist=3.0, nb_samples=360,
+                                   engine='numpy')
+
+        py_angles, py_ranges = python_sim.lidar_sample(state, env)
+        np_angles, np_ranges = numpy_sim.lidar_sample(state, env)
+
+        np.testing.assert_array_equal(py_angles, np_angles)
+        np.testing.assert_allclose(py_ranges, np_ranges, rtol=1e-9, atol=1e-9)
+
+    def test_engines_agree_outside(self):
+        "engines agree for a robot outside of the room with narrow cutoff"
+        state = RobotState(-1.0, 1.0, 0.1)
+        env = WALLS + CIRCLES
+
+        python_sim = LidarSimulator(nb_samples=50, angular_cutoff=pi/4)
+        numpy_sim = LidarSimulator(nb_samples=50, angular_cutoff=pi/4,
+                                   engine='numpy')
+
+        _, py_ranges = python_sim.lidar_sample(state, env)
+        _, np_ranges = numpy_sim.lidar_sample(state, env)
+
+        np.testing.assert_allclose(py_ranges, np_ranges, rtol=1e-9, atol=1e-9)
+
+    def test_grazing_circle(self):
+        "a ray passing just outside a circle misses in every engine \
+        (the discriminant is slightly negative but below EPSILON)"
+        circle = Circle(Vec2D(2.0, 1.0), 0.2)
+        state = RobotState(0.0, 1.2 + 3e-5, 0.0)
+        ray = Ray(Vec2D(state.x, state.y), Vec2D(1.0, 0.0))
+
+        self.assertEqual(circle.intersect_ray(ray), [])
+        self.assertTrue(circle.closest_hit(ray) is None)
+
+        for engine in LidarSimulator.ENGINES:
+            sim = LidarSimulator(default_dist=5.0, nb_samples=4, engine=engine)
+            for env in ([circle], UniformGrid([circle], 0.25)):
+                _, ranges = sim.lidar_sample(state, env)
+                # beam 1 points straight ahead
+                self.assertEqual(ranges[1], 5.0)
+
+    def test_batch_matches_single(self):
+        "batched scans are identical to one lidar_sample per pose"
+        env = WALLS + CIRCLES
+        states = random_states(50, 1)
+
+        for engine in LidarSimulator.ENGINES:
+            sim = LidarSimulator(default_dist=3.0, nb_samples=90, engine=engine)
+            batch = sim.lidar_sample_batch(states, env)
+
+            self.assertEqual(batch.shape, (50, 90))
+            for row, state in zip(batch, states):
+                _, ranges = sim.lidar_sample(RobotState(*state), env)
+                np.testing.assert_array_equal(row, ranges)
+
+    def test_batch_chunking(self):
+        "chunk size does not change the result"
+        sim = LidarSimulator(nb_samples=30, engine='numpy')
+        states = [RobotState(0.5 + 0.1 * i, 1.0, 0.2 * i) for i in range(7)]
+
+        full = sim.lidar_sample_batch(states, WALLS + CIRCLES)
+        chunked = sim.lidar_sample_batch(states, WALLS + CIRCLES, chunk_size=3)
+
+        np.testing.assert_array_equal(full, chunked)
+
+    def test_sparse_subset(self):
+        "sparse scans are subsets of the full scan"
+        for engine in LidarSimulator.ENGINES:
+            sim = LidarSimulator(nb_samples=90, engine=engine)
+            state = RobotState(1.2, 0.8, 0.3)
+            angles, ranges = sim.lidar_sample(state, WALLS + CIRCLES)
+
+            beams = sim.sparse_beams(12)
+            sparse_angles, sparse_ranges = sim.lidar_sample_sparse(
+                state, WALLS + CIRCLES, beams)
+
+            self.assertEqual(beams.size, 12)
+            np.testing.assert_allclose(sparse_angles, angles[beams])
+            np.testing.assert_allclose(sparse_ranges, ranges[beams])
+
+    def test_adaptive(self):
+        "adaptive scans cast fewer beams and refine range jumps"
+        for engine in LidarSimulator.ENGINES:
+            sim = LidarSimulator(nb_samples=360, engine=engine)
+            state = RobotState(1.2, 0.8, 0.3)
+            angles, ranges = sim.lidar_sample(state, WALLS + CIRCLES)
+
+            adaptive_angles, adaptive_ranges = sim.lidar_sample_adaptive(
+                state, WALLS + CIRCLES, coarse_stride=8)
+
+            self.assertLess(adaptive_angles.size, angles.size // 2)
+            beams = np.searchsorted(angles, adaptive_angles)
+            np.testing.assert_allclose(adaptive_angles, angles[beams])
+            np.testing.assert_allclose(adaptive_ranges, ranges[beams])
+            # neighbours left apart only differ a little
+            gaps = np.diff(beams) > 1
+            jumps = np.abs(np.diff(adaptive_ranges))[gaps]
+            limits = 0.05 + 0.05 * np.minimum(adaptive_ranges[:-1],
+                                              adaptive_ranges[1:])[gaps]
+            self.assertTrue(np.all(jumps <= limits))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -45,5 +45,38 @@ class LineSegmentTest(unittest.TestCase):
         self.assertTrue(seg0.is_equal(seg1))
         self.assertTrue(seg1.is_equal(seg0))
 
+    def test_direction_and_length(self):
+
+        seg = LineSegment(Vec2D(1, 1), Vec2D(4, 5))
+
+        self.assertTrue(seg.direction.is_equal(Vec2D(3, 4)))
+        self.assertAlmostEqual(seg.length(), 5.0)
+
+    def test_cache_invalidation(self):
+
+        seg = LineSegment(Vec2D(), Vec2D(1, 0))
+        self.assertAlmostEqual(seg.length(), 1.0)
+
+        seg.end = Vec2D(0, 2)
+
+        self.assertTrue(seg.direction.is_equal(Vec2D(0, 2)))
+        self.assertAlmostEqual(seg.length(), 2.0)
+
+        seg.start = Vec2D(0, 4)
+
+        self.assertAlmostEqual(seg.length(), 2.0)
+        ray = Ray(Vec2D(-1, 3), Vec2D(1, 0))
+        self.assertTrue(seg.intersect_ray(ray)[0].is_equal(Vec2D(0, 3)))
+
+    def test_closest_hit(self):
+
+        ray = Ray(Vec2D(), Vec2D(1, 0))
+        seg = LineSegment(Vec2D(4, -2), Vec2D(4, 2))
+
+        self.assertAlmostEqual(seg.closest_hit(ray), 4.0)
+        self.assertTrue(seg.closest_hit(ray, 3.5) is None)
+        self.assertTrue(seg.closest_hit(Ray(Vec2D(), Vec2D(-1, 0))) is None)
+        self.assertTrue(seg.closest_hit(Ray(Vec2D(), Vec2D(0, 1))) is None)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,144 @@
+"unit tests for map files and the compiled map cache"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Polyline import Polyline
+from linda.Polygon import Polygon
+from linda.Scene import Scene
+from linda.UniformGrid import UniformGrid
+from linda.MapFile import load_map, save_map, load_scene, _write_cache
+from linda.tests.fixtures import WALLS, CIRCLES
+
+ROOM = WALLS + CIRCLES
+
+class MapFileTest(unittest.TestCase):
+    "test class for map files"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.map_path = os.path.join(self.tmp_dir, 'room.json')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        save_map(self.map_path, ROOM)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def cache_files(self):
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_round_trip(self):
+        "saved maps load back the same elements"
+        for elem, ref in zip(load_map(self.map_path), ROOM):
+            self.assertTrue(elem.is_equal(ref))
+
+    def test_scene(self):
+        "compiled scenes equal scenes of the element list"
+        ref = Scene(ROOM)
+        for _ in range(2):
+            scene = load_scene(self.map_path, cache_dir=self.cache_dir)
+            np.testing.assert_array_equal(scene.seg_starts, ref.seg_starts)
+            np.testing.assert_array_equal(scene.seg_ends, ref.seg_ends)
+            np.testing.assert_array_equal(scene.circle_centers,
+                                          ref.circle_centers)
+            np.testing.assert_array_equal(scene.circle_radii, ref.circle_radii)
+        self.assertEqual(len(self.cache_files()), 1)
+
+    def test_polygons(self):
+        "polylines and polygons survive the round trip and the cache"
+        shelf = Polyline([Vec2D(0.5, 0.5), Vec2D(1.0, 0.8), Vec2D(1.5, 0.5)])
+        box = Polygon([Vec2D(2.2, 1.5), Vec2D(2.6, 1.5), Vec2D(2.6, 1.8)])
+        save_map(self.map_path, ROOM + [shelf, box])
+
+        elements = load_map(self.map_path)
+        self.assertTrue(elements[-2].is_equal(shelf))
+        self.assertTrue(elements[-1].is_equal(box))
+
+        ref = Scene(ROOM + [shelf, box])
+        for _ in range(2):
+            scene = load_scene(self.map_path, cache_dir=self.cache_dir)
+            self.assertEqual(scene.nb_segments, 4 + 2 + 3)
+            np.testing.assert_array_equal(scene.seg_starts, ref.seg_starts)
+            np.testing.assert_array_equal(scene.seg_ends, ref.seg_ends)
+
+    def test_grid(self):
+        "cached grids cast the same rays as freshly built ones"
+        ref = UniformGrid(ROOM, 0.25)
+        origins = np.tile([1.2, 0.8], (64, 1))
+        angles = np.linspace(-np.pi, np.pi, 64, endpoint=False)
+        directions = np.column_stack((np.cos(angles), np.sin(angles)))
+
+        load_scene(self.map_path, grid=True, cell_size=0.25,
+                   cache_dir=self.cache_dir)
+        grid = load_scene(self.map_path, grid=True, cell_size=0.25,
+                          cache_dir=self.cache_dir)
+
+        self.assertIsInstance(grid, UniformGrid)
+        np.testing.assert_array_equal(grid.cell_items, ref.cell_items)
+        np.testing.assert_array_equal(
+            grid.cast_rays(origins, directions, 10.0),
+            ref.cast_rays(origins, directions, 10.0))
+
+    def test_content_key(self):
+        "changed maps and grid settings get their own cache entries"
+        load_scene(self.map_path, cache_dir=self.cache_dir)
+        load_scene(self.map_path, grid=True, cache_dir=self.cache_dir)
+        save_map(self.map_path, ROOM[:4])
+        scene = load_scene(self.map_path, cache_dir=self.cache_dir)
+
+        self.assertEqual(scene.nb_circles, 0)
+        self.assertEqual(len(self.cache_files()), 3)
+
+    def test_corrupt_cache(self):
+        "unreadable cache entries are rebuilt"
+        load_scene(self.map_path, cache_dir=self.cache_dir)
+        cache_path = os.path.join(self.cache_dir, self.cache_files()[0])
+        with open(cache_path, 'wb') as dst:
+            dst.write(b'garbage')
+
+        scene = load_scene(self.map_path, cache_dir=self.cache_dir)
+
+        self.assertEqual(len(scene), len(ROOM))
+
+    def test_truncated_cache(self):
+        "cut off and incomplete cache entries are rebuilt"
+        for grid in (False, True):
+            load_scene(self.map_path, grid=grid, cache_dir=self.cache_dir)
+            cache_path = os.path.join(self.cache_dir, self.cache_files()[0])
+            with open(cache_path, 'rb') as src:
+                content = src.read()
+
+            # a zip archive without its central directory
+            with open(cache_path, 'wb') as dst:
+                dst.write(content[:len(content) // 2])
+            scene = load_scene(self.map_path, grid=grid,
+                               cache_dir=self.cache_dir)
+            self.assertEqual(len(list(scene)), len(ROOM))
+
+            # a valid archive missing most of the arrays
+            np.savez(cache_path, seg_starts=np.zeros((0, 2)))
+            scene = load_scene(self.map_path, grid=grid,
+                               cache_dir=self.cache_dir)
+            self.assertEqual(len(list(scene)), len(ROOM))
+
+            shutil.rmtree(self.cache_dir)
+
+    def test_failed_cache_write(self):
+        "the temporary file of a failed cache write is removed"
+        scene = Scene(ROOM)
+        # object arrays of unpicklable values make np.savez fail
+        scene.circle_radii = np.array([lambda: 0.1], dtype=object)
+        os.makedirs(self.cache_dir)
+
+        with self.assertRaises(Exception):
+            _write_cache(os.path.join(self.cache_dir, 'room.npz'), scene)
+        self.assertEqual(self.cache_files(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
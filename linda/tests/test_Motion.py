@@ -0,0 +1,65 @@
+"unit tests for robot kinematics and motion scripts"
+
+import unittest
+from math import pi
+
+import numpy as np
+
+from linda.RobotState import RobotState
+from linda.Motion import (advance_robot, rotate_robot, parse_motion_script,
+                          motion_trajectory)
+
+SCRIPT = [
+    "# drive a square",
+    "advance 0.01 50",
+    "rotate 0.1 3  # turn a bit",
+    "",
+    "advance -0.02 20",
+    "rotate -1.5",
+]
+
+class MotionTest(unittest.TestCase):
+    "test class for motion"
+
+    def test_kinematics(self):
+        "advance along the heading and rotate in place"
+        state = advance_robot(RobotState(1.0, 1.0, pi / 2), 0.5)
+        self.assertAlmostEqual(state.x, 1.0)
+        self.assertAlmostEqual(state.y, 1.5)
+
+        state = rotate_robot(state, 0.25)
+        self.assertEqual(state, RobotState(state.x, state.y, pi / 2 + 0.25))
+
+    def test_parse(self):
+        "commands, amounts and repeat counts"
+        self.assertEqual(parse_motion_script(SCRIPT),
+                         [('advance', 0.01, 50), ('rotate', 0.1, 3),
+                          ('advance', -0.02, 20), ('rotate', -1.5, 1)])
+
+    def test_parse_errors(self):
+        "unknown commands and malformed lines are rejected"
+        with self.assertRaises(ValueError):
+            parse_motion_script(["jump 1.0"])
+        with self.assertRaises(ValueError):
+            parse_motion_script(["advance"])
+
+    def test_trajectory(self):
+        "the trajectory equals applying every step one by one"
+        steps = parse_motion_script(SCRIPT)
+        state = RobotState(0.5, 1.0, 0.2)
+        expected = [state]
+        for command, amount, repeat in steps:
+            for _ in range(repeat):
+                if command == 'advance':
+                    state = advance_robot(state, amount)
+                else:
+                    state = rotate_robot(state, amount)
+                expected.append(state)
+
+        trajectory = motion_trajectory((0.5, 1.0, 0.2), steps)
+
+        np.testing.assert_array_equal(trajectory, np.array(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"unit tests for the process pool simulator"
+
+import unittest
+
+import numpy as np
+
+from linda.LidarSimulator import LidarSimulator
+from linda.UniformGrid import UniformGrid
+from linda.DistanceField import DistanceField
+from linda.ParallelSimulator import ParallelSimulator
+from linda.tests.fixtures import ROOM, random_states
+
+class ParallelSimulatorTest(unittest.TestCase):
+    "test class for the parallel simulator"
+
+    def test_matches_serial(self):
+        "parallel scans are identical to the serial batch"
+        sim = LidarSimulator(default_dist=5.0, nb_samples=60, engine='numpy')
+        states = random_states(101, 0)
+
+        serial = sim.lidar_sample_batch(states, ROOM)
+
+        with ParallelSimulator(sim, ROOM, workers=2) as parallel:
+            out = np.zeros_like(serial)
+            res = parallel.lidar_sample_batch(states, out=out, chunk_size=7)
+
+            self.assertTrue(res is out)
+            np.testing.assert_array_equal(out, serial)
+            # results pass through a few chunk sized slots, not a second
+            # batch sized buffer
+            self.assertEqual(parallel._ranges_capacity, 2 * 2 * 7 * 60)
+
+            # buffers grow for larger batches
+            more = random_states(250, 1)
+            np.testing.assert_array_equal(
+                parallel.lidar_sample_batch(more),
+                sim.lidar_sample_batch(more, ROOM))
+
+    def test_empty_batch(self):
+        "no poses give an empty range matrix"
+        sim = LidarSimulator(nb_samples=10, engine='numpy')
+
+        with ParallelSimulator(sim, ROOM, workers=2) as parallel:
+            self.assertEqual(parallel.lidar_sample_batch(np.empty((0, 3))).shape,
+                             (0, 10))
+
+    def test_grid_environment(self):
+        "workers rebuild the spatial index from the shared scene"
+        sim = LidarSimulator(nb_samples=45, engine='numpy')
+        states = random_states(20, 2)
+
+        with ParallelSimulator(sim, UniformGrid(ROOM), workers=2) as parallel:
+            np.testing.assert_array_equal(parallel.lidar_sample_batch(states),
+                                          sim.lidar_sample_batch(states, ROOM))
+
+    def test_distance_field(self):
+        "workers sphere trace the shared field array"
+        sim = LidarSimulator(nb_samples=45, engine='numpy')
+        states = random_states(20, 3)
+        field = DistanceField.build(ROOM, 0.02)
+
+        with ParallelSimulator(sim, field, workers=2) as parallel:
+            np.testing.assert_array_equal(parallel.lidar_sample_batch(states),
+                                          sim.lidar_sample_batch(states, field))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"unit tests for the particle filter"
+
+import unittest
+
+import numpy as np
+
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.Scene import Scene
+from linda.ParticleFilter import ParticleFilter
+from linda.tests.fixtures import ROOM
+
+SCENE = Scene(ROOM)
+
+class ParticleFilterTest(unittest.TestCase):
+    "test class for the particle filter"
+
+    def setUp(self):
+        self.sim = LidarSimulator(default_dist=5.0, nb_samples=36,
+                                  engine='numpy')
+
+    def test_predict(self):
+        "particles move like advance_robot followed by rotate_robot"
+        pf = ParticleFilter(self.sim, SCENE, [[1.0, 1.0, 0.0],
+                                             [1.0, 1.0, np.pi / 2]])
+        pf.predict(0.5, 0.1)
+
+        np.testing.assert_allclose(pf.particles,
+                                   [[1.5, 1.0, 0.1], [1.0, 1.5, np.pi / 2 + 0.1]],
+                                   atol=1e-12)
+
+    def test_update_prefers_true_pose(self):
+        "the particle at the true pose gets the largest weight"
+        true_state = RobotState(1.0, 0.7, 0.5)
+        _, ranges = self.sim.lidar_sample(true_state, SCENE)
+
+        pf = ParticleFilter(self.sim, SCENE, [[1.2, 0.7, 0.5], true_state,
+                                             [1.0, 0.7, 0.9]])
+        pf.update(ranges)
+
+        self.assertEqual(np.argmax(pf.weights), 1)
+        self.assertAlmostEqual(pf.weights.sum(), 1.0)
+
+    def test_systematic_resampling(self):
+        "resampling concentrates on the heavy particle"
+        pf = ParticleFilter(self.sim, SCENE, np.zeros((200, 3)), min_particles=10,
+                            rng=np.random.default_rng(0))
+        pf.particles[7] = [1.0, 1.0, 1.0]
+        pf.log_weights[:] = -50.0
+        pf.log_weights[7] = 0.0
+
+        pf.resample()
+
+        self.assertEqual(len(pf), 10)
+        np.testing.assert_allclose(pf.particles, [[1.0, 1.0, 1.0]] * 10)
+        self.assertAlmostEqual(pf.effective_sample_size(), 10.0)
+
+    def test_kld_adapts_particle_count(self):
+        "spread out particles keep more samples than concentrated ones"
+        rng = np.random.default_rng(1)
+        spread = ParticleFilter.around(self.sim, SCENE, (1.5, 1.0, 0.0),
+                                       (0.5, 0.5, 1.0), 2000, rng=rng,
+                                       min_particles=50)
+        # centered in a single (0.1, 0.1, 0.1) bin
+        narrow = ParticleFilter.around(self.sim, SCENE, (1.55, 1.05, 0.05),
+                                       (0.01, 0.01, 0.01), 2000, rng=rng,
+                                       min_particles=50)
+        spread.resample()
+        narrow.resample()
+
+        self.assertTrue(len(narrow) < len(spread))
+        self.assertEqual(len(narrow), 50)
+
+    def test_localization(self):
+        "the filter tracks a moving robot"
+        rng = np.random.default_rng(2)
+        state = RobotState(0.8, 0.6, 0.3)
+        pf = ParticleFilter.around(self.sim, SCENE, (0.9, 0.5, 0.2),
+                                   (0.15, 0.15, 0.15), 1000, rng=rng,
+                                   min_particles=200)
+
+        for _ in range(8):
+            state = RobotState(state.x + 0.05 * np.cos(state.theta),
+                               state.y + 0.05 * np.sin(state.theta),
+                               state.theta + 0.1)
+            pf.predict(0.05, 0.1, 0.01, 0.02)
+            _, ranges = self.sim.lidar_sample(state, SCENE)
+            pf.update(ranges)
+            pf.resample()
+
+        estimate = pf.estimate()
+        self.assertAlmostEqual(estimate.x, state.x, delta=0.05)
+        self.assertAlmostEqual(estimate.y, state.y, delta=0.05)
+        self.assertAlmostEqual(estimate.theta, state.theta, delta=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"unit tests for Polygon class"
+
+import unittest
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Ray import Ray
+from linda.Polyline import Polyline
+from linda.Polygon import Polygon
+
+SQUARE = [Vec2D(0, 0), Vec2D(2, 0), Vec2D(2, 2), Vec2D(0, 2)]
+
+# U shaped rack, the notch (1, 1) - (2, 3) is outside
+RACK = [Vec2D(0, 0), Vec2D(3, 0), Vec2D(3, 3), Vec2D(2, 3), Vec2D(2, 1),
+        Vec2D(1, 1), Vec2D(1, 3), Vec2D(0, 3)]
+
+class PolygonTest(unittest.TestCase):
+    "test class for polygons"
+
+    def test_closed(self):
+        "the last vertex is connected to the first"
+        square = Polygon(SQUARE)
+
+        self.assertEqual(square.nb_edges, 4)
+        self.assertTrue(square.edges()[3].start.is_equal(SQUARE[3]))
+        self.assertTrue(square.edges()[3].end.is_equal(SQUARE[0]))
+
+    def test_too_few_vertices(self):
+        "a polygon needs at least three vertices"
+        with self.assertRaises(ValueError):
+            Polygon(SQUARE[:2])
+
+    def test_signed_area(self):
+        "area is positive for positively oriented vertices"
+        self.assertAlmostEqual(Polygon(SQUARE).signed_area(), 4.0)
+        self.assertAlmostEqual(Polygon(SQUARE[::-1]).signed_area(), -4.0)
+        self.assertAlmostEqual(Polygon(RACK).signed_area(), 7.0)
+
+        orientation = Vec2D.orientation(*SQUARE[:3])
+        self.assertTrue(orientation > 0)
+
+    def test_intersection_from_inside(self):
+        "rays starting inside hit the closing edge too"
+        ray = Ray(Vec2D(1, 1), Vec2D(-1, 0))
+
+        res = Polygon(SQUARE).intersect_ray(ray)
+
+        self.assertEqual(len(res), 1)
+        self.assertTrue(res[0].is_equal(Vec2D(0, 1)))
+
+    def test_closest_hit(self):
+        "closest hit through the notch of the rack"
+        rack = Polygon(RACK)
+
+        self.assertAlmostEqual(rack.closest_hit(Ray(Vec2D(1.5, 4),
+                                                    Vec2D(0, -1))), 3.0)
+        self.assertAlmostEqual(rack.closest_hit(Ray(Vec2D(-1, 2),
+                                                    Vec2D(1, 0))), 1.0)
+        self.assertTrue(rack.closest_hit(Ray(Vec2D(-1, 4),
+                                             Vec2D(1, 0))) is None)
+
+    def test_contains_point(self):
+        "point in polygon for a non convex polygon"
+        rack = Polygon(RACK)
+
+        self.assertTrue(rack.contains_point(Vec2D(0.5, 2.5)))
+        self.assertTrue(rack.contains_point(Vec2D(1.5, 0.5)))
+        self.assertFalse(rack.contains_point(Vec2D(1.5, 2.0)))
+        self.assertFalse(rack.contains_point(Vec2D(4.0, 1.0)))
+        self.assertFalse(rack.contains_point(Vec2D(-0.5, 1.0)))
+
+    def test_contains_boundary(self):
+        "points on edges and vertices are contained"
+        rack = Polygon(RACK)
+
+        self.assertTrue(rack.contains_point(Vec2D(3.0, 1.5)))
+        self.assertTrue(rack.contains_point(Vec2D(1.5, 1.0)))
+        self.assertTrue(rack.contains_point(Vec2D(2.0, 3.0)))
+
+    def test_orientation_independent(self):
+        "both vertex orders give the same occupancy"
+        rng = np.random.default_rng(0)
+        points = rng.uniform(-0.5, 3.5, (200, 2))
+
+        np.testing.assert_array_equal(Polygon(RACK).contains_points(points),
+                                      Polygon(RACK[::-1]).contains_points(points))
+
+    def test_contains_points(self):
+        "vectorized test matches the single point test"
+        rack = Polygon(RACK)
+        rng = np.random.default_rng(1)
+        points = rng.uniform(-0.5, 3.5, (200, 2))
+
+        inside = rack.contains_points(points)
+
+        self.assertEqual(inside.shape, (200,))
+        for point, ref in zip(points.tolist(), inside.tolist()):
+            self.assertEqual(rack.contains_point(Vec2D(*point)), ref)
+        self.assertTrue(0 < np.count_nonzero(inside) < 200)
+
+    def test_equality(self):
+        "polygons and polylines through the same vertices differ"
+        self.assertTrue(Polygon(SQUARE).is_equal(Polygon(SQUARE)))
+        self.assertFalse(Polygon(SQUARE).is_equal(Polyline(SQUARE)))
+
+    def test_translation(self):
+        "translated polygons stay polygons"
+        moved = Polygon(SQUARE) + Vec2D(1, 1)
+
+        self.assertTrue(isinstance(moved, Polygon))
+        self.assertTrue(moved.contains_point(Vec2D(2.5, 2.5)))
+        self.assertFalse(moved.contains_point(Vec2D(0.5, 0.5)))
+
+
+if __name__ == "__main__":
+    unittest.main()
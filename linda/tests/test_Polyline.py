@@ -0,0 +1,120 @@
+"unit tests for Polyline class"
+
+import unittest
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Ray import Ray
+from linda.LineSegment import LineSegment
+from linda.Polyline import Polyline
+
+# zig zag shelf front: (0, 0) (1, 1) (2, 0) (3, 1)
+SHELF = [Vec2D(0, 0), Vec2D(1, 1), Vec2D(2, 0), Vec2D(3, 1)]
+
+class PolylineTest(unittest.TestCase):
+    "test class for polylines"
+
+    def test_constructor(self):
+        "vertices are stored as one read only (N, 2) array"
+        line = Polyline(SHELF)
+
+        self.assertEqual(line.vertices.shape, (4, 2))
+        self.assertEqual(line.nb_edges, 3)
+        self.assertFalse(line.vertices.flags.writeable)
+        self.assertTrue(Polyline(line.vertices).is_equal(line))
+        np.testing.assert_allclose(line.lower, [0.0, 0.0])
+        np.testing.assert_allclose(line.upper, [3.0, 1.0])
+
+    def test_too_few_vertices(self):
+        "a polyline needs at least one edge"
+        with self.assertRaises(ValueError):
+            Polyline([Vec2D(1, 1)])
+
+    def test_edges(self):
+        "edges connect consecutive vertices"
+        edges = Polyline(SHELF).edges()
+
+        self.assertEqual(len(edges), 3)
+        self.assertTrue(edges[1].is_equal(LineSegment(SHELF[1], SHELF[2])))
+
+    def test_intersection(self):
+        "all crossings are reported sorted along the ray"
+        ray = Ray(Vec2D(-1, 0.5), Vec2D(1, 0))
+
+        res = Polyline(SHELF).intersect_ray(ray)
+
+        self.assertEqual(len(res), 3)
+        for point, ref_x in zip(res, (0.5, 1.5, 2.5)):
+            self.assertTrue(point.is_equal(Vec2D(ref_x, 0.5)))
+
+    def test_shared_vertex(self):
+        "a hit through a vertex between two edges is reported once"
+        ray = Ray(Vec2D(1, 2), Vec2D(0, -1))
+
+        res = Polyline(SHELF).intersect_ray(ray)
+
+        self.assertEqual(len(res), 1)
+        self.assertTrue(res[0].is_equal(Vec2D(1, 1)))
+
+    def test_not_intersecting(self):
+        "rays missing the bounding box have no hit"
+        line = Polyline(SHELF)
+        ray = Ray(Vec2D(-1, 0.5), Vec2D(-1, 0))
+
+        self.assertFalse(line.box_hit(ray))
+        self.assertEqual(line.intersect_ray(ray), [])
+        self.assertTrue(line.closest_hit(ray) is None)
+
+    def test_box_hit_without_edge_hit(self):
+        "rays leaving the box between the edges have no hit"
+        line = Polyline(SHELF)
+        ray = Ray(Vec2D(2, 0.5), Vec2D(0, 1))
+
+        self.assertTrue(line.box_hit(ray))
+        self.assertEqual(line.intersect_ray(ray), [])
+
+    def test_closest_hit(self):
+        "closest hit equals the closest hit of the edge segments"
+        line = Polyline(SHELF)
+        for angle in np.linspace(-np.pi, np.pi, 37):
+            ray = Ray(Vec2D(1.5, -0.5), Vec2D(1, 0).rotate(angle))
+            hits = [edge.closest_hit(ray) for edge in line.edges()]
+            hits = [hit for hit in hits if hit is not None]
+
+            res = line.closest_hit(ray)
+
+            if hits:
+                self.assertAlmostEqual(res, min(hits))
+            else:
+                self.assertTrue(res is None)
+
+    def test_closest_hit_max_dist(self):
+        "hits beyond max_dist are ignored"
+        ray = Ray(Vec2D(-1, 0.5), Vec2D(1, 0))
+        line = Polyline(SHELF)
+
+        self.assertAlmostEqual(line.closest_hit(ray, 2.0), 1.5)
+        self.assertTrue(line.closest_hit(ray, 1.0) is None)
+        self.assertTrue(line.closest_hit(ray, 0.5) is None)
+
+    def test_translation(self):
+        "adding a vector moves all vertices"
+        moved = Polyline(SHELF) + Vec2D(1, 2)
+
+        self.assertTrue(isinstance(moved, Polyline))
+        np.testing.assert_allclose(moved.vertices[0], [1.0, 2.0])
+        np.testing.assert_allclose(moved.upper, [4.0, 3.0])
+
+    def test_equality(self):
+        "polylines are equal if they have the same vertex sequence"
+        line = Polyline(SHELF)
+
+        self.assertTrue(line.is_equal(Polyline(SHELF)))
+        self.assertFalse(line.is_equal(Polyline(SHELF[::-1])))
+        self.assertFalse(line.is_equal(Polyline(SHELF[:3])))
+        self.assertFalse(line.is_equal(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,8 @@
 import unittest
 import numpy as np
 
-from linda.QuadraticRegression import quadratic_regression, Gaussian
+from linda.QuadraticRegression import quadratic_regression, Gaussian, \
+        RecursiveQuadraticRegression, windowed_quadratic_regression
 
 class QuadraticRegressionTest(unittest.TestCase):
 
@@ -36,6 +37,98 @@ class QuadraticRegressionTest(unittest.TestCase):
 
         np.testing.assert_allclose(posterior.mean, true_mean, rtol=1e-5, atol=1e-5)
 
+    def test_recursive_matches_batch(self):
+
+        x_vals = np.linspace(-2.0, 2.0, 300)
+        y_vals = 0.5 * x_vals * x_vals - x_vals + 2.0 + 0.01 * np.sin(7 * x_vals)
+
+        prior = Gaussian(np.array([1.0, 0.0, 0.0]), 0.1 * np.eye(3))
+
+        reference = quadratic_regression(prior, x_vals, y_vals)
+
+        regression = RecursiveQuadraticRegression(prior)
+        regression.update_batch(x_vals[:100], y_vals[:100])
+        for x_val, y_val in zip(x_vals[100:150], y_vals[100:150]):
+            regression.update(x_val, y_val)
+        regression.update_batch(x_vals[150:], y_vals[150:])
+
+        posterior = regression.posterior()
+
+        self.assertEqual(regression.nb_samples, 300)
+        np.testing.assert_allclose(posterior.mean, reference.mean, rtol=1e-8)
+        np.testing.assert_allclose(posterior.cov, reference.cov, atol=1e-9)
+
+    def test_forgetting_batch_matches_single(self):
+
+        x_vals = np.linspace(0.0, 1.0, 20)
+        y_vals = 3.0 * x_vals
+
+        single = RecursiveQuadraticRegression(forgetting=0.9)
+        for x_val, y_val in zip(x_vals, y_vals):
+            single.update(x_val, y_val)
+
+        batch = RecursiveQuadraticRegression(forgetting=0.9)
+        batch.update_batch(x_vals, y_vals)
+
+        np.testing.assert_allclose(batch.precision, single.precision, rtol=1e-10)
+        np.testing.assert_allclose(batch.information, single.information,
+                                   rtol=1e-10)
+
+    def test_forgetting_tracks_change(self):
+
+        x_vals = np.linspace(-1.0, 1.0, 50)
+
+        regression = RecursiveQuadraticRegression(forgetting=0.8)
+        regression.update_batch(x_vals, x_vals * x_vals)
+        for _ in range(10):
+            regression.update_batch(x_vals, 2.0 + x_vals)
+
+        np.testing.assert_allclose(regression.posterior().mean,
+                                   [2.0, 1.0, 0.0], atol=1e-5)
+
+    def test_invalid_forgetting(self):
+
+        with self.assertRaises(ValueError):
+            RecursiveQuadraticRegression(forgetting=0.0)
+
+    def test_windowed_matches_single(self):
+
+        x_vals = np.linspace(-np.pi, np.pi, 360)
+        y_vals = 1.0 + np.abs(np.sin(2 * x_vals))
+
+        prior = Gaussian(np.zeros(3), 1e-3 * np.eye(3))
+
+        posterior = windowed_quadratic_regression(prior, x_vals, y_vals,
+                                                  window_size=20, stride=7)
+
+        starts = range(0, 360 - 20 + 1, 7)
+        self.assertEqual(posterior.mean.shape, (len(starts), 3))
+        self.assertEqual(posterior.cov.shape, (len(starts), 3, 3))
+
+        for idx, start in enumerate(starts):
+            single = quadratic_regression(prior, x_vals[start:start + 20],
+                                          y_vals[start:start + 20])
+            np.testing.assert_allclose(posterior.mean[idx], single.mean,
+                                       rtol=1e-5, atol=1e-5)
+            np.testing.assert_allclose(posterior.cov[idx], single.cov,
+                                       rtol=1e-8, atol=1e-8)
+
+    def test_windowed_explicit_windows(self):
+
+        x_vals = np.linspace(-1.0, 1.0, 100)
+        y_vals = np.where(x_vals < 0, x_vals * x_vals, 2.0 - x_vals)
+
+        posterior = windowed_quadratic_regression(None, x_vals, y_vals,
+                                                  windows=[(0, 50), (50, 100)])
+
+        np.testing.assert_allclose(posterior.mean[0], [0.0, 0.0, 1.0], atol=1e-8)
+        np.testing.assert_allclose(posterior.mean[1], [2.0, -1.0, 0.0], atol=1e-8)
+
+    def test_windowed_requires_windows(self):
+
+        with self.assertRaises(ValueError):
+            windowed_quadratic_regression(None, [0.0, 1.0], [0.0, 1.0])
+
 
 if __name__ == "__main__":
     unittest.main()
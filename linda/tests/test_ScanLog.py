@@ -0,0 +1,130 @@
+"unit tests for the binary scan log"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.ScanLog import ScanLogWriter, ScanLogReader
+from linda.tests.fixtures import WALLS
+
+class ScanLogTest(unittest.TestCase):
+    "test class for scan logs"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'scans.lscan')
+        self.sim = LidarSimulator(default_dist=3.0, nb_samples=50)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        "written frames are read back in order"
+        states = [RobotState(1.0 + 0.1 * i, 1.0, 0.2 * i) for i in range(5)]
+
+        with ScanLogWriter.for_simulator(self.path, self.sim) as writer:
+            for idx, state in enumerate(states):
+                _, ranges = self.sim.lidar_sample(state, WALLS)
+                writer.write(1000.0 + idx * 0.025, state, ranges)
+
+        reader = ScanLogReader(self.path)
+
+        self.assertEqual(len(reader), 5)
+        self.assertEqual(reader.nb_beams, 50)
+        self.assertAlmostEqual(reader.default_dist, 3.0)
+        np.testing.assert_allclose(reader.angles, self.sim.beam_angles(0.0),
+                                   rtol=1e-6)
+
+        frame = reader[3]
+        _, ranges = self.sim.lidar_sample(states[3], WALLS)
+        self.assertEqual(frame.timestamp, 1000.075)
+        self.assertAlmostEqual(frame.state.x, states[3].x, places=6)
+        np.testing.assert_allclose(frame.ranges, ranges, rtol=1e-6)
+
+        self.assertTrue(isinstance(reader.frames, np.memmap))
+        self.assertEqual(reader.ranges.shape, (5, 50))
+
+    def test_append(self):
+        "reopening a log appends to it"
+        ranges = np.ones((2, 50))
+        states = np.zeros((2, 3))
+
+        with ScanLogWriter.for_simulator(self.path, self.sim) as writer:
+            writer.write_batch([0.0, 1.0], states, ranges)
+        with ScanLogWriter.for_simulator(self.path, self.sim) as writer:
+            writer.write_batch([2.0, 3.0], states, 2 * ranges)
+
+        reader = ScanLogReader(self.path)
+        np.testing.assert_array_equal(reader.timestamps, [0.0, 1.0, 2.0, 3.0])
+        np.testing.assert_array_equal(reader.ranges[:, 0], [1.0, 1.0, 2.0, 2.0])
+
+    def test_append_other_layout(self):
+        "appending scans with another beam layout is refused"
+        ScanLogWriter.for_simulator(self.path, self.sim).close()
+
+        with self.assertRaises(ValueError):
+            ScanLogWriter.for_simulator(self.path, LidarSimulator(nb_samples=10))
+
+    def test_partial_frame_ignored(self):
+        "a truncated last frame is not visible to the reader"
+        with ScanLogWriter.for_simulator(self.path, self.sim) as writer:
+            writer.write_batch([0.0, 1.0], np.zeros((2, 3)), np.ones((2, 50)))
+        with open(self.path, 'ab') as out:
+            out.write(b'\0' * 17)
+
+        self.assertEqual(len(ScanLogReader(self.path)), 2)
+
+    def test_append_after_partial_frame(self):
+        "appending drops a truncated last frame instead of misaligning \
+        the new frames"
+        ranges = np.ones((2, 50))
+        states = np.zeros((2, 3))
+
+        with ScanLogWriter.for_simulator(self.path, self.sim) as writer:
+            writer.write_batch([0.0, 1.0], states, ranges)
+        with open(self.path, 'ab') as out:
+            out.write(b'\xff' * 7)
+        with ScanLogWriter.for_simulator(self.path, self.sim) as writer:
+            writer.write_batch([2.0, 3.0], states, 2 * ranges)
+
+        reader = ScanLogReader(self.path)
+        np.testing.assert_array_equal(reader.timestamps, [0.0, 1.0, 2.0, 3.0])
+        np.testing.assert_array_equal(reader.ranges[:, -1], [1.0, 1.0, 2.0, 2.0])
+        self.assertEqual(os.path.getsize(self.path),
+                         reader.header_size + 4 * reader.dtype.itemsize)
+
+    def test_append_other_settings(self):
+        "appending scans with another cutoff or default_dist is refused"
+        ScanLogWriter.for_simulator(self.path, self.sim).close()
+
+        angles = self.sim.beam_angles(0.0)
+        for cutoff, default_dist in ((self.sim.angular_cutoff, 5.0),
+                                     (1.0, self.sim.default_dist)):
+            with self.assertRaises(ValueError):
+                ScanLogWriter(self.path, angles, cutoff, default_dist)
+
+    def test_empty_log(self):
+        "a log without frames can be read"
+        ScanLogWriter.for_simulator(self.path, self.sim).close()
+
+        reader = ScanLogReader(self.path)
+
+        self.assertEqual(len(reader), 0)
+        self.assertEqual(list(reader), [])
+
+    def test_not_a_log(self):
+        "other files are rejected"
+        with open(self.path, 'wb') as out:
+            out.write(b'\0' * 64)
+
+        with self.assertRaises(ValueError):
+            ScanLogReader(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
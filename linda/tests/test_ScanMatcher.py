@@ -0,0 +1,86 @@
+"unit tests for scan to map matching"
+
+import unittest
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.Scene import Scene
+from linda.ScanMatcher import ScanMatcher, nearest_points
+from linda.tests.fixtures import WALLS, PILLAR
+
+# a second circle large enough for a circle fit
+ROOM = WALLS + [PILLAR, Circle(Vec2D(0.6, 1.4), 0.15)]
+
+class ScanMatcherTest(unittest.TestCase):
+    "test class for the scan matcher"
+
+    def setUp(self):
+        self.sim = LidarSimulator(default_dist=5.0, nb_samples=360,
+                                  engine='numpy')
+        self.matcher = ScanMatcher(ROOM, default_dist=5.0)
+
+    def test_nearest_points(self):
+        "closest map points, normals and distances"
+        points = np.array([[1.0, 0.3], [2.0, 1.5], [-1.0, 1.0]])
+
+        closest, normals, dist = nearest_points(Scene(ROOM), points)
+
+        np.testing.assert_allclose(closest, [[1.0, 0.0], [2.0, 1.2], [0.0, 1.0]],
+                                   atol=1e-12)
+        np.testing.assert_allclose(dist, [0.3, 0.3, 1.0])
+        np.testing.assert_allclose(np.abs(normals), [[0, 1], [0, 1], [1, 0]],
+                                   atol=1e-12)
+
+    def test_nearest_points_chunked(self):
+        "chunking the points does not change the result"
+        rng = np.random.default_rng(4)
+        points = rng.uniform(-0.5, 3.5, (101, 2))
+        scene = Scene(ROOM)
+
+        full = nearest_points(scene, points)
+        for chunk_size in (1, 7, 100):
+            for res, ref in zip(nearest_points(scene, points, chunk_size), full):
+                np.testing.assert_array_equal(res, ref)
+
+    def test_recovers_pose(self):
+        "the true pose is found from a perturbed initial guess"
+        for true_state, guess in [
+                (RobotState(1.2, 0.8, 0.3), RobotState(1.3, 0.7, 0.4)),
+                (RobotState(2.5, 1.5, -2.0), RobotState(2.4, 1.6, -2.1)),
+                (RobotState(0.5, 0.5, 3.0), RobotState(0.6, 0.55, 2.9))]:
+            angles, ranges = self.sim.lidar_sample(true_state, ROOM)
+
+            res = self.matcher.match(angles, ranges, guess)
+
+            np.testing.assert_allclose(res.state, true_state, atol=1e-6)
+            self.assertTrue(res.error < 1e-6)
+
+    def test_noisy_scan(self):
+        "noisy scans are matched to within a centimeter"
+        np.random.seed(3)
+        true_state = RobotState(1.4, 1.1, 1.0)
+        angles, ranges = self.sim.lidar_sample(true_state, ROOM, noise_sigma=0.01)
+
+        res = self.matcher.match(angles, ranges, RobotState(1.5, 1.0, 1.1))
+
+        np.testing.assert_allclose(res.state, true_state, atol=1e-2)
+        self.assertTrue(res.error < 0.02)
+
+    def test_misses_ignored(self):
+        "beams returning default_dist are not used as points"
+        sim = LidarSimulator(default_dist=1.0, nb_samples=360, engine='numpy')
+        matcher = ScanMatcher(ROOM, default_dist=1.0)
+        true_state = RobotState(0.5, 0.6, 0.2)
+        angles, ranges = sim.lidar_sample(true_state, ROOM)
+
+        res = matcher.match(angles, ranges, RobotState(0.55, 0.65, 0.25))
+
+        np.testing.assert_allclose(res.state, true_state, atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"unit tests for streaming scan generation"
+
+import threading
+import unittest
+
+import numpy as np
+
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.ScanStream import scan_stream
+from linda.tests.fixtures import WALLS
+
+def trajectory(nb_states):
+    "lazily generated poses along a line"
+    for idx in range(nb_states):
+        yield RobotState(0.5 + 0.01 * idx, 1.0, 0.05 * idx)
+
+class ScanStreamTest(unittest.TestCase):
+    "test class for scan streams"
+
+    def setUp(self):
+        self.sim = LidarSimulator(nb_samples=40, engine='numpy')
+
+    def check_stream(self, **kwargs):
+        "streamed scans equal lidar_sample for every pose"
+        stream = scan_stream(self.sim, trajectory(53), WALLS, **kwargs)
+        count = 0
+        for state, (angles, ranges) in zip(trajectory(53), stream):
+            ref_angles, ref_ranges = self.sim.lidar_sample(state, WALLS)
+            np.testing.assert_array_equal(angles, ref_angles)
+            np.testing.assert_array_equal(ranges, ref_ranges)
+            count += 1
+        self.assertEqual(count, 53)
+
+    def test_synchronous(self):
+        "stream without producer thread"
+        self.check_stream(batch_size=8)
+
+    def test_prefetch(self):
+        "stream with a producer thread computing ahead"
+        self.check_stream(batch_size=5, ring_size=4, prefetch=2)
+
+    def test_buffers_are_reused(self):
+        "scans are views into a fixed ring of buffers"
+        bases = set()
+        for _, ranges in scan_stream(self.sim, trajectory(100), WALLS,
+                                     batch_size=4, ring_size=3):
+            bases.add(id(ranges.base))
+        self.assertEqual(len(bases), 1)
+
+    def test_early_close(self):
+        "abandoning a prefetching stream stops its producer"
+        before = set(threading.enumerate())
+        stream = scan_stream(self.sim, trajectory(1000), WALLS,
+                             batch_size=2, ring_size=3, prefetch=1)
+        next(stream)
+        producers = [thread for thread in threading.enumerate()
+                     if thread not in before and
+                     thread.name == 'scan_stream producer']
+        self.assertEqual(len(producers), 1)
+
+        stream.close()
+
+        producers[0].join(timeout=5.0)
+        self.assertFalse(producers[0].is_alive())
+
+    def test_invalid_ring(self):
+        "the ring must hold the prefetched batches"
+        with self.assertRaises(ValueError):
+            next(scan_stream(self.sim, trajectory(3), WALLS,
+                             ring_size=2, prefetch=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"unit tests for the compiled scene"
+
+import unittest
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+from linda.Polygon import Polygon
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.Scene import Scene, as_scene
+
+ENVIRONMENT = [
+    LineSegment(Vec2D(0.0, 0.0), Vec2D(3.0, 0.0)),
+    LineSegment(Vec2D(3.0, 0.0), Vec2D(3.0, 2.0)),
+    Circle(Vec2D(1.0, 1.0), 0.5),
+]
+
+class SceneTest(unittest.TestCase):
+    "test class for scenes"
+
+    def test_compile(self):
+        "elements are packed into contiguous float64 arrays"
+        scene = Scene(ENVIRONMENT)
+
+        self.assertEqual(scene.nb_segments, 2)
+        self.assertEqual(scene.nb_circles, 1)
+        self.assertEqual(len(scene), 3)
+        self.assertEqual(scene.seg_starts.dtype, np.float64)
+        self.assertTrue(scene.seg_ends.flags['C_CONTIGUOUS'])
+        np.testing.assert_allclose(scene.seg_ends[1], [3.0, 2.0])
+        np.testing.assert_allclose(scene.circle_centers, [[1.0, 1.0]])
+        np.testing.assert_allclose(scene.circle_radii, [0.5])
+
+    def test_compile_polygon(self):
+        "polygons are expanded into their edges after the segments"
+        square = Polygon([Vec2D(1, 1), Vec2D(2, 1), Vec2D(2, 2), Vec2D(1, 2)])
+        scene = Scene(ENVIRONMENT + [square])
+
+        self.assertEqual(scene.nb_segments, 6)
+        self.assertEqual(len(scene), 4)
+        self.assertEqual(len(list(scene)), len(scene))
+        np.testing.assert_allclose(scene.seg_starts[2:], square.edge_starts)
+        np.testing.assert_allclose(scene.seg_ends[5], [1.0, 1.0])
+        self.assertTrue(list(scene)[-1] is square)
+
+        state = RobotState(0.5, 1.5, 0.0)
+        for engine in LidarSimulator.ENGINES:
+            sim = LidarSimulator(nb_samples=90, engine=engine)
+            _, from_polygon = sim.lidar_sample(state, scene)
+            _, from_edges = sim.lidar_sample(state,
+                                             ENVIRONMENT + square.edges())
+            np.testing.assert_allclose(from_polygon, from_edges)
+
+    def test_empty_scene(self):
+        "an empty scene has empty arrays and no bounds"
+        scene = Scene()
+
+        self.assertEqual(scene.seg_starts.shape, (0, 2))
+        self.assertEqual(scene.circle_radii.shape, (0,))
+        self.assertTrue(scene.bounds() is None)
+
+    def test_unknown_element(self):
+        "only known primitives can be compiled"
+        with self.assertRaises(TypeError):
+            Scene([Vec2D()])
+
+    def test_version_counter(self):
+        "modifications increment the version"
+        scene = Scene(ENVIRONMENT)
+        self.assertEqual(scene.version, 0)
+
+        scene.add(Circle(Vec2D(2.0, 1.0), 0.1))
+
+        self.assertEqual(scene.version, 1)
+        self.assertEqual(scene.nb_circles, 2)
+
+    def test_bounds(self):
+        "bounds include circle extents"
+        lower, upper = Scene(ENVIRONMENT).bounds()
+
+        np.testing.assert_allclose(lower, [0.0, 0.0])
+        np.testing.assert_allclose(upper, [3.0, 2.0])
+
+    def test_from_arrays(self):
+        "scenes built from arrays materialize equivalent elements"
+        ref = Scene(ENVIRONMENT)
+        scene = Scene.from_arrays(ref.seg_starts, ref.seg_ends,
+                                  ref.circle_centers, ref.circle_radii)
+
+        elements = list(scene)
+
+        self.assertEqual(len(elements), 3)
+        for elem, ref_elem in zip(elements, ENVIRONMENT):
+            self.assertTrue(elem.is_equal(ref_elem))
+
+    def test_as_scene(self):
+        "as_scene does not recompile scenes"
+        scene = Scene(ENVIRONMENT)
+
+        self.assertTrue(as_scene(scene) is scene)
+        self.assertTrue(isinstance(as_scene(ENVIRONMENT), Scene))
+
+    def test_cast_rays(self):
+        "ray casting against the scene"
+        scene = Scene(ENVIRONMENT)
+        origins = np.array([[1.0, 1.0]])
+        directions = np.array([[1.0, 0.0], [0.0, -1.0], [-1.0, 0.0]])
+
+        ranges = scene.cast_rays(origins, directions, 10.0)
+
+        np.testing.assert_allclose(ranges, [0.5, 0.5, 0.5])
+
+        outside = scene.cast_rays(np.array([[-1.0, 1.0]]), directions, 10.0)
+        np.testing.assert_allclose(outside, [1.5, 10.0, 10.0])
+
+    def test_simulator_accepts_scene(self):
+        "both engines consume a compiled scene"
+        scene = Scene(ENVIRONMENT)
+        state = RobotState(1.5, 0.5, 0.2)
+
+        for engine in LidarSimulator.ENGINES:
+            sim = LidarSimulator(nb_samples=90, engine=engine)
+            _, from_scene = sim.lidar_sample(state, scene)
+            _, from_list = sim.lidar_sample(state, ENVIRONMENT)
+            np.testing.assert_allclose(from_scene, from_list)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"unit tests for the lidar sensor model"
+
+import unittest
+
+import numpy as np
+
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.ParticleFilter import ParticleFilter
+from linda.SensorModel import SensorModel
+from linda.ScanStream import scan_stream
+from linda.tests.fixtures import WALLS
+
+
+class SensorModelTest(unittest.TestCase):
+    "test class for the sensor model"
+
+    def test_ideal(self):
+        "without error sources ranges are unchanged"
+        ranges = np.array([0.5, 1.0, 2.5])
+        np.testing.assert_array_equal(SensorModel(5.0).apply(ranges), ranges)
+
+    def test_reproducible(self):
+        "the same seed gives the same measurements"
+        ranges = np.linspace(0.5, 4.0, 100)
+        first = SensorModel(5.0, sigma=0.01, dropout_prob=0.1, rng=7)
+        second = SensorModel(5.0, sigma=0.01, dropout_prob=0.1, rng=7)
+
+        np.testing.assert_array_equal(first.apply(ranges),
+                                      second.apply(ranges))
+
+    def test_range_dependent_noise(self):
+        "noise grows with the range"
+        model = SensorModel(100.0, sigma_ratio=0.01, rng=0)
+        ranges = np.repeat([[1.0], [50.0]], 10000, axis=1)
+
+        spread = np.std(model.apply(ranges) - ranges, axis=1)
+
+        np.testing.assert_allclose(spread, [0.01, 0.5], rtol=0.05)
+
+    def test_misses_and_dropouts(self):
+        "misses are reported as miss_value and dropouts as NaN"
+        ranges = np.array([1.0] * 1000 + [5.0] * 10)
+        model = SensorModel(5.0, dropout_prob=0.2, miss_value=np.inf, rng=1)
+
+        measured = model.apply(ranges)
+
+        self.assertTrue(0.15 < np.mean(np.isnan(measured)) < 0.25)
+        valid = ~np.isnan(measured)
+        np.testing.assert_array_equal(measured[:1000][valid[:1000]], 1.0)
+        self.assertTrue(np.all(np.isinf(measured[1000:][valid[1000:]])))
+
+    def test_short_reads_and_quantization(self):
+        "short reads are never longer and quantized values on the grid"
+        ranges = np.full(1000, 2.0)
+        model = SensorModel(5.0, short_prob=0.3, resolution=0.01, rng=2)
+
+        measured = model.apply(ranges)
+
+        self.assertTrue(np.all(measured <= 2.0))
+        self.assertTrue(0.25 < np.mean(measured < 2.0) < 0.35)
+        np.testing.assert_allclose(measured * 100, np.round(measured * 100),
+                                   atol=1e-9)
+
+    def test_angular_jitter(self):
+        "reported angles are jittered"
+        model = SensorModel(5.0, angular_sigma=0.01, rng=3)
+        angles = np.linspace(-1.0, 1.0, 1000)
+
+        jittered, _ = model.apply(np.ones(1000), angles)
+
+        self.assertAlmostEqual(np.std(jittered - angles), 0.01, delta=0.001)
+
+    def test_log_likelihood(self):
+        "the true scan is the most likely and NaN beams are ignored"
+        model = SensorModel(5.0, sigma=0.02)
+        expected = np.array([[1.0, 2.0, 3.0], [1.1, 2.0, 3.0], [1.5, 2.5, 3.5]])
+        ranges = np.array([1.0, 2.0, np.nan])
+
+        scores = model.log_likelihood(ranges, expected)
+
+        self.assertEqual(np.argmax(scores), 0)
+        self.assertTrue(scores[0] > scores[1] > scores[2])
+        self.assertAlmostEqual(scores[0], model.log_likelihood(
+            ranges[:2], expected[0, :2]))
+
+    def test_simulator(self):
+        "the simulator applies its sensor model to single and batch scans"
+        model = SensorModel(10.0, dropout_prob=1.0)
+        sim = LidarSimulator(nb_samples=16, engine='numpy', sensor_model=model)
+
+        _, ranges = sim.lidar_sample(RobotState(1.5, 1.0, 0.0), WALLS)
+        batch = sim.lidar_sample_batch([[1.5, 1.0, 0.0]], WALLS)
+
+        self.assertTrue(np.all(np.isnan(ranges)))
+        self.assertTrue(np.all(np.isnan(batch)))
+
+    def test_simulator_max_range(self):
+        "misses at default_dist stay misses, so the model cannot reach \
+        further than the simulator"
+        sim = LidarSimulator(default_dist=5.0, nb_samples=16, engine='numpy',
+                             sensor_model=SensorModel(4.0, miss_value=np.inf))
+        _, ranges = sim.lidar_sample(RobotState(1.5, 1.0, 0.0), [])
+        self.assertTrue(np.all(np.isinf(ranges)))
+
+        with self.assertRaises(ValueError):
+            LidarSimulator(default_dist=5.0, sensor_model=SensorModel(10.0))
+        with self.assertRaises(ValueError):
+            sim.sensor_model = SensorModel(6.0)
+
+    def test_simulator_noise_sigma(self):
+        "noise_sigma would turn misses into hits before the sensor model"
+        model = SensorModel(5.0)
+        sim = LidarSimulator(default_dist=5.0, nb_samples=16, engine='numpy',
+                             sensor_model=model)
+        state = RobotState(1.5, 1.0, 0.0)
+
+        with self.assertRaises(ValueError):
+            sim.lidar_sample(state, [], noise_sigma=0.1)
+        with self.assertRaises(ValueError):
+            sim.lidar_sample_batch([[1.5, 1.0, 0.0]], [], noise_sigma=0.1)
+        with self.assertRaises(ValueError):
+            sim.lidar_sample_sparse(state, [], [0, 8], noise_sigma=0.1)
+        with self.assertRaises(ValueError):
+            sim.lidar_sample_adaptive(state, [], noise_sigma=0.1)
+
+        _, ranges = sim.lidar_sample(state, [])
+        np.testing.assert_array_equal(ranges, 5.0)
+
+    def test_batch_angular_sigma(self):
+        "batch scans cannot jitter their fixed beam angles"
+        model = SensorModel(10.0, angular_sigma=0.01)
+        sim = LidarSimulator(nb_samples=16, engine='numpy', sensor_model=model)
+        states = [[1.5, 1.0, 0.0]]
+
+        with self.assertRaises(ValueError):
+            sim.lidar_sample_batch(states, WALLS)
+        with self.assertRaises(ValueError):
+            next(scan_stream(sim, states, WALLS))
+
+        angles, _ = sim.lidar_sample(RobotState(*states[0]), WALLS)
+        self.assertFalse(np.allclose(angles, sim.beam_angles(0.0)))
+
+    def test_particle_filter(self):
+        "particle filters predict ideal scans and score with the model"
+        model = SensorModel(10.0, sigma=0.02, dropout_prob=0.1, rng=4)
+        sim = LidarSimulator(nb_samples=60, engine='numpy', sensor_model=model)
+        state = RobotState(1.2, 0.7, 0.4)
+        _, ranges = sim.lidar_sample(state, WALLS)
+
+        pf = ParticleFilter(sim, WALLS, [state, (1.4, 0.7, 0.4)])
+        pf.update(ranges)
+
+        self.assertIs(pf.sensor_model, model)
+        self.assertIsNone(pf.simulator.sensor_model)
+        self.assertGreater(pf.weights[0], 0.99)
+
+
+if __name__ == "__main__":
+    unittest.main()
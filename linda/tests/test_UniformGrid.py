@@ -0,0 +1,81 @@
+"unit tests for the uniform grid spatial index"
+
+import unittest
+from math import pi
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Circle import Circle
+from linda.LineSegment import LineSegment
+from linda.RobotState import RobotState
+from linda.LidarSimulator import LidarSimulator
+from linda.Scene import Scene
+from linda.UniformGrid import UniformGrid
+from linda.tests.fixtures import random_environment
+
+class UniformGridTest(unittest.TestCase):
+    "test class for the uniform grid"
+
+    def test_matches_brute_force(self):
+        "grid traversal gives the same ranges as the brute force engine"
+        scene = Scene(random_environment(400, 30.0, 0))
+        grid = UniformGrid(scene)
+        sim = LidarSimulator(default_dist=100.0, nb_samples=500, engine='numpy')
+
+        for state in [RobotState(15.0, 15.0, 0.3), RobotState(-5.0, 2.0, 0.0),
+                      RobotState(29.0, 1.0, pi)]:
+            _, brute = sim.lidar_sample(state, scene)
+            _, indexed = sim.lidar_sample(state, grid)
+            np.testing.assert_array_equal(brute, indexed)
+
+    def test_axis_aligned_rays(self):
+        "rays parallel to the grid axes"
+        grid = UniformGrid([LineSegment(Vec2D(0, 0), Vec2D(4, 0)),
+                            LineSegment(Vec2D(4, 0), Vec2D(4, 4)),
+                            Circle(Vec2D(2, 3), 0.5)], cell_size=0.5)
+        origins = np.array([[1.0, 2.0]])
+        directions = np.array([[1.0, 0.0], [0.0, -1.0], [-1.0, 0.0]])
+
+        ranges = grid.cast_rays(origins, directions, 10.0)
+
+        np.testing.assert_allclose(ranges, [3.0, 2.0, 10.0])
+
+    def test_max_dist(self):
+        "hits beyond max_dist are reported as misses"
+        grid = UniformGrid([LineSegment(Vec2D(5, -1), Vec2D(5, 1))])
+
+        self.assertAlmostEqual(grid.cast_ray((0.0, 0.0), (1.0, 0.0)), 5.0)
+        self.assertTrue(grid.cast_ray((0.0, 0.0), (1.0, 0.0), max_dist=4.0) is None)
+
+    def test_cells_registered(self):
+        "a segment is registered in the cells it passes through only"
+        grid = UniformGrid([LineSegment(Vec2D(0, 0), Vec2D(10, 10)),
+                            LineSegment(Vec2D(0, 10), Vec2D(0.1, 10))],
+                           cell_size=1.0)
+
+        diagonal_cells = sum(0 in grid.candidates(i, j)
+                             for i in range(grid.shape[0])
+                             for j in range(grid.shape[1]))
+
+        self.assertTrue(diagonal_cells < grid.shape[0] * grid.shape[1] / 2)
+
+    def test_rebuild_on_scene_change(self):
+        "the index follows modifications of its scene"
+        scene = Scene([LineSegment(Vec2D(5, -1), Vec2D(5, 1))])
+        grid = UniformGrid(scene)
+
+        scene.add(Circle(Vec2D(2, 0), 0.5))
+
+        ranges = grid.cast_rays(np.zeros((1, 2)), np.array([[1.0, 0.0]]), 10.0)
+        np.testing.assert_allclose(ranges, [1.5])
+
+    def test_empty(self):
+        "an empty grid never hits anything"
+        grid = UniformGrid([])
+        ranges = grid.cast_rays(np.zeros((1, 2)), np.array([[1.0, 0.0]]), 7.0)
+        np.testing.assert_allclose(ranges, [7.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -116,6 +116,19 @@ class Vec2DTest(unittest.TestCase):
         self.assertAlmostEqual(1.0/math.sqrt(2) - 1, rot.pos_x)
         self.assertAlmostEqual(1.0/math.sqrt(2), rot.pos_y)
 
+    def test_distance_to(self):
+        "distance between two points"
+        vec1 = Vec2D(1, 2)
+        vec2 = Vec2D(4, 6)
+
+        self.assertAlmostEqual(5.0, vec1.distance_to(vec2))
+        self.assertAlmostEqual(vec1.distance_to(vec2), (vec1 - vec2).length())
+
+    def test_no_instance_dict(self):
+        "vectors are slotted"
+        with self.assertRaises(AttributeError):
+            Vec2D().pos_z = 1.0
+
     def test_unary_minus(self):
         "test unary minus"
 
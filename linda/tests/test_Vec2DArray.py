@@ -0,0 +1,107 @@
+"unit tests for the Vec2DArray class"
+
+import unittest
+import math
+
+import numpy as np
+
+from linda.Vec2D import Vec2D
+from linda.Vec2DArray import Vec2DArray
+
+VECTORS = [Vec2D(1.0, 2.0), Vec2D(-3.0, 0.5), Vec2D(0.0, -4.0), Vec2D(2.5, 2.5)]
+OTHERS = [Vec2D(3.0, 4.0), Vec2D(1.0, 1.0), Vec2D(-2.0, 0.0), Vec2D(0.5, -1.0)]
+
+class Vec2DArrayTest(unittest.TestCase):
+    "test class"
+
+    def setUp(self):
+        self.vecs = Vec2DArray.from_vec2d_list(VECTORS)
+        self.others = Vec2DArray.from_vec2d_list(OTHERS)
+
+    def test_round_trip(self):
+        "conversion from and to lists of Vec2D"
+        self.assertEqual(len(self.vecs), 4)
+        self.assertEqual(self.vecs.data.shape, (4, 2))
+        for vec, ref in zip(self.vecs.to_vec2d_list(), VECTORS):
+            self.assertTrue(vec.is_equal(ref))
+
+    def test_default_constructor(self):
+        "default constructor gives an empty array"
+        self.assertEqual(len(Vec2DArray()), 0)
+
+    def test_products(self):
+        "dot and cross products match Vec2D"
+        np.testing.assert_allclose(
+            self.vecs.dot(self.others),
+            [vec.dot(other) for vec, other in zip(VECTORS, OTHERS)])
+        np.testing.assert_allclose(
+            self.vecs.cross(self.others),
+            [vec.cross(other) for vec, other in zip(VECTORS, OTHERS)])
+
+    def test_broadcast_single_vector(self):
+        "a single Vec2D operand is broadcast"
+        other = Vec2D(1.0, -1.0)
+        np.testing.assert_allclose(self.vecs.dot(other),
+                                   [vec.dot(other) for vec in VECTORS])
+        shifted = self.vecs + other
+        self.assertTrue(shifted[1].is_equal(VECTORS[1] + other))
+
+    def test_length_and_normalized(self):
+        "lengths and unit vectors match Vec2D"
+        np.testing.assert_allclose(self.vecs.length(),
+                                   [vec.length() for vec in VECTORS])
+        np.testing.assert_allclose(self.vecs.normalized().length(), 1.0)
+
+    def test_normalized_null_vector(self):
+        "cannot normalize null vectors"
+        with self.assertRaises(ZeroDivisionError):
+            Vec2DArray([[1.0, 0.0], [0.0, 0.0]]).normalized()
+
+    def test_rotate(self):
+        "rotation around origin and around a point"
+        center = Vec2D(-1.0, 0.5)
+        rotated = self.vecs.rotate(math.pi / 3, center)
+        for vec, ref in zip(rotated, VECTORS):
+            self.assertTrue(vec.is_equal(ref.rotate(math.pi / 3, center)))
+
+        angles = np.array([0.1, 0.2, 0.3, 0.4])
+        rotated = self.vecs.rotate(angles)
+        for vec, ref, angle in zip(rotated, VECTORS, angles):
+            self.assertTrue(vec.is_equal(ref.rotate(angle)))
+
+    def test_oriented_angle(self):
+        "oriented angles match Vec2D"
+        np.testing.assert_allclose(
+            self.vecs.oriented_angle(self.others),
+            [vec.oriented_angle(other) for vec, other in zip(VECTORS, OTHERS)])
+
+    def test_orientation(self):
+        "orientation of point triples"
+        res = Vec2DArray.orientation(Vec2D(0, 0), self.vecs, self.others)
+        np.testing.assert_allclose(
+            res, [Vec2D.orientation(Vec2D(0, 0), vec, other)
+                  for vec, other in zip(VECTORS, OTHERS)])
+
+    def test_arithmetic(self):
+        "negation, addition, subtraction and scaling"
+        factors = np.array([1.0, 2.0, 3.0, 4.0])
+        for idx, ref in enumerate(VECTORS):
+            self.assertTrue((-self.vecs)[idx].is_equal(-ref))
+            self.assertTrue((self.vecs - self.others)[idx].is_equal(ref - OTHERS[idx]))
+            self.assertTrue((self.vecs * 0.5)[idx].is_equal(ref * 0.5))
+            self.assertTrue((self.vecs * factors)[idx].is_equal(ref * factors[idx]))
+
+    def test_from_polar(self):
+        "polar construction"
+        vecs = Vec2DArray.from_polar([0.0, math.pi / 2], [2.0, 3.0])
+        self.assertTrue(vecs[0].is_equal(Vec2D(2.0, 0.0)))
+        self.assertTrue(vecs[1].is_equal(Vec2D(0.0, 3.0)))
+
+    def test_equality(self):
+        "element wise equality"
+        np.testing.assert_array_equal(self.vecs.is_equal(self.vecs), True)
+        np.testing.assert_array_equal(self.vecs.is_equal(self.others), False)
+
+
+if __name__ == "__main__":
+    unittest.main()
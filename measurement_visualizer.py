@@ -1,22 +1,30 @@
-import pygame, sys
+import pygame, os, sys, time, threading
 
 from math import pi, sqrt
-from matplotlib import pyplot as plt
 
 from linda.Vec2D import Vec2D
 from linda.Circle import Circle
-from linda.LineSegment import LineSegment
 from linda.RobotState import RobotState
 from linda.LidarSimulator import LidarSimulator
+from linda.DynamicScene import DynamicScene
+from linda.Motion import advance_robot, rotate_robot
+from linda.ScanLog import ScanLogWriter
+from linda.MapFile import load_scene
 
 PX_PER_METER = 300
 WIDTH = int(3.0 * PX_PER_METER)
 HEIGHT = int(2.0 * PX_PER_METER)
- 
+
+# measurement plot below the map
+PLOT_HEIGHT = 200
+PLOT_MAX_DIST = 3.0
+
 pygame.init()
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+SCREEN = pygame.display.set_mode((WIDTH, HEIGHT + PLOT_HEIGHT))
+FONT = pygame.font.Font(None, 24)
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
+GREY = (80, 80, 80)
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
@@ -24,17 +32,73 @@ YELLOW = (255, 255, 0)
 CYAN = (0, 255, 255)
 PURPLE = (255, 0, 255)
 
-BOTTOM_WALL = LineSegment(Vec2D(0.0, 0.0), Vec2D(3.0, 0.0))
-RIGHT_WALL = LineSegment(Vec2D(3.0, 0.0), Vec2D(3.0, 2.0))
-TOP_WALL = LineSegment(Vec2D(3.0, 2.0), Vec2D(0.0, 2.0))
-LEFT_WALL = LineSegment(Vec2D(0.0, 2.0), Vec2D(0.0, 0.0))
-
-WALLS = [BOTTOM_WALL, RIGHT_WALL, TOP_WALL, LEFT_WALL]
+MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'maps', 'room.json')
 
 SPEED = 0.1
 OMEGA = pi
 
-PLOT_UPDATE = 3.0
+FPS = 60
+
+SCAN_LOG = 'measurements.lscan'
+
+class LatestValue(object):
+    "single slot handoff between threads, put overwrites whatever the \
+    consumer has not taken yet so it always works on the newest value"
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self._fresh = False
+
+    def put(self, value):
+        with self._cond:
+            self._value = value
+            self._fresh = True
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        "newest value not taken yet, waits up to timeout (forever if None, \
+        not at all if 0) and returns None if there is none"
+        with self._cond:
+            if not self._fresh and timeout != 0:
+                self._cond.wait(timeout)
+            if not self._fresh:
+                return None
+            self._fresh = False
+            return self._value
+
+class ScanWorker(object):
+    "simulates scans in a background thread, requests and results are \
+    handed over through LatestValue slots so neither side ever blocks on \
+    the other and stale requests are dropped"
+
+    def __init__(self, sim, world):
+        self.sim = sim
+        self.world = world
+        self.requests = LatestValue()
+        self.results = LatestValue()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, robot_state, noise_sigma):
+        self.requests.put((time.perf_counter(), robot_state, noise_sigma))
+
+    def stop(self):
+        self._running = False
+        self.requests.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while self._running:
+            request = self.requests.take()
+            if request is None:
+                continue
+            requested_at, robot_state, noise_sigma = request
+            meas = self.sim.lidar_sample(robot_state, self.world,
+                                         noise_sigma=noise_sigma)
+            self.results.put((requested_at, robot_state, meas))
 
 def main():
 
@@ -45,20 +109,28 @@ def main():
     left = False
     right = False
     noisy = False
+    recorder = None
 
     clk = pygame.time.Clock()
 
-    circles = []
+    # walls are compiled once (and cached), obstacles are inserted/moved
+    # by handle
+    map_file = sys.argv[1] if len(sys.argv) > 1 else MAP_FILE
+    world = DynamicScene(load_scene(map_file))
 
-    sim = LidarSimulator(default_dist=3.0, nb_samples=100, angular_cutoff=pi)
-    
-    plot_info = init_plot()
+    sim = LidarSimulator(default_dist=3.0, nb_samples=100, angular_cutoff=pi,
+                         engine='numpy')
+    worker = ScanWorker(sim, world)
 
-    time_acc = 0.0
+    scan = None
+    latency = 0.0
 
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                worker.stop()
+                if recorder is not None:
+                    recorder.close()
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
@@ -72,6 +144,8 @@ def main():
                     right = True
                 elif event.key == pygame.K_n:
                     noisy = not noisy
+                elif event.key == pygame.K_r:
+                    recorder = toggle_recording(recorder, sim)
             elif event.type == pygame.KEYUP:
                 if event.key == pygame.K_w:
                     forward = False
@@ -82,9 +156,7 @@ def main():
                 elif event.key == pygame.K_d:
                     right = False
 
-        SCREEN.fill(BLACK)
-
-        delta_t = clk.tick(10) / 1000
+        delta_t = clk.tick(FPS) / 1000
 
         if forward:
             robot_state = advance_robot(robot_state, SPEED * delta_t)
@@ -100,57 +172,75 @@ def main():
         else:
             noise_sigma = None
 
-        sim_meas = sim.lidar_sample(robot_state, WALLS + circles, noise_sigma=noise_sigma)
-
-        time_acc += delta_t
+        worker.request(robot_state, noise_sigma)
 
-        if time_acc > PLOT_UPDATE:
-            time_acc = 0.0
-            plot_measurement(plot_info, sim_meas)
+        result = worker.results.take(timeout=0)
+        if result is not None:
+            requested_at, scan_state, sim_meas = result
+            latency = time.perf_counter() - requested_at
+            scan = (scan_state, sim_meas)
+            if recorder is not None:
+                recorder.write(time.time(), scan_state, sim_meas[1])
 
-        draw_env(WALLS, circles)
+        SCREEN.fill(BLACK)
 
+        draw_env(list(world.static) + world.dynamic_elements())
+        if scan is not None:
+            draw_scan_points(*scan)
+            draw_measurement(scan[1])
         draw_robot(robot_state)
-        
-        pygame.display.update()
+        draw_stats(clk.get_fps(), latency, recorder is not None)
 
-def advance_robot(robot_state, amnt):
-    pos = Vec2D(robot_state.x, robot_state.y)
-    direction = Vec2D(1, 0).rotate(robot_state.theta)
-
-    n_pos = pos + direction * amnt
-
-    return RobotState(n_pos.pos_x, n_pos.pos_y, robot_state.theta)
+        pygame.display.update()
 
-def rotate_robot(robot_state, amnt):
-    return RobotState(robot_state.x, robot_state.y, robot_state.theta + amnt)
+def toggle_recording(recorder, sim):
+    if recorder is None:
+        return ScanLogWriter.for_simulator(SCAN_LOG, sim)
+    recorder.close()
+    return None
 
 def world_to_screen(p):
     return (int(p.pos_x * PX_PER_METER), HEIGHT - int(p.pos_y * PX_PER_METER))
 
-def init_plot():
-    plt.ion()
-    ax = plt.axes()
-    line, = plt.plot([], 'ro')
-    plt.xlim([-pi, pi])
-    plt.ylim([0.0, 3.0])
-    plt.xlabel('angle')
-    plt.ylabel('dist')
-
-    return ax, line
+def plot_to_screen(angle, dist):
+    "position of a measurement in the plot panel below the map"
+    x_px = int((angle + pi) / (2 * pi) * (WIDTH - 1))
+    dist = min(max(dist, 0.0), PLOT_MAX_DIST)
+    y_px = HEIGHT + PLOT_HEIGHT - 1 - int(dist / PLOT_MAX_DIST * (PLOT_HEIGHT - 1))
+    return (x_px, y_px)
+
+def draw_measurement(meas):
+    "plot of dist over angle drawn directly with pygame"
+    pygame.draw.line(SCREEN, GREY, (0, HEIGHT), (WIDTH, HEIGHT), 1)
+    pygame.draw.line(SCREEN, GREY, (WIDTH // 2, HEIGHT),
+                     (WIDTH // 2, HEIGHT + PLOT_HEIGHT), 1)
+    x_vals, y_vals = meas
+    for angle, dist in zip(x_vals.tolist(), y_vals.tolist()):
+        if dist == dist:
+            pygame.draw.circle(SCREEN, RED, plot_to_screen(angle, dist), 2)
 
-def plot_measurement(plot_info, meas):
-    a, l = plot_info
+def draw_scan_points(robot_state, meas):
+    "measured points in the map at the pose the scan was taken from"
+    pos = Vec2D(robot_state.x, robot_state.y)
     x_vals, y_vals = meas
-    l.set_xdata(x_vals)
-    l.set_ydata(y_vals)
-    plt.pause(0.01)
-
-def draw_env(walls, circles):
-    for wall in walls:
-        draw_wall(wall)
-    for circle in circles:
-        draw_circle(circle)
+    for angle, dist in zip(x_vals.tolist(), y_vals.tolist()):
+        if dist == dist:
+            point = pos + Vec2D(dist, 0).rotate(robot_state.theta + angle)
+            pygame.draw.circle(SCREEN, YELLOW, world_to_screen(point), 2)
+
+def draw_stats(fps, latency, recording):
+    text = "{:5.1f} fps   scan latency {:5.1f} ms".format(fps, latency * 1000)
+    if recording:
+        text += "   recording"
+    SCREEN.blit(FONT.render(text, True, WHITE), (10, 10))
+
+def draw_env(elements):
+    # maps may mix walls and circles, scenes materialize polylines as walls
+    for elem in elements:
+        if isinstance(elem, Circle):
+            draw_circle(elem)
+        else:
+            draw_wall(elem)
 
 def draw_circle(circle):
     pygame.draw.circle(SCREEN,
@@ -7,7 +7,14 @@ args = dict(
         version='0.1',
         description='lidar rangefinder playground',
         packages=['linda'],
-        install_requires=['numpy, scipy'],
+        # multiprocessing.shared_memory
+        python_requires='>=3.8',
+        install_requires=['numpy', 'scipy'],
+        entry_points={
+            'console_scripts': [
+                'linda-simulate = linda.BatchSimulation:main',
+            ],
+        },
         author='Pius von Daeniken',
         url='https://github.com/31415us/linda-lidar-rangefinder-playground'
 )